@@ -0,0 +1,120 @@
+"""``--adaptive``: render only the timesteps whose field changes noticeably."""
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+from .repack import read_polydata
+
+ADAPTIVE_METRICS = ("max", "rms")
+
+# Frames loaded ahead of the comparison while the current one is compared.
+_LOOKAHEAD = 4
+
+
+def field_values(data, name: str) -> Optional[np.ndarray]:
+    """Return the values of array *name* (point data first, then cell data)."""
+    for attributes in (data.GetPointData(), data.GetCellData()):
+        array = attributes.GetArray(name)
+        if array is not None:
+            return vtk_to_numpy(array)
+    return None
+
+
+def field_change(
+    reference: Optional[np.ndarray],
+    values: Optional[np.ndarray],
+    metric: str = "max",
+) -> float:
+    """Return the L-infinity (``max``) or RMS (``rms``) difference of two arrays.
+
+    Arrays of different shape (a changed mesh) or a missing array count as
+    an infinite change.
+    """
+    if reference is None or values is None or reference.shape != values.shape:
+        return float("inf")
+    if values.size == 0:
+        return 0.0
+    difference = np.abs(values.astype(np.float64) - reference)
+    if metric == "rms":
+        return float(np.sqrt(np.mean(difference * difference)))
+    return float(np.nanmax(difference))
+
+
+def _frame_values(
+    frames: Sequence[Tuple[str, ...]],
+    name: str,
+    loader: Callable[[str], object],
+) -> Iterator[Optional[Future]]:
+    """Yield a future of the field values of every frame, loading a few frames ahead.
+
+    None is yielded for a frame showing the same files as the one before.
+    """
+
+    def _load(paths: Tuple[str, ...]) -> List[Optional[np.ndarray]]:
+        values = []
+        for path in paths:
+            array = field_values(loader(path), name)
+            values.append(None if array is None else np.array(array, dtype=np.float64))
+        return values
+
+    with ThreadPoolExecutor(max_workers=_LOOKAHEAD) as pool:
+        pending: deque = deque()
+        previous: Optional[Tuple[str, ...]] = None
+        for paths in frames:
+            if paths == previous:
+                pending.append(None)
+            else:
+                pending.append(pool.submit(_load, paths))
+            previous = paths
+            if len(pending) > _LOOKAHEAD:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
+def select_frames(
+    frames: Sequence[Sequence[str]],
+    name: str,
+    threshold: float,
+    scale: float,
+    metric: str = "max",
+    loader: Callable[[str], object] = read_polydata,
+    on_frame: Optional[Callable[[int], None]] = None,
+) -> List[int]:
+    """Return the indices of the frames worth rendering.
+
+    *frames* lists the files shown at each frame (one per source). A frame
+    is kept when the field of any source differs from the last kept frame
+    by more than ``threshold * scale``; comparing against the last kept
+    frame means slow drifts are still picked up. The first and last
+    frames are always kept.
+    """
+    frames = [tuple(paths) for paths in frames]
+    if len(frames) <= 2:
+        return list(range(len(frames)))
+    limit = threshold * scale
+    kept: List[int] = []
+    reference: List[Optional[np.ndarray]] = []
+    current: List[Optional[np.ndarray]] = []
+    for index, loaded in enumerate(_frame_values(frames, name, loader)):
+        if loaded is not None:
+            current = loaded.result()
+        if not kept or index == len(frames) - 1 or any(
+            field_change(old, new, metric) > limit for old, new in zip(reference, current)
+        ):
+            kept.append(index)
+            reference = current
+        if on_frame is not None:
+            on_frame(index)
+    return kept
+
+
+def merge_durations(durations: Sequence[float], kept: Sequence[int]) -> List[float]:
+    """Give each kept frame the display time of the skipped frames that follow it."""
+    bounds = list(kept) + [len(durations)]
+    return [float(sum(durations[start:end])) for start, end in zip(bounds, bounds[1:])]
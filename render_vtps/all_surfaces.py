@@ -0,0 +1,260 @@
+"""``--all-surfaces``: one movie per discovered VTP basename on a worker pool."""
+from __future__ import annotations
+
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .derived import DERIVED_CACHE_DIR, DerivedArrayStore, derived_loader, parse_field
+from .discovery import find_vtp_files, is_vtkhdf_file
+from .repack import read_polydata
+from .roi import ROI_CACHE_DIR, RoiCellStore, parse_roi, roi_loader, stats_cache_name
+from .stats import StatsCache, stats_range
+
+# Options rewritten for every child run.
+CHILD_OPTIONS = frozenset({
+    "all_surfaces",
+    "animation_filename",
+    "checkpoint_dir",
+    "discovery_cache",
+    "range",
+    "representation",
+    "stats_csv",
+    "surface_jobs",
+    "time_dirs_path",
+    "vtp_filename",
+})
+
+
+def discover_surfaces(time_paths: Sequence[str]) -> Dict[str, Dict[str, List[str]]]:
+    """Run one discovery pass over *time_paths*.
+
+    Returns ``{absolute path: {"time_dirs": [...], "vtp_files": [...]}}``,
+    the form read back by ``load_discovery``.
+    """
+    discovered: Dict[str, Dict[str, List[str]]] = {}
+    for path in time_paths:
+        if is_vtkhdf_file(path):
+            raise ValueError(
+                f"--all-surfaces needs time-directory trees; '{path}' is a VTKHDF file."
+            )
+        time_dirs, vtp_files = find_vtp_files(path)
+        if not vtp_files:
+            raise FileNotFoundError(f"No VTP files found under {path}.")
+        discovered[os.path.abspath(path)] = {"time_dirs": time_dirs, "vtp_files": vtp_files}
+    return discovered
+
+
+def load_discovery(cache_path: Optional[str]) -> Dict[str, Dict[str, List[str]]]:
+    """Read a discovery file written by the ``--all-surfaces`` parent run."""
+    if not cache_path:
+        return {}
+    with open(cache_path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def surface_files(time_dirs: Sequence[str], vtp_files: Sequence[str]) -> Dict[str, List[str]]:
+    """Group *vtp_files* by basename, each list in the order of *time_dirs*."""
+    rank = {os.path.abspath(d): i for i, d in enumerate(time_dirs)}
+
+    def _time_rank(path: str) -> int:
+        parent = os.path.dirname(os.path.abspath(path))
+        while parent not in rank and os.path.dirname(parent) != parent:
+            parent = os.path.dirname(parent)
+        return rank.get(parent, len(rank))
+
+    by_name: Dict[str, List[str]] = {}
+    for path in sorted(vtp_files, key=_time_rank):
+        by_name.setdefault(os.path.basename(path), []).append(path)
+    return dict(sorted(by_name.items()))
+
+
+def _shared_range(args, files: List[str]) -> Optional[Tuple[float, float]]:
+    """Return the range of ``--field`` over all *files* from the stats cache."""
+    derived = parse_field(args.field)
+    loader = None
+    if derived is not None:
+        store = DerivedArrayStore(os.path.join(args.output_folder, DERIVED_CACHE_DIR), derived)
+        loader = derived_loader(derived, store)
+    name = derived.label if derived is not None else args.field
+    roi = parse_roi(args.roi)
+    if roi is not None:
+        store = RoiCellStore(os.path.join(args.output_folder, ROI_CACHE_DIR), roi)
+        loader = roi_loader(roi, store, loader or read_polydata)
+    cache = StatsCache(
+        os.path.join(args.output_folder, stats_cache_name(roi)),
+        loader=loader,
+        required=name if derived is not None else None,
+    )
+    file_stats = cache.file_stats(files)
+    cache.save()
+    for assoc in ("POINTS", "CELLS"):
+        scanned = stats_range(file_stats, assoc, name, "global")
+        if scanned is not None:
+            return scanned
+    return None
+
+
+def _shared_camera(
+    first_files: Sequence[str],
+    roi_bounds: Optional[Sequence[float]] = None,
+) -> Optional[str]:
+    """Return a ``--camera`` value framing the union bounds of *first_files*.
+
+    Mirrors ParaView's reset camera: looking down -Z with a 30 degree view
+    angle at the bounding sphere of all surfaces (or of the ``--roi`` box).
+    """
+    if roi_bounds is not None:
+        bounds = [tuple(roi_bounds)]
+    else:
+        with ThreadPoolExecutor() as pool:
+            bounds = [
+                b for b in pool.map(lambda p: read_polydata(p).GetBounds(), first_files)
+                if b[0] <= b[1]
+            ]
+    if not bounds:
+        return None
+    low = [min(b[2 * axis] for b in bounds) for axis in range(3)]
+    high = [max(b[2 * axis + 1] for b in bounds) for axis in range(3)]
+    center = [(lo + hi) / 2.0 for lo, hi in zip(low, high)]
+    radius = 0.5 * math.sqrt(sum((hi - lo) ** 2 for lo, hi in zip(low, high))) or 1.0
+    distance = radius / math.sin(math.radians(15.0))
+    position = [center[0], center[1], center[2] + distance]
+    return ",".join(f"{v:.9g}" for v in (*position, *center, 0.0, 1.0, 0.0))
+
+
+def _strip_options(argv: Sequence[str], parser, dests: frozenset) -> List[str]:
+    """Remove the options with a destination in *dests* from *argv*.
+
+    Abbreviated long options (``--all-surf``) are resolved the way argparse
+    resolves them: a prefix naming a single option.
+    """
+    actions = parser._option_string_actions
+    rest: List[str] = []
+    args = iter(argv)
+    for arg in args:
+        option, eq, _value = arg.partition("=")
+        action = actions.get(option)
+        if action is None and option.startswith("--") and parser.allow_abbrev:
+            matches = {id(a): a for name, a in actions.items() if name.startswith(option)}
+            if len(matches) == 1:
+                action = next(iter(matches.values()))
+        if action is not None and action.dest in dests:
+            if not eq and action.nargs != 0:
+                next(args, None)
+            continue
+        rest.append(arg)
+    return rest
+
+
+def run_all_surfaces(args, argv: Sequence[str], parser) -> None:
+    """Render one movie per VTP basename found under ``--path``.
+
+    The tree is discovered once and shared with the child runs through a
+    discovery file; the color range (with ``--field``) and the camera are
+    computed once over all surfaces, then ``--surface-jobs`` pvpython
+    processes render the movies.
+    """
+    if args.vtp_filename:
+        raise ValueError("--all-surfaces renders every VTP file; do not combine it with --vtp.")
+    if args.interactive_mode:
+        raise ValueError(
+            "--interactive is not available with --all-surfaces; set the camera "
+            "once with --interactive and pass it with --camera."
+        )
+    os.makedirs(args.output_folder, exist_ok=True)
+    time_paths: List[str] = args.time_dirs_path or ["."]
+    discovered = discover_surfaces(time_paths)
+
+    surfaces: List[Tuple[int, str, str, List[str]]] = []
+    for index, path in enumerate(time_paths):
+        tree = discovered[os.path.abspath(path)]
+        by_name = surface_files(tree["time_dirs"], tree["vtp_files"])
+        for basename, files in by_name.items():
+            stem = os.path.splitext(basename)[0]
+            name = (
+                f"{args.animation_filename}_{stem}" if len(time_paths) == 1
+                else f"{args.animation_filename}_{index + 1:02d}_{stem}"
+            )
+            surfaces.append((index, basename, name, files))
+    print(f"[SURFACES] Found {len(surfaces)} surfaces under {len(time_paths)} path(s).")
+
+    shared: List[str] = []
+    value_range = args.range
+    if not value_range and args.field:
+        scanned = _shared_range(args, [f for *_rest, files in surfaces for f in files])
+        if scanned is not None:
+            value_range = f"{scanned[0]:.9g},{scanned[1]:.9g}"
+            print(f"[SURFACES] Shared range for '{args.field}': {value_range}")
+    if value_range:
+        shared.append(f"--range={value_range}")
+    if not args.camera_view_point:
+        roi = parse_roi(args.roi)
+        camera = _shared_camera(
+            [files[0] for *_rest, files in surfaces],
+            roi.bounds if roi is not None else None,
+        )
+        if camera is not None:
+            shared.append(f"--camera={camera}")
+
+    base_argv = _strip_options(argv, parser, CHILD_OPTIONS)
+    pvpython = os.environ.get("PVPYTHON") or sys.executable
+    entry = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_pv_entry.py")
+    representations = args.source_representations
+
+    with tempfile.NamedTemporaryFile(
+        "w",
+        prefix=".render_vtps_discovery_",
+        suffix=".json",
+        dir=args.output_folder,
+        delete=False,
+    ) as handle:
+        json.dump(discovered, handle)
+        discovery_path = handle.name
+
+    def _render(surface: Tuple[int, str, str, List[str]]) -> Tuple[str, int]:
+        index, basename, name, _files = surface
+        cmd = [
+            pvpython, entry, *base_argv, *shared,
+            "--path", time_paths[index],
+            "--vtp", basename,
+            "--name", name,
+            "--representation", representations[index],
+            "--discovery-cache", discovery_path,
+        ]
+        # Per-run outputs that would otherwise collide between surfaces
+        if args.stats_csv:
+            root, ext = os.path.splitext(args.stats_csv)
+            cmd.append(f"--stats-csv={root}_{name[len(args.animation_filename) + 1:]}{ext}")
+        if args.checkpoint_dir:
+            cmd.append(f"--checkpoint-dir={os.path.join(args.checkpoint_dir, name)}")
+        return name, subprocess.call(cmd)
+
+    progress = getattr(args, "progress_reporter", None)
+    if progress is not None:
+        progress.start("surfaces", total=len(surfaces), unit="movies")
+    failed: List[str] = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.surface_jobs)) as pool:
+            futures = [pool.submit(_render, surface) for surface in surfaces]
+            for done, future in enumerate(as_completed(futures), start=1):
+                name, status = future.result()
+                if status != 0:
+                    failed.append(name)
+                print(
+                    f"[SURFACES] {done}/{len(surfaces)} {name}: "
+                    f"{'done' if status == 0 else f'failed ({status})'}"
+                )
+                if progress is not None:
+                    progress.advance()
+    finally:
+        os.remove(discovery_path)
+    if progress is not None:
+        progress.finish()
+    if failed:
+        raise RuntimeError(f"{len(failed)} surface movie(s) failed: {', '.join(failed)}")
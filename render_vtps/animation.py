@@ -5,14 +5,68 @@ from __future__ import annotations
 
 import os
 import shutil
-import subprocess
 import tempfile
-from xml.sax.saxutils import escape
-from typing import Dict, List, Optional, Tuple
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Tuple
 
 import paraview.simple as pv
 
-from .pv_helpers import apply_colormap_preset
+from .adaptive import merge_durations, select_frames
+from .camera_path import CameraPathHook, load_camera_path
+from .checkpoint import (
+    checkpoint_directory,
+    clear_checkpoint,
+    open_checkpoint,
+    render_state_hash,
+)
+from .dedup import frame_content_keys, repeated_frames
+from .derived import DERIVED_CACHE_DIR, DerivedArrayStore, derived_loader, parse_field
+from .discovery import is_vtkhdf_file
+from .encoder import (
+    DEFAULT_SEGMENT_SECONDS,
+    OutputFormat,
+    apply_encoder_settings,
+    needs_ffmpeg,
+    parse_formats,
+)
+from .frames import (
+    encode_png_sequence,
+    render_frames,
+    scene_frame_times,
+    store_frames,
+    stream_frames,
+    subsample_indices,
+)
+from .framestore import create_frame_store, encode_frame_store
+from .prefetch import (
+    PrefetchFeeder,
+    create_producers,
+    reader_timestep_values,
+    series_file_index,
+)
+from .preview import decimate_source, write_preview
+from .progress import PROGRESS_CUE_SCRIPT, ProgressHook, ProgressReporter, set_active_hook
+from .pv_helpers import (
+    apply_colormap_preset,
+    data_on_client,
+    data_range,
+    field_stats,
+    reader_file_names,
+    scalar_arrays,
+)
+from .repack import read_polydata
+from .roi import ROI_CACHE_DIR, RoiCellStore, camera_roi, parse_roi, roi_loader, stats_cache_name
+from .stats import (
+    FileStats,
+    RenderPassStats,
+    StatsCache,
+    stats_key,
+    stats_range,
+    write_stats_csv,
+)
+from .surface_collections import write_surface_collections
+from .tiles import TiledCapture
+from .timeline import Timeline, parse_timeline
 from .utils import (
     apply_background_color,
     apply_foreground_color,
@@ -22,6 +76,7 @@ from .utils import (
     parse_fixed_range,
     parse_render_size,
 )
+from .visualize import display_sources
 
 FOREGROUND_COLOR = (0.0, 0.0, 0.0)
 
@@ -38,26 +93,11 @@ def _determine_active_field(
       first available scalar (POINTS preferred, else CELLS)
       (None, None) if no scalars found
     """
-    pt_scalars, cl_scalars = [], []
-
     try:
-        data = pv.servermanager.Fetch(reader)
-        if data:
-            point_data = data.GetPointData()
-            cell_data = data.GetCellData()
-            if point_data:
-                for i in range(point_data.GetNumberOfArrays()):
-                    arr = point_data.GetArray(i)
-                    if arr and arr.GetNumberOfComponents() == 1:
-                        pt_scalars.append(arr.GetName())
-            if cell_data:
-                for i in range(cell_data.GetNumberOfArrays()):
-                    arr = cell_data.GetArray(i)
-                    if arr and arr.GetNumberOfComponents() == 1:
-                        cl_scalars.append(arr.GetName())
+        # Data information is gathered from every rank without fetching the data.
+        pt_scalars, cl_scalars = scalar_arrays(reader)
     except Exception:
-        # If Fetch fails, we'll just return (None, None) below.
-        pass
+        pt_scalars, cl_scalars = [], []
 
     field_arg = getattr(args, "field", None)
     if field_arg:
@@ -104,173 +144,256 @@ def _normalise_key_times(tvalues: List[float]) -> List[float]:
     return [(t - min(tvalues)) / span for t in tvalues]
 
 
-def _surface_file_lists(readers: List[object], count: int) -> List[List[str]]:
-    file_lists: List[List[str]] = []
-    for reader in readers[:count]:
-        file_names = getattr(reader, "FileNames", None)
-        if not file_names:
-            file_lists.append([])
-        elif isinstance(file_names, str):
-            file_lists.append([file_names])
-        else:
-            file_lists.append(list(file_names))
-    return file_lists
-
-
-def _safe_surface_name(file_list: List[str], index: int) -> str:
-    stem = f"surface_{index + 1:02d}"
-    if file_list:
-        stem = os.path.splitext(os.path.basename(file_list[0]))[0]
-    safe = "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in stem)
-    return safe
-
-
-def _unique_surface_name(base_name: str, used_names: set[str]) -> str:
-    name = base_name
-    suffix = 2
-    while name in used_names:
-        name = f"{base_name}_{suffix:02d}"
-        suffix += 1
-    used_names.add(name)
-    return name
-
-
-def _link_or_copy(src: str, dst: str) -> None:
-    if os.path.lexists(dst):
-        os.remove(dst)
-    try:
-        target = os.path.relpath(os.path.abspath(src), start=os.path.dirname(dst))
-        os.symlink(target, dst)
-    except OSError:
-        shutil.copy2(src, dst)
-
-
-def _write_surface_collections(output_folder: str, readers: List[object], surface_count: int) -> None:
-    collections_root = os.path.join(output_folder, "surface_collections")
-    os.makedirs(collections_root, exist_ok=True)
-    used_names: set[str] = set()
-
-    for index, file_list in enumerate(_surface_file_lists(readers, surface_count)):
-        if not file_list:
-            continue
+def _frame_files(
+    readers: List[object],
+    surface_count: int,
+    data_times: List[float],
+) -> Optional[List[Tuple[int, List[str]]]]:
+    """Return (reader index, file shown at every frame) for each surface reader.
 
-        surface_name = _unique_surface_name(
-            _safe_surface_name(file_list, index),
-            used_names,
-        )
-        surface_dir = os.path.join(
-            collections_root,
-            surface_name,
+    Returns None when a source is not a plain file series (e.g. VTKHDF).
+    """
+    per_source: List[Tuple[int, List[str]]] = []
+    for index, reader in enumerate(readers[:surface_count]):
+        files = reader_file_names(reader)
+        if not files or any(is_vtkhdf_file(f) for f in files):
+            return None
+        times = reader_timestep_values(reader)
+        per_source.append(
+            (index, [files[series_file_index(times, len(files), t)] for t in data_times])
         )
-        os.makedirs(surface_dir, exist_ok=True)
-
-        datasets: List[Tuple[float, str]] = []
-        for step, src in enumerate(file_list):
-            try:
-                timestep = float(os.path.basename(os.path.dirname(src)))
-            except ValueError:
-                timestep = float(step)
-            ext = os.path.splitext(src)[1]
-            local_name = f"{surface_name}_{step:06d}{ext}"
-            local_path = os.path.join(surface_dir, local_name)
-            _link_or_copy(src, local_path)
-            datasets.append((timestep, local_name))
-
-        pvd_path = os.path.join(surface_dir, "collection.pvd")
-        with open(pvd_path, "w", encoding="utf-8") as handle:
-            handle.write(
-                "<?xml version=\"1.0\"?>\n"
-                "<VTKFile type=\"Collection\" version=\"0.1\" byte_order=\"LittleEndian\">\n"
-                "  <Collection>\n"
-            )
-            for timestep, src in datasets:
-                handle.write(
-                    f"    <DataSet timestep=\"{timestep:.16g}\" group=\"\" part=\"0\" file=\"{escape(src)}\"/>\n"
-                )
-            handle.write(
-                "  </Collection>\n"
-                "</VTKFile>\n"
-            )
-
-        print(f"[EXPORT] Wrote surface collection: {pvd_path}")
-
-
-def _frame_paths(folder: str) -> List[str]:
-    return sorted(
-        os.path.join(folder, name)
-        for name in os.listdir(folder)
-        if name.lower().endswith(".png")
+    return per_source
+
+
+def _range_from_stats_cache(
+    cache: StatsCache,
+    frame_files: List[Tuple[int, List[str]]],
+    assoc: str,
+    field: str,
+    progress: Optional[ProgressReporter] = None,
+) -> Optional[Tuple[float, float]]:
+    """Return the field range over the frames from cached per-file stats."""
+    paths = list(dict.fromkeys(path for _index, files in frame_files for path in files))
+    if not paths:
+        return None
+    on_file = None
+    if progress is not None:
+        progress.start("range_scan", total=len(paths), unit="files")
+
+        def on_file(path: str, computed: bool) -> None:
+            progress.advance(1, os.path.getsize(path) if computed else 0)
+
+    file_stats = cache.file_stats(paths, on_file=on_file)
+    cache.save()
+    if progress is not None:
+        progress.finish()
+    return stats_range(file_stats, assoc, field, "global")
+
+
+def _adaptive_frames(
+    frame_files: List[Tuple[int, List[str]]],
+    field: str,
+    threshold: float,
+    scale: float,
+    metric: str,
+    loader: Callable[[str], object],
+    progress: Optional[ProgressReporter] = None,
+) -> List[int]:
+    """Return the frames worth rendering for ``--adaptive`` (see adaptive.select_frames)."""
+    frames = list(zip(*[files for _index, files in frame_files]))
+    if progress is not None:
+        progress.start("adaptive_scan", total=len(frames), unit="frames")
+    kept = select_frames(
+        frames,
+        field,
+        threshold,
+        scale,
+        metric=metric,
+        loader=loader,
+        on_frame=(lambda index: progress.update(index + 1)) if progress is not None else None,
     )
-
-
-def _save_animation_with_first_frame_hold(
-    movie_path: str,
+    if progress is not None:
+        progress.finish()
+    return kept
+
+
+def _write_stats_csv(
+    csv_path: str,
+    cache: StatsCache,
+    frame_files: List[Tuple[int, List[str]]],
+    frame_times: List[float],
+    assoc: str,
+    field: str,
+) -> None:
+    rows: Dict[Tuple[float, str, str], None] = {}
+    for index, files in frame_files:
+        source = f"{index + 1:02d}_{os.path.splitext(os.path.basename(files[0]))[0]}"
+        for time, path in zip(frame_times, files):
+            rows.setdefault((float(time), source, path))
+    # Files not loaded by the range scan or the render pass are read here.
+    file_stats = cache.file_stats([path for _time, _source, path in rows])
+    cache.save()
+    written = write_stats_csv(csv_path, list(rows), file_stats, assoc, field)
+    print(f"[STATS] Wrote {written} rows for '{field}' to {csv_path}")
+
+
+def _write_server_stats_csv(
+    csv_path: str,
+    readers: List[object],
+    frame_files: List[Tuple[int, List[str]]],
+    frame_times: List[float],
+    data_times: List[float],
+    assoc: str,
+    field: str,
+) -> None:
+    """Write ``--stats-csv`` from stats computed by the server ranks (MPI, --server)."""
+    rows: Dict[Tuple[float, str, str], FileStats] = {}
+    for index, files in frame_files:
+        source = f"{index + 1:02d}_{os.path.splitext(os.path.basename(files[0]))[0]}"
+        for time, data_time, path in zip(frame_times, data_times, files):
+            if (float(time), source, path) in rows:
+                continue
+            stats = field_stats(readers[index], assoc, field, time=data_time)
+            rows[(float(time), source, path)] = {stats_key(assoc, field): stats} if stats else {}
+    written = write_stats_csv(csv_path, list(rows), list(rows.values()), assoc, field)
+    print(f"[STATS] Wrote {written} rows for '{field}' to {csv_path} (server-side, no sample_mean)")
+
+
+def _identical_frames(
+    readers: List[object],
+    surface_count: int,
+    fields: List[str],
+    data_times: List[float],
+    labels: List[str],
+) -> Dict[int, bool]:
+    """Find frames whose inputs match the previous frame (see dedup.repeated_frames)."""
+    series: List[Tuple[List[str], List[float]]] = []
+    for reader in readers[:surface_count]:
+        files = reader_file_names(reader)
+        if any(is_vtkhdf_file(f) for f in files):
+            return {}
+        if len(files) > 1:
+            series.append((files, reader_timestep_values(reader)))
+    if not series:
+        return {}
+    frames = [
+        [files[series_file_index(times, len(files), t)] for files, times in series]
+        for t in data_times
+    ]
+    return repeated_frames(frame_content_keys(frames, fields), labels)
+
+
+def _save_frame_sequence(
+    outputs: List[Tuple[OutputFormat, str]],
     export_view: object,
     image_size: List[int],
     fps: int,
-    frame_window: List[int],
-    hold_seconds: float,
+    data_times: List[float],
+    durations: Optional[List[float]],
     output_folder: str,
     animation_filename: str,
+    prepare_frame: Optional[Callable[[int, float], None]] = None,
+    frame_dir: Optional[str] = None,
+    resume: bool = False,
+    repeats: Optional[Dict[int, bool]] = None,
+    relabel: Optional[Callable[[int], None]] = None,
+    encode_jobs: int = 1,
+    segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+    progress: Optional[ProgressReporter] = None,
+    tiles: Optional[TiledCapture] = None,
 ) -> None:
     ffmpeg_path = shutil.which("ffmpeg")
     if ffmpeg_path is None:
         raise RuntimeError(
-            "--hold-first-frame requires ffmpeg to encode the held-frame movie."
+            "--hold-first-frame, --timeline, --prefetch, --tile-size, checkpoints, encoder "
+            "settings and extra --format movies require ffmpeg to encode the frame sequence."
         )
 
-    hold_frame_count = max(1, int(round(hold_seconds * fps)))
-
     with tempfile.TemporaryDirectory(
         prefix=f".{animation_filename}_frames_",
         dir=output_folder,
     ) as tmp_dir:
-        source_dir = os.path.join(tmp_dir, "source")
-        expanded_dir = os.path.join(tmp_dir, "expanded")
-        os.makedirs(source_dir, exist_ok=True)
-        os.makedirs(expanded_dir, exist_ok=True)
-
-        pv.SaveAnimation(
-            os.path.join(source_dir, "frame.png"),
+        # Checkpointed renders keep their frames outside the temp dir.
+        source_dir = frame_dir or tmp_dir
+        source_frames = render_frames(
             export_view,
-            ImageResolution=image_size,
-            FrameRate=fps,
-            FrameWindow=frame_window,
+            image_size,
+            data_times,
+            source_dir,
+            prepare_frame=prepare_frame,
+            resume=resume,
+            repeats=repeats,
+            relabel=relabel,
+            tiles=tiles,
+        )
+        if progress is not None:
+            progress.finish()
+            progress.start("encode", total=len(outputs), unit="movies")
+        # Holds and slow motion are frame durations, so every frame is encoded once.
+        encode_png_sequence(
+            ffmpeg_path,
+            source_dir,
+            fps,
+            outputs,
+            frame_count=len(source_frames),
+            jobs=encode_jobs,
+            segment_seconds=segment_seconds,
+            durations=durations,
         )
 
-        source_frames = _frame_paths(source_dir)
-        if not source_frames:
-            raise RuntimeError("ParaView did not write any PNG frames.")
-
-        output_index = 0
-        for _ in range(hold_frame_count):
-            _link_or_copy(
-                source_frames[0],
-                os.path.join(expanded_dir, f"frame_{output_index:06d}.png"),
-            )
-            output_index += 1
 
-        for frame_path in source_frames[1:]:
-            _link_or_copy(
-                frame_path,
-                os.path.join(expanded_dir, f"frame_{output_index:06d}.png"),
-            )
-            output_index += 1
+def _save_frame_store(
+    outputs: List[Tuple[OutputFormat, str]],
+    export_view: object,
+    image_size: List[int],
+    fps: int,
+    data_times: List[float],
+    frame_times: List[float],
+    durations: Optional[List[float]],
+    out_base: str,
+    prepare_frame: Optional[Callable[[int, float], None]] = None,
+    repeats: Optional[Dict[int, bool]] = None,
+    relabel: Optional[Callable[[int], None]] = None,
+    encode_jobs: int = 1,
+    segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+    progress: Optional[ProgressReporter] = None,
+    tiles: Optional[TiledCapture] = None,
+) -> None:
+    ffmpeg_path = shutil.which("ffmpeg")
+    if ffmpeg_path is None:
+        raise RuntimeError("--frame-store requires ffmpeg to encode the stored frames.")
 
-        cmd = [
+    store = create_frame_store(
+        out_base, image_size[0], image_size[1], len(data_times), fps, frame_times, durations
+    )
+    try:
+        store_frames(
+            export_view,
+            image_size,
+            data_times,
+            store,
+            prepare_frame=prepare_frame,
+            repeats=repeats,
+            relabel=relabel,
+            tiles=tiles,
+        )
+        store.finish()
+        print(f"[STORE] Kept {store.count} raw frames in {store.path}")
+        if progress is not None:
+            progress.finish()
+            progress.start("encode", total=len(outputs), unit="movies")
+        encode_frame_store(
             ffmpeg_path,
-            "-y",
-            "-loglevel",
-            "error",
-            "-framerate",
-            str(fps),
-            "-i",
-            os.path.join(expanded_dir, "frame_%06d.png"),
-            "-pix_fmt",
-            "yuv420p",
-            movie_path,
-        ]
-        subprocess.run(cmd, check=True)
+            store,
+            fps,
+            outputs,
+            durations=durations,
+            jobs=encode_jobs,
+            segment_seconds=segment_seconds,
+        )
+    finally:
+        store.close()
+
 
 def generate_animation(
     args,
@@ -282,12 +405,26 @@ def generate_animation(
     os.makedirs(args.output_folder, exist_ok=True)
     out_base = os.path.join(args.output_folder, args.animation_filename)
     image_size = list(parse_render_size(args.render_size))
-    movie_ext = args.output_format.lower()
+    formats = apply_encoder_settings(
+        parse_formats(args.output_format),
+        codec=getattr(args, "codec", None),
+        preset=getattr(args, "preset", None),
+        crf=getattr(args, "crf", None),
+        threads=getattr(args, "encoder_threads", 0),
+    )
+    encode_jobs = max(1, int(getattr(args, "encode_jobs", 1) or 1))
+    outputs = [(f, f.path(out_base)) for f in formats]
     cmin, cmax = parse_fixed_range(args.range)
     surface_count = len(getattr(args, "source_representations", None) or [])
+    progress = getattr(args, "progress_reporter", None)
 
     if getattr(args, "collections", False):
-        _write_surface_collections(args.output_folder, readers, surface_count)
+        write_surface_collections(
+            args.output_folder,
+            readers,
+            surface_count,
+            write_series=getattr(args, "collections_series", False),
+        )
 
     # Dedicated export view; keep interactive view untouched
     export_view = pv.CreateView("RenderView")
@@ -309,24 +446,74 @@ def generate_animation(
 
     export_view.CameraParallelScale = render_view.CameraParallelScale
 
-    # Show all readers in the export view
-    export_displays: List[object] = []
-    for reader in readers:
-        disp = pv.Show(reader, export_view)
-        export_displays.append(disp)
+    # Derived fields are attached in Python, once per timestep, to producer datasets
+    derived = parse_field(getattr(args, "field", None))
+    loader = read_polydata
+    derived_store = None
+    if derived is not None:
+        if not data_on_client():
+            raise ValueError("Derived --field values are not supported under MPI or with --server.")
+        if any(is_vtkhdf_file(f) for r in readers[:surface_count] for f in reader_file_names(r)):
+            raise ValueError("Derived --field values need VTP/VTK file-series sources.")
+        derived_store = DerivedArrayStore(
+            os.path.join(args.output_folder, DERIVED_CACHE_DIR),
+            derived,
+        )
+        loader = derived_loader(derived, derived_store)
+        print(f"[FIELD] Deriving '{derived.label}' from {', '.join(derived.names)}.")
+
+    # A region of interest is cut out in Python once per timestep, like derived fields
+    roi = parse_roi(getattr(args, "roi", None))
+    if getattr(args, "roi_from_camera", False):
+        if getattr(args, "camera_path", None):
+            raise ValueError("--roi-from-camera needs a fixed camera; it cannot follow --camera-path.")
+        roi = camera_roi(export_view.GetActiveCamera(), image_size[0] / float(image_size[1]))
+    if roi is not None:
+        if not data_on_client():
+            raise ValueError("--roi is not supported under MPI or with --server.")
+        if any(is_vtkhdf_file(f) for r in readers[:surface_count] for f in reader_file_names(r)):
+            raise ValueError("--roi needs VTP/VTK file-series sources.")
+        loader = roi_loader(roi, RoiCellStore(os.path.join(args.output_folder, ROI_CACHE_DIR), roi), loader)
+        print(f"[ROI] Loading, scanning and rendering only the cells inside {roi.label}.")
+
+    # With --prefetch, file series are shown through producers fed by background loads
+    prefetch_depth = int(getattr(args, "prefetch", 0) or 0)
+    if derived is not None or roi is not None:
+        prefetch_depth = max(prefetch_depth, 1)
+    prefetch_series: List[Tuple[int, List[str], List[float]]] = []
+    producers: Dict[int, object] = {}
+    if prefetch_depth > 0:
+        for index, reader in enumerate(readers[:surface_count]):
+            files = reader_file_names(reader)
+            if len(files) > 1 or (files and (derived is not None or roi is not None)):
+                prefetch_series.append((index, files, reader_timestep_values(reader)))
+        producers = create_producers(
+            [(index, files) for index, files, _times in prefetch_series],
+            loader=loader,
+        )
 
-    # Representation: ensure edges update correctly
-    source_representations = getattr(args, "source_representations", None) or []
-    for index, disp in enumerate(export_displays):
-        rep = source_representations[index] if index < len(source_representations) else "Surface"
+    # Show all sources in the export view (merged groups with --merge-sources)
+    export_displays: List[object] = []
+    preview = getattr(args, "preview", False)
+    for source, rep in display_sources(args, readers, producers):
+        if preview and getattr(args, "preview_lod", "none") == "decimate":
+            source = decimate_source(source)
+        disp = pv.Show(source, export_view)
+        # Representation: ensure edges update correctly
         disp.SetRepresentationType(rep)
         if rep == "Surface With Edges":
             disp.EdgeColor = [0.0, 0.0, 0.0]
+        export_displays.append(disp)
+
+    if roi is not None and roi.bounds is not None and captured_camera is None \
+            and not getattr(args, "camera_view_point", None):
+        # Frame the box rather than the full surfaces shown before clipping
+        export_view.ResetCamera(*roi.bounds)
 
     pv.Render(export_view)
 
     # Determine active scalar to color by (optional)
-    assoc, field = _determine_active_field(args, readers[0])
+    assoc, field = _determine_active_field(args, producers.get(0, readers[0]))
 
     if field:
         for disp in export_displays:
@@ -430,7 +617,72 @@ def end_cue(cue):
         ann_disp.WindowLocation = args.time_location
         apply_text_color(ann_disp, FOREGROUND_COLOR)
 
+    # Frames to render; previews subsample the series to a target count
+    frame_indices = subsample_indices(
+        len(tvalues),
+        getattr(args, "preview_frames", None) if preview else None,
+    )
+    scan_times = [tvalues[i] for i in frame_indices]
+    data_times = scene_frame_times(len(tvalues))
+
+    # Camera paths either hold one timestep resident or follow time playback
+    camera_path = getattr(args, "camera_path", None)
+    path_with_time = bool(camera_path) and getattr(args, "camera_path_with_time", False)
+    cameras: List[Tuple] = []
+    if camera_path:
+        start_camera = (
+            tuple(export_view.CameraPosition),
+            tuple(export_view.CameraFocalPoint),
+            tuple(export_view.CameraViewUp),
+        )
+        if path_with_time:
+            cameras = load_camera_path(camera_path, start_camera, len(data_times), fixed_count=True)
+        else:
+            step = int(getattr(args, "camera_path_step", 0) or 0)
+            if not -len(data_times) <= step < len(data_times):
+                raise ValueError(
+                    f"--camera-path-step {step} is outside the {len(data_times)} timesteps."
+                )
+            step %= len(data_times)
+            cameras = load_camera_path(camera_path, start_camera, args.camera_path_frames)
+            # Previews subsample the path instead of the series
+            frame_indices = subsample_indices(
+                len(cameras),
+                getattr(args, "preview_frames", None) if preview else None,
+            )
+            scan_times = [tvalues[min(step, len(tvalues) - 1)]]
+            data_times = [data_times[step]] * len(cameras)
+            print(
+                f"[CAMERA] {len(frame_indices)} frames along '{camera_path}' "
+                f"at time {scan_times[0]:g}."
+            )
+
+    if preview:
+        data_times = [data_times[i] for i in frame_indices if i < len(data_times)]
+        cameras = [cameras[i] for i in frame_indices if i < len(cameras)]
+
+    # Per-file stats shared by the range scan, the render pass and --stats-csv.
+    # Under MPI the cache would read every file on one rank, and with --server
+    # on the client; both use the data-information scan instead.
+    frame_times = (
+        scan_times if len(scan_times) == len(data_times)
+        else [scan_times[0]] * len(data_times)
+    )
+    frame_files = _frame_files(readers, surface_count, data_times)
+    stats_cache = None
+    if data_on_client():
+        stats_cache = StatsCache(
+            os.path.join(args.output_folder, stats_cache_name(roi)),
+            loader=loader,
+            required=derived.label if derived is not None else None,
+        )
+    stats_csv = getattr(args, "stats_csv", None)
+    if stats_csv and (not field or frame_files is None):
+        print("[STATS] --stats-csv needs a scalar field and file-series sources; skipped.")
+        stats_csv = None
+
     # Decide color range (only if a field is selected)
+    value_range: Optional[Tuple[float, float]] = None
     if field:
         if (
             cmin is not None and cmax is not None and
@@ -440,52 +692,308 @@ def end_cue(cue):
         ):
             lut.RescaleTransferFunction(float(cmin), float(cmax))
             pwf.RescaleTransferFunction(float(cmin), float(cmax))
+            value_range = (float(cmin), float(cmax))
         else:
-            overall_min = float("inf")
-            overall_max = float("-inf")
-
-            for t in tvalues:
-                for reader in readers:
-                    pv.UpdatePipeline(time=float(t), proxy=reader)
-                    data = pv.servermanager.Fetch(reader)
-                    if data is None:
-                        continue
-                    if assoc == "POINTS":
-                        arr = data.GetPointData().GetArray(field)
-                    else:
-                        arr = data.GetCellData().GetArray(field)
-                    if arr is None:
-                        continue
-                    rng = arr.GetRange()
-                    if rng and len(rng) >= 2:
-                        overall_min = min(overall_min, float(rng[0]))
-                        overall_max = max(overall_max, float(rng[1]))
+            # Without a cache (MPI, --server) the data-information scan below
+            # is reduced across the server ranks instead.
+            scanned = None
+            if stats_cache is not None and frame_files is not None:
+                scanned = _range_from_stats_cache(
+                    stats_cache, frame_files, assoc, field, progress=progress
+                )
+            if scanned is not None:
+                overall_min, overall_max = scanned
+            else:
+                overall_min = float("inf")
+                overall_max = float("-inf")
+
+                if progress is not None:
+                    progress.start("range_scan", total=len(scan_times), unit="timesteps")
+                for t in scan_times:
+                    for reader in readers:
+                        rng = data_range(reader, assoc, field, time=t)
+                        if rng is None:
+                            continue
+                        overall_min = min(overall_min, rng[0])
+                        overall_max = max(overall_max, rng[1])
+                    if progress is not None:
+                        progress.advance()
+                if progress is not None:
+                    progress.finish()
 
             if overall_min < overall_max and overall_min < float("inf"):
                 lut.RescaleTransferFunction(overall_min, overall_max)
                 pwf.RescaleTransferFunction(overall_min, overall_max)
+                value_range = (overall_min, overall_max)
 
     # Activate the export view and save the animation
     pv.SetActiveView(export_view)
     frame_window = [0, max(0, len(tvalues) - 1)]
-    movie_path = f"{out_base}.{movie_ext}"
+    # Holds and speed changes become per-frame durations at encode time
+    timeline = parse_timeline(getattr(args, "timeline", None))
     hold_first_frame = float(getattr(args, "hold_first_frame", 0.0) or 0.0)
     if hold_first_frame > 0.0:
-        _save_animation_with_first_frame_hold(
-            movie_path=movie_path,
-            export_view=export_view,
-            image_size=image_size,
-            fps=args.fps,
-            frame_window=frame_window,
-            hold_seconds=hold_first_frame,
-            output_folder=args.output_folder,
-            animation_filename=args.animation_filename,
+        timeline = timeline or Timeline()
+        timeline.add_hold(0, hold_first_frame)
+    durations = (
+        timeline.durations(frame_times, args.fps)
+        if timeline is not None and not preview else None
+    )
+
+    # --stats-csv lists every timestep, including those --adaptive does not render
+    csv_frame_files, csv_frame_times, csv_data_times = frame_files, frame_times, data_times
+
+    # --adaptive drops timesteps that barely change; the kept frames stay on screen longer
+    adaptive = getattr(args, "adaptive", None)
+    if adaptive is not None and not preview:
+        if not data_on_client():
+            raise ValueError("--adaptive reads timesteps in Python; not supported under MPI or with --server.")
+        if cameras:
+            print("[ADAPTIVE] Camera paths move the camera on every frame; --adaptive skipped.")
+        elif not field or value_range is None or frame_files is None:
+            print("[ADAPTIVE] --adaptive needs a scalar field and file-series sources; skipped.")
+        else:
+            kept = _adaptive_frames(
+                frame_files,
+                field,
+                adaptive,
+                value_range[1] - value_range[0],
+                getattr(args, "adaptive_metric", "max"),
+                loader,
+                progress,
+            )
+            print(
+                f"[ADAPTIVE] Rendering {len(kept)} of {len(data_times)} frames "
+                f"(change above {adaptive:g} of the color range)."
+            )
+            if len(kept) < len(data_times):
+                durations = merge_durations(durations or [1.0 / args.fps] * len(data_times), kept)
+                data_times = [data_times[i] for i in kept]
+                frame_times = [frame_times[i] for i in kept]
+                frame_files = [(index, [files[i] for i in kept]) for index, files in frame_files]
+    feeder = (
+        PrefetchFeeder(producers, prefetch_series, data_times, prefetch_depth, loader=loader)
+        if prefetch_series else None
+    )
+    prepare_frame = feeder
+    if cameras:
+        prepare_frame = CameraPathHook(export_view, cameras, inner=feeder)
+
+    # Record stats of datasets the render pass loads that no scan has seen yet
+    recorder = None
+    if stats_csv and stats_cache is not None and not preview:
+        missing = [
+            path for _index, files in frame_files for path in set(files)
+            if not stats_cache.has(path)
+        ]
+        if missing:
+            recorder = RenderPassStats(
+                stats_cache,
+                [producers.get(index, readers[index]) for index, _files in frame_files],
+                list(zip(*[files for _index, files in frame_files])),
+                inner=prepare_frame,
+            )
+            prepare_frame = recorder
+
+    # Identical consecutive timesteps keep the loaded data and redraw the label only
+    repeats: Dict[int, bool] = {}
+    relabel = None
+    if getattr(args, "skip_identical", False) and not preview and not cameras:
+        if reader_time_values:
+            labels = ["time = %g" % t for t in frame_times]
+            repeats = _identical_frames(
+                readers,
+                surface_count,
+                derived.names if derived is not None else [field] if field else [],
+                data_times,
+                labels,
+            )
+
+            def relabel(index: int) -> None:
+                text_source.Text = labels[index]
+        else:
+            print("[DEDUP] Frames are only deduplicated with directory-based time labels.")
+        if repeats:
+            reused = sum(1 for same_label in repeats.values() if same_label)
+            print(
+                f"[DEDUP] {len(repeats)} of {len(data_times)} frames repeat the previous "
+                f"timestep's data ({reused} reuse the image, "
+                f"{len(repeats) - reused} only redraw the label)."
+            )
+
+    # Per-frame progress records for batch schedulers
+    progress_hook = None
+    if progress is not None:
+        progress_hook = ProgressHook(
+            progress,
+            list(zip(*[files for _index, files in frame_files])) if frame_files else [],
+            inner=prepare_frame,
         )
-    else:
-        pv.SaveAnimation(
-            movie_path,
-            export_view,
-            ImageResolution=image_size,
-            FrameRate=args.fps,
-            FrameWindow=frame_window,
+        prepare_frame = progress_hook
+
+    # Checkpointed renders keep finished frames until the movie is encoded
+    checkpoint_dir = None if preview else checkpoint_directory(args)
+    frame_store = getattr(args, "frame_store", False) and not preview
+    resume = False
+    if checkpoint_dir:
+        view_state = {
+            "size": image_size,
+            "camera": [
+                list(export_view.CameraPosition),
+                list(export_view.CameraFocalPoint),
+                list(export_view.CameraViewUp),
+                float(export_view.CameraParallelScale),
+            ],
+            "lut": [float(v) for v in lut.RGBPoints] if lut is not None else None,
+        }
+        input_files = [path for reader in readers for path in reader_file_names(reader)]
+        state_hash = render_state_hash(args, input_files, data_times, view_state)
+        resume = open_checkpoint(
+            checkpoint_dir,
+            state_hash,
+            len(data_times),
+            resume=getattr(args, "resume", False),
+        ) > 0
+
+    # Frames larger than --tile-size are rendered as tiles into a memory-mapped buffer
+    tiles = None
+    tile_size = getattr(args, "tile_size", None)
+    if tile_size and not preview:
+        max_tile = parse_render_size(tile_size)
+        if image_size[0] > max_tile[0] or image_size[1] > max_tile[1]:
+            if not data_on_client():
+                raise ValueError("--tile-size needs a serial session; not supported under MPI or with --server.")
+            tiles = TiledCapture(export_view, image_size, max_tile, buffer_dir=args.output_folder)
+            print(
+                f"[TILES] Rendering {image_size[0]}x{image_size[1]} frames as "
+                f"{tiles.columns}x{tiles.rows} tiles of {tiles.tile_width}x{tiles.tile_height}."
+            )
+
+    if progress is not None:
+        progress.start("render", total=len(data_times), unit="frames")
+    with feeder or nullcontext(), tiles or nullcontext():
+        if preview:
+            write_preview(
+                export_view=export_view,
+                image_size=image_size,
+                data_times=data_times,
+                fps=args.fps,
+                out_base=out_base,
+                formats=formats,
+                prepare_frame=prepare_frame,
+            )
+        elif frame_store:
+            # Raw frames are kept next to the movie, so later re-encodes skip rendering and decoding.
+            _save_frame_store(
+                outputs=outputs,
+                export_view=export_view,
+                image_size=image_size,
+                fps=args.fps,
+                data_times=data_times,
+                frame_times=frame_times,
+                durations=durations,
+                out_base=out_base,
+                prepare_frame=prepare_frame,
+                repeats=repeats,
+                relabel=relabel,
+                encode_jobs=encode_jobs,
+                segment_seconds=float(
+                    getattr(args, "segment_seconds", DEFAULT_SEGMENT_SECONDS)
+                ),
+                progress=progress,
+                tiles=tiles,
+            )
+        elif (
+            (cameras or needs_ffmpeg(formats) or tiles is not None)
+            and not checkpoint_dir and not repeats and encode_jobs == 1 and durations is None
+        ):
+            # One rendered frame stream feeds the encoder of every requested format.
+            ffmpeg_path = shutil.which("ffmpeg")
+            if ffmpeg_path is None:
+                raise RuntimeError(
+                    "--camera-path, --tile-size and multiple --format movies require ffmpeg "
+                    "to encode the frame stream."
+                )
+            frame_count = stream_frames(
+                ffmpeg_path,
+                export_view,
+                image_size,
+                data_times,
+                args.fps,
+                outputs,
+                prepare_frame=prepare_frame,
+                tiles=tiles,
+            )
+            print(
+                f"[EXPORT] Streamed {frame_count} frames to "
+                f"{', '.join(path for _format, path in outputs)}"
+            )
+        elif (
+            durations is not None or feeder is not None or cameras or needs_ffmpeg(formats)
+            or checkpoint_dir or repeats or recorder is not None or encode_jobs > 1
+            or tiles is not None
+        ):
+            _save_frame_sequence(
+                outputs=outputs,
+                export_view=export_view,
+                image_size=image_size,
+                fps=args.fps,
+                data_times=data_times,
+                durations=durations,
+                output_folder=args.output_folder,
+                animation_filename=args.animation_filename,
+                prepare_frame=prepare_frame,
+                frame_dir=checkpoint_dir,
+                resume=resume,
+                repeats=repeats,
+                relabel=relabel,
+                encode_jobs=encode_jobs,
+                segment_seconds=float(
+                    getattr(args, "segment_seconds", DEFAULT_SEGMENT_SECONDS)
+                ),
+                progress=progress,
+                tiles=tiles,
+            )
+            if checkpoint_dir:
+                clear_checkpoint(checkpoint_dir)
+        else:
+            if progress_hook is not None:
+                # SaveAnimation has no frame hook; a cue ticks once per written frame.
+                progress_cue = pv.PythonAnimationCue()
+                progress_cue.StartTime = pv.GetAnimationScene().StartTime
+                progress_cue.EndTime = pv.GetAnimationScene().EndTime
+                progress_cue.Script = PROGRESS_CUE_SCRIPT
+                pv.GetAnimationScene().Cues.append(progress_cue)
+                set_active_hook(progress_hook)
+            try:
+                pv.SaveAnimation(
+                    outputs[0][1],
+                    export_view,
+                    ImageResolution=image_size,
+                    FrameRate=args.fps,
+                    FrameWindow=frame_window,
+                )
+            finally:
+                set_active_hook(None)
+    if progress is not None:
+        progress.finish()
+
+    if stats_csv and stats_cache is None:
+        _write_server_stats_csv(
+            os.path.abspath(stats_csv),
+            readers,
+            csv_frame_files,
+            csv_frame_times,
+            csv_data_times,
+            assoc,
+            field,
+        )
+    elif stats_csv:
+        _write_stats_csv(
+            os.path.abspath(stats_csv),
+            stats_cache,
+            csv_frame_files,
+            csv_frame_times,
+            assoc,
+            field,
         )
@@ -0,0 +1,156 @@
+"""Camera paths (orbits and keyframed fly-throughs) for the frame loop."""
+from __future__ import annotations
+
+import json
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .utils import parse_camera_view_point
+
+Camera = Tuple[Tuple[float, float, float], Tuple[float, float, float], Tuple[float, float, float]]
+
+
+def orbit_path(camera: Camera, frame_count: int, degrees: float = 360.0) -> List[Camera]:
+    """Rotate *camera* about its view-up axis through the focal point.
+
+    A full turn leaves out the end point so the movie loops without a
+    repeated frame.
+    """
+    position, focal, up = (np.asarray(v, dtype=float) for v in camera)
+    axis = up / (np.linalg.norm(up) or 1.0)
+    offset = position - focal
+    end = degrees if abs(degrees) % 360.0 else degrees * (frame_count - 1) / max(frame_count, 1)
+    cameras: List[Camera] = []
+    for angle in np.radians(np.linspace(0.0, end, frame_count)):
+        # Rodrigues' rotation of the focal-to-camera vector about the up axis.
+        rotated = (
+            offset * np.cos(angle)
+            + np.cross(axis, offset) * np.sin(angle)
+            + axis * np.dot(axis, offset) * (1.0 - np.cos(angle))
+        )
+        cameras.append((tuple(focal + rotated), tuple(focal), tuple(up)))
+    return cameras
+
+
+def _catmull_rom(points: np.ndarray, times: np.ndarray, t: float) -> np.ndarray:
+    i = int(np.clip(np.searchsorted(times, t, side="right") - 1, 0, len(times) - 2))
+    p0 = points[max(i - 1, 0)]
+    p1, p2 = points[i], points[i + 1]
+    p3 = points[min(i + 2, len(points) - 1)]
+    u = (t - times[i]) / ((times[i + 1] - times[i]) or 1.0)
+    return 0.5 * (
+        2.0 * p1
+        + (p2 - p0) * u
+        + (2.0 * p0 - 5.0 * p1 + 4.0 * p2 - p3) * u ** 2
+        + (3.0 * p1 - p0 - 3.0 * p2 + p3) * u ** 3
+    )
+
+
+def _keyframe_camera(keyframe: Dict) -> Camera:
+    if "camera" in keyframe:
+        return parse_camera_view_point(str(keyframe["camera"]))
+    try:
+        return (
+            tuple(float(v) for v in keyframe["position"]),
+            tuple(float(v) for v in keyframe["focal_point"]),
+            tuple(float(v) for v in keyframe["view_up"]),
+        )
+    except KeyError as exc:
+        raise ValueError(
+            f"Camera keyframe needs 'camera' or position/focal_point/view_up: {keyframe}"
+        ) from exc
+
+
+def keyframe_path(keyframes: Sequence[Dict], frame_count: int) -> List[Camera]:
+    """Interpolate keyframed cameras smoothly across *frame_count* frames.
+
+    Each keyframe has an optional ``time`` in [0, 1] (evenly spaced if
+    omitted) and either a 9-number ``camera`` or ``position``,
+    ``focal_point`` and ``view_up`` lists.
+    """
+    if len(keyframes) < 2:
+        raise ValueError("A camera keyframe path needs at least two keyframes.")
+    cameras = [_keyframe_camera(k) for k in keyframes]
+    default_times = np.linspace(0.0, 1.0, len(keyframes))
+    times = np.array(
+        [float(k.get("time", d)) for k, d in zip(keyframes, default_times)],
+        dtype=float,
+    )
+    if np.any(np.diff(times) <= 0.0):
+        raise ValueError("Camera keyframe times must be strictly increasing.")
+    positions = np.array([c[0] for c in cameras], dtype=float)
+    focals = np.array([c[1] for c in cameras], dtype=float)
+    ups = np.array([c[2] for c in cameras], dtype=float)
+
+    path: List[Camera] = []
+    for t in np.linspace(times[0], times[-1], frame_count):
+        up = _catmull_rom(ups, times, t)
+        up /= np.linalg.norm(up) or 1.0
+        path.append((
+            tuple(_catmull_rom(positions, times, t)),
+            tuple(_catmull_rom(focals, times, t)),
+            tuple(up),
+        ))
+    return path
+
+
+def load_camera_path(
+    spec: str,
+    camera: Camera,
+    frame_count: int,
+    fixed_count: bool = False,
+) -> List[Camera]:
+    """Build the cameras for ``--camera-path``: ``orbit``, ``orbit:DEG`` or a JSON file.
+
+    The JSON file holds a list of keyframes, or an object with ``keyframes``
+    and an optional ``frames`` count that overrides *frame_count* unless
+    *fixed_count* is set.
+    """
+    if frame_count < 1:
+        raise ValueError("A camera path needs at least one frame.")
+    if spec.lower() == "orbit" or spec.lower().startswith("orbit:"):
+        _, _, degrees = spec.partition(":")
+        try:
+            angle = float(degrees) if degrees else 360.0
+        except ValueError as exc:
+            raise ValueError(
+                f"Invalid --camera-path '{spec}'. Expected 'orbit:DEG' with DEG in degrees."
+            ) from exc
+        return orbit_path(camera, frame_count, angle)
+    try:
+        with open(spec, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except OSError as exc:
+        raise FileNotFoundError(f"Camera path file not found: {spec}") from exc
+    if isinstance(data, dict):
+        if not fixed_count:
+            frame_count = int(data.get("frames", frame_count))
+        data = data.get("keyframes", [])
+    return keyframe_path(list(data), frame_count)
+
+
+class CameraPathHook:
+    """Frame-loop hook that moves the export camera along a path.
+
+    It chains to an optional *inner* hook (e.g. the prefetch feeder) so a
+    camera path can be combined with time playback.
+    """
+
+    def __init__(
+        self,
+        view: object,
+        cameras: Sequence[Camera],
+        inner: Optional[Callable[[int, float], None]] = None,
+    ) -> None:
+        self._view = view
+        self._cameras = list(cameras)
+        self._inner = inner
+
+    def __call__(self, index: int, data_time: float) -> None:
+        if self._inner is not None:
+            self._inner(index, data_time)
+        position, focal, up = self._cameras[min(index, len(self._cameras) - 1)]
+        self._view.CameraPosition = list(position)
+        self._view.CameraFocalPoint = list(focal)
+        self._view.CameraViewUp = list(up)
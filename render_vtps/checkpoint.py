@@ -0,0 +1,170 @@
+"""Checkpoint directories that let interrupted frame renders resume."""
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+CHECKPOINT_STATE = "state.json"
+CHECKPOINT_VERSION = 1
+
+# Options that change how frames are encoded or scheduled, not what they show.
+NON_RENDER_OPTIONS = frozenset({
+    "all_surfaces",
+    "animation_filename",
+    "checkpoint",
+    "checkpoint_dir",
+    "codec",
+    "collections",
+    "collections_series",
+    "crf",
+    "discovery_cache",
+    "encode_jobs",
+    "encoder_threads",
+    "fps",
+    "frame_store",
+    "hold_first_frame",
+    "interactive_mode",
+    "output_folder",
+    "output_format",
+    "prefetch",
+    "preset",
+    "progress",
+    "progress_file",
+    "resume",
+    "scrub_cache_mb",
+    "segment_seconds",
+    "server",
+    "surface_jobs",
+    "timeline",
+})
+
+
+def checkpoint_directory(args) -> Optional[str]:
+    """Return the checkpoint directory requested by *args*, or None.
+
+    ``--resume`` and ``--checkpoint`` without ``--checkpoint-dir`` use
+    ``<output>/.<name>_checkpoint``.
+    """
+    directory = getattr(args, "checkpoint_dir", None)
+    if directory:
+        return os.path.abspath(directory)
+    if getattr(args, "checkpoint", False) or getattr(args, "resume", False):
+        return os.path.join(
+            os.path.abspath(args.output_folder),
+            f".{args.animation_filename}_checkpoint",
+        )
+    return None
+
+
+def _plain(value) -> bool:
+    if isinstance(value, (list, tuple)):
+        return all(_plain(v) for v in value)
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def _file_signature(path: str) -> List:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return [os.path.abspath(path), None, None]
+    return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+
+
+def render_state_hash(
+    args,
+    input_files: Iterable[str],
+    data_times: Sequence[float],
+    view_state: Dict,
+) -> str:
+    """Hash everything that decides the pixels of the rendered frames.
+
+    Covers the render options on *args*, the size and mtime of every input
+    file, the frame times and the export view state (camera, size, color
+    range) captured just before rendering.
+    """
+    options = {
+        key: value
+        for key, value in sorted(vars(args).items())
+        if key not in NON_RENDER_OPTIONS and _plain(value)
+    }
+    camera_path = getattr(args, "camera_path", None)
+    files = [_file_signature(path) for path in input_files]
+    if camera_path and os.path.isfile(camera_path):
+        files.append(_file_signature(camera_path))
+    payload = {
+        "options": options,
+        "files": files,
+        "times": [float(t) for t in data_times],
+        "view": view_state,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _read_state(directory: str) -> Dict:
+    try:
+        with open(os.path.join(directory, CHECKPOINT_STATE), "r", encoding="utf-8") as handle:
+            state = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def open_checkpoint(directory: str, state_hash: str, frame_count: int, resume: bool) -> int:
+    """Prepare *directory* for a render and return how many frames it already holds.
+
+    Frames are kept only when *resume* is set and the stored render-state
+    hash matches; otherwise stale frames are removed and the new state is
+    recorded before rendering starts.
+    """
+    os.makedirs(directory, exist_ok=True)
+    state = _read_state(directory)
+    matches = (
+        state.get("version") == CHECKPOINT_VERSION
+        and state.get("hash") == state_hash
+        and state.get("frame_count") == frame_count
+    )
+    frames = []
+    for path in sorted(glob.glob(os.path.join(directory, "frame_*.png"))):
+        if path.endswith(".partial.png"):
+            # Left behind by an interrupted capture.
+            os.remove(path)
+        else:
+            frames.append(path)
+    if resume and matches:
+        print(f"[CHECKPOINT] Resuming: {len(frames)} of {frame_count} frames already rendered.")
+        return len(frames)
+    if resume and state:
+        print("[CHECKPOINT] Render settings or inputs changed since the checkpoint; starting over.")
+    for path in frames:
+        os.remove(path)
+    tmp_path = os.path.join(directory, f"{CHECKPOINT_STATE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(
+            {"version": CHECKPOINT_VERSION, "hash": state_hash, "frame_count": frame_count},
+            handle,
+            indent=2,
+        )
+    os.replace(tmp_path, os.path.join(directory, CHECKPOINT_STATE))
+    print(f"[CHECKPOINT] Recording frames in {directory}")
+    return 0
+
+
+def clear_checkpoint(directory: str) -> None:
+    """Remove the checkpoint frames and state once the movie has been encoded.
+
+    Only files written by the checkpoint are deleted; the directory itself
+    is removed when that leaves it empty.
+    """
+    for path in glob.glob(os.path.join(directory, "frame_*.png")):
+        os.remove(path)
+    state_path = os.path.join(directory, CHECKPOINT_STATE)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    try:
+        os.rmdir(directory)
+    except OSError:
+        pass
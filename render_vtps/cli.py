@@ -3,18 +3,41 @@
 from __future__ import annotations
 
 import argparse
-from typing import Dict, List, Tuple
+import os
+import sys
+from typing import Callable, Dict, List, Tuple
 
+from . import framestore, repack, vtkhdf
+from .adaptive import ADAPTIVE_METRICS
+from .all_surfaces import load_discovery, run_all_surfaces
 from .animation import generate_animation
-from .discovery import find_vtp_files, validate_vtp_file
+from .derived import parse_field
+from .discovery import find_vtp_files, is_vtkhdf_file, validate_vtp_file
+from .encoder import DEFAULT_SEGMENT_SECONDS, parse_formats
 from .interactive import interactive_camera_setup
-from .pv_helpers import apply_coloring, discover_arrays
+from .preview import PREVIEW_LODS, apply_preview_settings
+from .progress import PROGRESS_FORMATS, open_progress
+from .pv_helpers import apply_coloring, discover_arrays, mpi_process_count, parse_server
+from .roi import parse_roi
+from .tiles import tile_grid
+from .timeline import parse_timeline
+from .utils import parse_render_size
 from .visualize import pv_visualize
 
 
+SUBCOMMANDS: Dict[str, Callable[[List[str]], None]] = {
+    "consolidate": vtkhdf.main,
+    "encode": framestore.main,
+    "repack": repack.main,
+}
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
-        description="Render a video from VTP time-series data.",
+        description=(
+            "Render a video from VTP time-series data. "
+            "Other commands: " + ", ".join(sorted(SUBCOMMANDS)) + "."
+        ),
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
 
@@ -34,7 +57,37 @@ def build_parser() -> argparse.ArgumentParser:
         dest="time_dirs_path",
         type=str,
         action="append",
-        help="Directory containing time-step folders. Repeat to render multiple sources together.",
+        help=(
+            "Directory containing time-step folders, or a consolidated .vtkhdf file. "
+            "Repeat to render multiple sources together."
+        ),
+    )
+    parser.add_argument(
+        "--all-surfaces",
+        "--all_surfaces",
+        dest="all_surfaces",
+        action="store_true",
+        default=False,
+        help=(
+            "Render one movie per VTP basename found under --path, sharing one "
+            "discovery pass, the color range and the camera."
+        ),
+    )
+    parser.add_argument(
+        "--surface-jobs",
+        "--surface_jobs",
+        dest="surface_jobs",
+        type=int,
+        default=1,
+        help="Number of movies rendered in parallel by --all-surfaces.",
+    )
+    parser.add_argument(
+        "--discovery-cache",
+        "--discovery_cache",
+        dest="discovery_cache",
+        type=str,
+        default=None,
+        help=argparse.SUPPRESS,
     )
     parser.add_argument(
         "--stl",
@@ -57,7 +110,10 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--field",
         type=str,
-        help="Field to visualize. Defaults to the first available array.",
+        help=(
+            "Field to visualize. Defaults to the first available array. Derived fields: "
+            "'U:magnitude', 'U:x' (y, z) or 'name=expression' such as 'q=0.5*mag(U)**2'."
+        ),
     )
     parser.add_argument(
         "--range",
@@ -109,7 +165,12 @@ def build_parser() -> argparse.ArgumentParser:
         dest="output_format",
         type=str,
         default="avi",
-        help="Output movie format/extension.",
+        help=(
+            "Output movie format/extension. A comma-separated list such as "
+            "'mp4,webm,gif' writes every format from one rendered frame stream; "
+            "append ':key=value' settings (codec, crf, preset, bitrate, quality, "
+            "width, fps) per format, e.g. 'mp4:crf=18,gif:width=480:fps=12'."
+        ),
     )
     parser.add_argument(
         "--representation",
@@ -120,6 +181,17 @@ def build_parser() -> argparse.ArgumentParser:
             "representation everywhere, or repeat once per --path."
         ),
     )
+    parser.add_argument(
+        "--merge-sources",
+        "--merge_sources",
+        dest="merge_sources",
+        action="store_true",
+        default=False,
+        help=(
+            "Merge sources sharing a representation into one multiblock pipeline "
+            "with a single display per group."
+        ),
+    )
     parser.add_argument(
         "--size",
         "--render-size",
@@ -129,6 +201,17 @@ def build_parser() -> argparse.ArgumentParser:
         default="1280x720",
         help="Render size as WxH.",
     )
+    parser.add_argument(
+        "--tile-size",
+        "--tile_size",
+        dest="tile_size",
+        type=str,
+        default=None,
+        help=(
+            "Largest render size as WxH (e.g. 2048x2048). Larger --size frames are rendered "
+            "as tiles and assembled in a memory-mapped buffer. Requires ffmpeg."
+        ),
+    )
     parser.add_argument(
         "--camera",
         "--camera-view-point",
@@ -140,6 +223,58 @@ def build_parser() -> argparse.ArgumentParser:
             "[pos_x,pos_y,pos_z,focal_x,focal_y,focal_z,up_x,up_y,up_z]"
         ),
     )
+    parser.add_argument(
+        "--camera-path",
+        "--camera_path",
+        dest="camera_path",
+        type=str,
+        default=None,
+        help=(
+            "Render along a camera path: 'orbit' (full turn about the view-up axis), "
+            "'orbit:DEG', or a JSON keyframe file. Requires ffmpeg."
+        ),
+    )
+    parser.add_argument(
+        "--camera-path-frames",
+        "--camera_path_frames",
+        dest="camera_path_frames",
+        type=int,
+        default=120,
+        help="Frames rendered along --camera-path on a single timestep.",
+    )
+    parser.add_argument(
+        "--camera-path-step",
+        "--camera_path_step",
+        dest="camera_path_step",
+        type=int,
+        default=0,
+        help="Timestep index held for --camera-path (negative counts from the end).",
+    )
+    parser.add_argument(
+        "--camera-path-with-time",
+        "--camera_path_with_time",
+        dest="camera_path_with_time",
+        action="store_true",
+        default=False,
+        help="Follow --camera-path while the timesteps play instead of holding one timestep.",
+    )
+    parser.add_argument(
+        "--roi",
+        type=str,
+        default=None,
+        help=(
+            "Only load, scan and render the cells touching a region, given as "
+            "'box:x0,x1,y0,y1,z0,z1'. The camera frames the box unless --camera is set."
+        ),
+    )
+    parser.add_argument(
+        "--roi-from-camera",
+        "--roi_from_camera",
+        dest="roi_from_camera",
+        action="store_true",
+        default=False,
+        help="Only load, scan and render the cells visible from the export camera.",
+    )
     parser.add_argument(
         "--interactive",
         "--interactive-mode",
@@ -149,6 +284,14 @@ def build_parser() -> argparse.ArgumentParser:
         help="Enable interactive camera setup mode.",
         default=False,
     )
+    parser.add_argument(
+        "--scrub-cache-mb",
+        "--scrub_cache_mb",
+        dest="scrub_cache_mb",
+        type=int,
+        default=1024,
+        help="Memory cap in MiB for timesteps cached while scrubbing in --interactive mode.",
+    )
     parser.add_argument(
         "--fps",
         type=int,
@@ -163,22 +306,293 @@ def build_parser() -> argparse.ArgumentParser:
         default=0.0,
         help="Hold the first rendered frame for this many seconds before playback.",
     )
+    parser.add_argument(
+        "--timeline",
+        type=str,
+        default=None,
+        help=(
+            "Frame timing applied when encoding, e.g. "
+            "'hold:0@2s,slow:0.5-0.8x4,hold:end@3s'. Entries: hold:FRAME@SECONDS, "
+            "slow:T0-T1xF, fast:T0-T1xF, fps:T0-T1@RATE and physical (space frames "
+            "by simulated time). Requires ffmpeg."
+        ),
+    )
+    parser.add_argument(
+        "--codec",
+        type=str,
+        default=None,
+        help="ffmpeg video codec for every --format (e.g. libx264, libx265, libvpx-vp9).",
+    )
+    parser.add_argument(
+        "--preset",
+        type=str,
+        default=None,
+        help="Encoder speed preset for x264/x265 (e.g. veryfast, medium, slow).",
+    )
+    parser.add_argument(
+        "--crf",
+        type=int,
+        default=None,
+        help="Constant-rate-factor quality for the encoder (lower is better quality).",
+    )
+    parser.add_argument(
+        "--encoder-threads",
+        "--encoder_threads",
+        dest="encoder_threads",
+        type=int,
+        default=0,
+        help="Threads per ffmpeg encoder (0 lets ffmpeg decide).",
+    )
+    parser.add_argument(
+        "--encode-jobs",
+        "--encode_jobs",
+        dest="encode_jobs",
+        type=int,
+        default=1,
+        help=(
+            "Encode long movies as GOP-aligned segments on this many parallel "
+            "ffmpeg processes and join them without re-encoding."
+        ),
+    )
+    parser.add_argument(
+        "--segment-seconds",
+        "--segment_seconds",
+        dest="segment_seconds",
+        type=float,
+        default=DEFAULT_SEGMENT_SECONDS,
+        help="Movie length of each segment encoded by --encode-jobs.",
+    )
+    parser.add_argument(
+        "--stats-csv",
+        "--stats_csv",
+        dest="stats_csv",
+        type=str,
+        default=None,
+        help=(
+            "Write min/max, the area-weighted mean and integral and the sample mean of "
+            "the field per timestep and source to this CSV file."
+        ),
+    )
+    parser.add_argument(
+        "--skip-identical",
+        "--skip_identical",
+        dest="skip_identical",
+        action="store_true",
+        default=False,
+        help=(
+            "Hash the geometry and field of every timestep and do not reload or re-render "
+            "timesteps identical to the previous one; only the time label is redrawn. "
+            "Requires ffmpeg."
+        ),
+    )
+    parser.add_argument(
+        "--adaptive",
+        type=float,
+        default=None,
+        help=(
+            "Only render timesteps whose field differs from the last rendered one by more "
+            "than this fraction of the color range (e.g. 0.01); skipped timesteps extend "
+            "the previous frame, so playback timing is kept. Requires ffmpeg."
+        ),
+    )
+    parser.add_argument(
+        "--adaptive-metric",
+        "--adaptive_metric",
+        dest="adaptive_metric",
+        type=str.lower,
+        choices=ADAPTIVE_METRICS,
+        default="max",
+        help="Difference used by --adaptive: largest change ('max') or root mean square ('rms').",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        default=False,
+        help=(
+            "Keep rendered frames in a checkpoint directory until the movie is encoded, "
+            "so an interrupted render can be resumed. Requires ffmpeg."
+        ),
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        "--checkpoint_dir",
+        dest="checkpoint_dir",
+        type=str,
+        default=None,
+        help="Checkpoint directory (implies --checkpoint). Defaults to <output>/.<name>_checkpoint.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help=(
+            "Resume from the checkpoint directory: frames already rendered with the same "
+            "settings and inputs are reused (implies --checkpoint)."
+        ),
+    )
+    parser.add_argument(
+        "--frame-store",
+        "--frame_store",
+        dest="frame_store",
+        action="store_true",
+        default=False,
+        help=(
+            "Keep the rendered frames as raw RGB in <output>/<name>.frames.rgb (plus a "
+            ".frames.json index) so 'render_vtps encode' can re-encode them without "
+            "rendering or decoding. Requires ffmpeg."
+        ),
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        help=(
+            "Load up to this many upcoming timesteps on background threads while the "
+            "current frame renders (0 disables). Requires ffmpeg."
+        ),
+    )
+    parser.add_argument(
+        "--server",
+        type=str,
+        default=None,
+        help=(
+            "Attach to a running pvserver at HOST:PORT (default port 11111). Data is "
+            "read, scanned and rendered on the server; the client only receives "
+            "scalars and images. Paths must be valid on the server."
+        ),
+    )
+    parser.add_argument(
+        "--progress",
+        type=str.lower,
+        choices=PROGRESS_FORMATS,
+        default=None,
+        help=(
+            "Report progress as JSON lines (phase, done/total, rate, input MB/s, ETA, "
+            "peak RSS) on stderr, or in --progress-file."
+        ),
+    )
+    parser.add_argument(
+        "--progress-file",
+        "--progress_file",
+        dest="progress_file",
+        type=str,
+        default=None,
+        help="Append --progress records to this file instead of stderr.",
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        default=False,
+        help=(
+            "Render a fast low-resolution preview: subsampled frames, a contact-sheet "
+            "PNG and a short low-bitrate movie."
+        ),
+    )
+    parser.add_argument(
+        "--preview-frames",
+        "--preview_frames",
+        dest="preview_frames",
+        type=int,
+        default=48,
+        help="Target number of frames rendered by --preview.",
+    )
+    parser.add_argument(
+        "--preview-lod",
+        "--preview_lod",
+        dest="preview_lod",
+        type=str.lower,
+        choices=PREVIEW_LODS,
+        default="none",
+        help="Level of detail for --preview: full surfaces, outlines or decimated surfaces.",
+    )
     parser.add_argument(
         "--collections",
         action="store_true",
         default=False,
         help="Write per-surface ParaView collection folders alongside the video output.",
     )
+    parser.add_argument(
+        "--collections-series",
+        "--collections_series",
+        dest="collections_series",
+        action="store_true",
+        default=False,
+        help="Also write a '.vtp.series' JSON file in each surface collection folder.",
+    )
     return parser
 
 
 def main(argv: list[str] | None = None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] in SUBCOMMANDS:
+        SUBCOMMANDS[argv[0]](argv[1:])
+        return
+
     parser = build_parser()
     args = parser.parse_args(argv)
     if args.fps <= 0:
         raise ValueError("--fps must be greater than 0")
     if args.hold_first_frame < 0:
         raise ValueError("--hold-first-frame must be greater than or equal to 0")
+    if args.prefetch < 0:
+        raise ValueError("--prefetch must be greater than or equal to 0")
+    parse_field(args.field)  # report malformed derived fields before loading data
+    parse_formats(args.output_format)
+    parse_timeline(args.timeline)
+    parse_roi(args.roi)
+    if args.tile_size and min(parse_render_size(args.tile_size)) <= 0:
+        raise ValueError("--tile-size must be positive, e.g. 2048x2048")
+    if args.tile_size:
+        tile_grid(parse_render_size(args.render_size), parse_render_size(args.tile_size))
+    if args.roi and args.roi_from_camera:
+        raise ValueError("Use either --roi or --roi-from-camera, not both.")
+    if args.adaptive is not None and args.adaptive < 0:
+        raise ValueError("--adaptive must be greater than or equal to 0")
+    if args.crf is not None and args.crf < 0:
+        raise ValueError("--crf must be greater than or equal to 0")
+    if args.encoder_threads < 0:
+        raise ValueError("--encoder-threads must be greater than or equal to 0")
+    if args.encode_jobs < 1:
+        raise ValueError("--encode-jobs must be at least 1")
+    if args.segment_seconds <= 0:
+        raise ValueError("--segment-seconds must be greater than 0")
+    if args.camera_path_frames <= 0:
+        raise ValueError("--camera-path-frames must be greater than 0")
+    if args.scrub_cache_mb < 0:
+        raise ValueError("--scrub-cache-mb must be greater than or equal to 0")
+    if args.surface_jobs < 1:
+        raise ValueError("--surface-jobs must be at least 1")
+    if args.frame_store and (args.checkpoint or args.checkpoint_dir or args.resume):
+        raise ValueError("--frame-store keeps its own frames; do not combine it with --checkpoint or --resume.")
+
+    ranks = mpi_process_count()
+    if ranks > 1:
+        if args.interactive_mode:
+            raise ValueError("--interactive is not available when running under MPI (pvbatch).")
+        if args.all_surfaces:
+            raise ValueError("--all-surfaces starts its own pvpython runs; do not launch it under MPI.")
+        if args.frame_store:
+            raise ValueError("--frame-store writes frames from one process; not supported under MPI.")
+        if args.prefetch:
+            print("[MPI] --prefetch loads data on the first rank only; disabled under MPI.")
+            args.prefetch = 0
+        print(f"[MPI] Running on {ranks} ranks.")
+    if parse_server(args.server) is not None:
+        if ranks > 1:
+            raise ValueError("--server attaches pvpython to a pvserver; do not launch it under MPI.")
+        if args.interactive_mode:
+            raise ValueError("--interactive is not available with --server.")
+        if args.all_surfaces:
+            raise ValueError(
+                "--all-surfaces starts one pvpython run per surface; attach each run to "
+                "the server by rendering the surfaces with --vtp instead."
+            )
+        if args.prefetch:
+            print("[SERVER] --prefetch loads data on the client; disabled with --server.")
+            args.prefetch = 0
+        if args.skip_identical:
+            print("[SERVER] --skip-identical reads the data on the client; disabled with --server.")
+            args.skip_identical = False
 
     time_paths: List[str] = args.time_dirs_path or ["."]
     vtp_names: List[str | None] = args.vtp_filename or [None] * len(time_paths)
@@ -193,13 +607,41 @@ def main(argv: list[str] | None = None) -> None:
     if len(source_representations) != len(time_paths):
         raise ValueError("Number of --representation must match --path")
     args.source_representations = source_representations
+    args.progress_reporter = open_progress(
+        args.progress, args.progress_file, name=args.animation_filename
+    )
+    if args.all_surfaces:
+        run_all_surfaces(args, argv, parser)
+        return
+    if args.preview:
+        if args.preview_frames <= 0:
+            raise ValueError("--preview-frames must be greater than 0")
+        apply_preview_settings(args)
 
+    # --all-surfaces child runs reuse the parent's discovery pass
+    discovered = load_discovery(args.discovery_cache)
+    progress = args.progress_reporter
+    if progress is not None:
+        progress.start("discovery", total=len(time_paths), unit="paths")
     sources: List[Tuple[List[str], str]] = []
-    for path, vtp_name in zip(time_paths, vtp_names):
-        time_dirs, vtp_files = find_vtp_files(path)
+    for done, (path, vtp_name) in enumerate(zip(time_paths, vtp_names)):
+        if progress is not None:
+            progress.update(done)
+        if is_vtkhdf_file(path):
+            # A consolidated series is a single file carrying its own time steps.
+            sources.append(([os.path.dirname(os.path.abspath(path))], os.path.basename(path)))
+            continue
+        if os.path.abspath(path) in discovered:
+            time_dirs = discovered[os.path.abspath(path)]["time_dirs"]
+            vtp_files = discovered[os.path.abspath(path)]["vtp_files"]
+        else:
+            time_dirs, vtp_files = find_vtp_files(path)
         selected = validate_vtp_file(vtp_name, vtp_files)
         sources.append((time_dirs, selected))
 
+    if progress is not None:
+        progress.finish()
+
     readers, render_view, displays = pv_visualize(args, sources)
 
     captured_camera: Dict | None = None
@@ -210,6 +652,9 @@ def main(argv: list[str] | None = None) -> None:
                 render_view,
                 displays[0],
                 args.colormap,
+                args=args,
+                readers=readers,
+                displays=displays,
             )
         if selected:
             args.field = selected
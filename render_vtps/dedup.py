@@ -0,0 +1,151 @@
+"""Content hashes that detect identical consecutive timesteps."""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Geometry sections whose arrays always take part in the hash.
+GEOMETRY_SECTIONS = ("Points", "Verts", "Lines", "Strips", "Polys")
+
+_CHUNK_BYTES = 1 << 20
+_TAG_RE = re.compile(rb"<(/?)([A-Za-z]+)([^>]*?)(/?)>")
+_ATTR_RE = re.compile(rb'([A-Za-z_]+)="([^"]*)"')
+
+
+def _read_header(handle) -> Tuple[bytes, Optional[int]]:
+    """Return the XML text before the appended block and the block's data start."""
+    header = b""
+    while True:
+        chunk = handle.read(_CHUNK_BYTES)
+        if not chunk:
+            return header, None
+        header += chunk
+        marker = header.find(b"<AppendedData")
+        if marker < 0:
+            continue
+        tag_end = header.find(b">", marker)
+        underscore = header.find(b"_", tag_end) if tag_end >= 0 else -1
+        if underscore >= 0:
+            return header[:marker], underscore + 1
+
+
+def _selected_ranges(header: bytes, fields: Sequence[str]) -> Optional[List[Tuple[bytes, int]]]:
+    """Return (tag text, appended offset) for the geometry arrays and *fields*.
+
+    Returns None when a selected array is stored inline, so the caller
+    hashes the whole file instead.
+    """
+    stack: List[bytes] = []
+    selected: List[Tuple[bytes, int]] = []
+    field_names = {name.encode("utf-8") for name in fields}
+    for closing, name, attrs, self_closing in _TAG_RE.findall(header):
+        if closing:
+            if stack and stack[-1] == name:
+                stack.pop()
+            continue
+        if name == b"DataArray":
+            attributes = dict(_ATTR_RE.findall(attrs))
+            parent = stack[-1].decode("ascii") if stack else ""
+            wanted = parent in GEOMETRY_SECTIONS or (
+                parent in ("PointData", "CellData")
+                and attributes.get(b"Name") in field_names
+            )
+            if wanted:
+                if attributes.get(b"format") != b"appended" or b"offset" not in attributes:
+                    return None
+                selected.append((parent.encode("ascii") + attrs, int(attributes[b"offset"])))
+        elif name == b"Piece":
+            # Point and cell counts are part of the geometry.
+            selected.append((attrs, -1))
+        if not self_closing:
+            stack.append(name)
+    return selected
+
+
+def _all_offsets(header: bytes) -> List[int]:
+    return sorted({
+        int(offset)
+        for offset in re.findall(rb'offset="(\d+)"', header)
+    })
+
+
+def file_content_hash(path: str, fields: Sequence[str] = ()) -> str:
+    """Hash the geometry and the *fields* arrays of a VTP/VTK file.
+
+    For appended-data VTP files only the byte ranges of the selected arrays
+    are read (compressed data is hashed as stored); other files are hashed
+    whole.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    size = os.path.getsize(path)
+    with open(path, "rb") as handle:
+        header, data_start = _read_header(handle)
+        ranges = _selected_ranges(header, fields) if data_start is not None else None
+        if ranges is None:
+            handle.seek(0)
+            for chunk in iter(lambda: handle.read(_CHUNK_BYTES), b""):
+                digest.update(chunk)
+            return digest.hexdigest()
+
+        offsets = _all_offsets(header)
+        for tag, offset in ranges:
+            digest.update(tag)
+            if offset < 0:
+                continue
+            following = [o for o in offsets if o > offset]
+            # The appended block ends with "</AppendedData>" and "</VTKFile>".
+            end = data_start + following[0] if following else size
+            handle.seek(data_start + offset)
+            remaining = end - (data_start + offset)
+            while remaining > 0:
+                chunk = handle.read(min(_CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def frame_content_keys(
+    frames: Sequence[Sequence[str]],
+    fields: Sequence[str] = (),
+    workers: Optional[int] = None,
+) -> List[Tuple[str, ...]]:
+    """Return one key per frame from the content hashes of the files it shows.
+
+    Each file is hashed once; hard links and repeated paths share a hash
+    through their device/inode pair.
+    """
+    by_inode: Dict[Tuple[int, int, int, int], str] = {}
+    unique: Dict[str, Tuple[int, int, int, int]] = {}
+    for paths in frames:
+        for path in paths:
+            if path not in unique:
+                st = os.stat(path)
+                unique[path] = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    pending = {}
+    for path, inode in unique.items():
+        pending.setdefault(inode, path)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for inode, digest in zip(
+            pending,
+            pool.map(lambda p: file_content_hash(p, fields), pending.values()),
+        ):
+            by_inode[inode] = digest
+    return [tuple(by_inode[unique[path]] for path in paths) for paths in frames]
+
+
+def repeated_frames(keys: Sequence[object], labels: Sequence[str]) -> Dict[int, bool]:
+    """Map each frame whose inputs match the previous frame to ``same label``.
+
+    Such frames need no data update: with the same time label the previous
+    image is reused as is, otherwise only the label is redrawn.
+    """
+    return {
+        index: labels[index] == labels[index - 1]
+        for index in range(1, len(keys))
+        if keys[index] == keys[index - 1]
+    }
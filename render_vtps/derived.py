@@ -0,0 +1,270 @@
+"""Derived fields (vector magnitude/components, simple expressions) computed with NumPy."""
+from __future__ import annotations
+
+import ast
+import hashlib
+import os
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+
+from .repack import read_polydata
+
+DERIVED_CACHE_DIR = ".render_vtps_derived"
+
+COMPONENTS = {"x": 0, "y": 1, "z": 2, "0": 0, "1": 1, "2": 2}
+
+
+def _magnitude(values: np.ndarray) -> np.ndarray:
+    if values.ndim == 1:
+        return np.abs(values)
+    return np.sqrt(np.einsum("ij,ij->i", values, values))
+
+
+FUNCTIONS: Dict[str, Callable] = {
+    "mag": _magnitude,
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "min": np.minimum,
+    "max": np.maximum,
+}
+
+_BINARY_OPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.Pow: np.power,
+}
+
+
+class DerivedField:
+    """A field computed from the arrays of each timestep.
+
+    ``label`` is the name of the resulting scalar array (the ``--field``
+    value itself) and ``names`` the arrays it reads.
+    """
+
+    def __init__(self, label: str, expression: ast.AST, names: List[str]) -> None:
+        self.label = label
+        self.expression = expression
+        self.names = names
+
+    def _evaluate(self, node: ast.AST, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        if isinstance(node, ast.Expression):
+            return self._evaluate(node.body, arrays)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return np.float64(node.value)
+        if isinstance(node, ast.Name):
+            return arrays[node.id]
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            value = self._evaluate(node.operand, arrays)
+            return -value if isinstance(node.op, ast.USub) else value
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            return _BINARY_OPS[type(node.op)](
+                self._evaluate(node.left, arrays),
+                self._evaluate(node.right, arrays),
+            )
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            return FUNCTIONS[node.func.id](*(self._evaluate(a, arrays) for a in node.args))
+        if isinstance(node, ast.Subscript):
+            index = int(node.slice.value) if isinstance(node.slice, ast.Constant) else -1
+            values = self._evaluate(node.value, arrays)
+            if np.ndim(values) != 2:
+                raise ValueError(
+                    f"--field '{self.label}' takes a component of a scalar array; "
+                    "components need a vector array."
+                )
+            if not 0 <= index < values.shape[1]:
+                raise ValueError(
+                    f"Component {index} in --field '{self.label}' is out of range; "
+                    f"the array has {values.shape[1]} components."
+                )
+            return values[:, index]
+        raise ValueError(f"Unsupported expression in --field '{self.label}'")
+
+    def evaluate(self, data) -> Optional[Tuple[str, np.ndarray]]:
+        """Return (association, float64 values) on *data*, or None if arrays are missing."""
+        for assoc, attributes in (("POINTS", data.GetPointData()), ("CELLS", data.GetCellData())):
+            arrays = {}
+            for name in self.names:
+                array = attributes.GetArray(name)
+                if array is None:
+                    break
+                arrays[name] = vtk_to_numpy(array).astype(np.float64, copy=False)
+            else:
+                values = np.asarray(self._evaluate(self.expression, arrays), dtype=np.float64)
+                count = attributes.GetNumberOfTuples() if arrays else 0
+                if values.ndim == 0:
+                    values = np.full(count, float(values))
+                if values.ndim != 1:
+                    raise ValueError(
+                        f"--field '{self.label}' must evaluate to a scalar per point or cell."
+                    )
+                return assoc, values
+        return None
+
+
+def _validate(node: ast.AST, spec: str) -> None:
+    for child in ast.walk(node):
+        if isinstance(child, ast.Call):
+            if not isinstance(child.func, ast.Name) or child.func.id not in FUNCTIONS:
+                raise ValueError(
+                    f"Unknown function in --field '{spec}'. "
+                    f"Available: {', '.join(sorted(FUNCTIONS))}."
+                )
+            # NumPy ufuncs know their input count; the remaining functions take one array.
+            expected = getattr(FUNCTIONS[child.func.id], "nin", 1)
+            if len(child.args) != expected:
+                raise ValueError(
+                    f"Function '{child.func.id}' in --field '{spec}' takes {expected} "
+                    f"argument{'s' if expected != 1 else ''}, got {len(child.args)}."
+                )
+        elif isinstance(child, ast.Subscript):
+            if not (isinstance(child.slice, ast.Constant) and isinstance(child.slice.value, int)):
+                raise ValueError(f"Components in --field '{spec}' must be integer indices.")
+        elif not isinstance(child, (
+            ast.Expression, ast.Constant, ast.Name, ast.Load, ast.UnaryOp, ast.USub,
+            ast.UAdd, ast.BinOp, ast.operator,
+        )) or (isinstance(child, ast.operator) and type(child) not in _BINARY_OPS):
+            raise ValueError(f"Unsupported syntax in --field '{spec}'.")
+
+
+def parse_field(spec: Optional[str]) -> Optional[DerivedField]:
+    """Parse a derived ``--field`` value; return None for a plain array name.
+
+    Accepted forms are ``U:magnitude`` (or ``U:mag``), ``U:x``/``U:y``/``U:z``
+    (or ``U:0``...), and ``label=expression`` such as ``q=0.5*mag(U)**2``.
+    """
+    if not spec:
+        return None
+    if "=" in spec:
+        label, _, source = spec.partition("=")
+        label = label.strip()
+        try:
+            expression = ast.parse(source.strip(), mode="eval")
+        except SyntaxError as exc:
+            raise ValueError(f"Invalid expression in --field '{spec}': {exc.msg}") from exc
+        if not label:
+            raise ValueError(f"--field '{spec}' needs a name before '='.")
+        _validate(expression, spec)
+        names = sorted({
+            node.id for node in ast.walk(expression)
+            if isinstance(node, ast.Name) and node.id not in FUNCTIONS
+        })
+        return DerivedField(label, expression, names)
+    if ":" in spec:
+        name, _, part = spec.rpartition(":")
+        part = part.strip().lower()
+        if part in ("magnitude", "mag"):
+            expression = ast.Expression(ast.Call(
+                func=ast.Name(id="mag", ctx=ast.Load()),
+                args=[ast.Name(id=name, ctx=ast.Load())],
+                keywords=[],
+            ))
+        elif part in COMPONENTS:
+            expression = ast.Expression(ast.Subscript(
+                value=ast.Name(id=name, ctx=ast.Load()),
+                slice=ast.Constant(COMPONENTS[part]),
+                ctx=ast.Load(),
+            ))
+        else:
+            raise ValueError(
+                f"Unknown component '{part}' in --field '{spec}'; use magnitude, x, y or z."
+            )
+        return DerivedField(spec, expression, [name])
+    return None
+
+
+class DerivedArrayStore:
+    """On-disk ``.npy`` cache of derived arrays keyed by file signature and field.
+
+    The range scan and the render pass both load timesteps; whichever runs
+    first computes the derived array and the other reads it back.
+    """
+
+    def __init__(self, directory: str, field: DerivedField) -> None:
+        self._directory = directory
+        self._field = field
+
+    def _path(self, source_path: str) -> str:
+        st = os.stat(source_path)
+        key = "|".join((
+            os.path.abspath(source_path),
+            str(st.st_size),
+            str(st.st_mtime_ns),
+            ast.dump(self._field.expression),
+        ))
+        return os.path.join(self._directory, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def load(self, source_path: str) -> Optional[Tuple[str, np.ndarray]]:
+        base = self._path(source_path)
+        for assoc in ("POINTS", "CELLS"):
+            path = f"{base}.{assoc}.npy"
+            if os.path.exists(path):
+                try:
+                    return assoc, np.load(path, mmap_mode="r")
+                except (OSError, ValueError):
+                    return None
+        return None
+
+    def save(self, source_path: str, assoc: str, values: np.ndarray) -> None:
+        os.makedirs(self._directory, exist_ok=True)
+        path = f"{self._path(source_path)}.{assoc}.npy"
+        # Threads of one process may save the same entry, so every writer gets its own file.
+        with tempfile.NamedTemporaryFile(
+            dir=self._directory, prefix=os.path.basename(path), suffix=".tmp", delete=False
+        ) as handle:
+            np.save(handle, values)
+        os.replace(handle.name, path)
+
+
+def attach_derived(
+    data,
+    field: DerivedField,
+    source_path: Optional[str] = None,
+    store: Optional[DerivedArrayStore] = None,
+) -> Optional[str]:
+    """Add the derived array to *data* in place and return its association.
+
+    With a *store*, an array computed earlier for *source_path* is reused
+    and newly computed arrays are saved for the next pass.
+    """
+    result = store.load(source_path) if store is not None and source_path else None
+    expected = {"POINTS": data.GetNumberOfPoints(), "CELLS": data.GetNumberOfCells()}
+    if result is not None and len(result[1]) != expected[result[0]]:
+        result = None
+    if result is None:
+        result = field.evaluate(data)
+        if result is None:
+            return None
+        if store is not None and source_path:
+            store.save(source_path, *result)
+    assoc, values = result
+    array = numpy_to_vtk(np.ascontiguousarray(values), deep=1)
+    array.SetName(field.label)
+    attributes = data.GetPointData() if assoc == "POINTS" else data.GetCellData()
+    attributes.AddArray(array)
+    return assoc
+
+
+def derived_loader(
+    field: DerivedField,
+    store: Optional[DerivedArrayStore] = None,
+) -> Callable[[str], object]:
+    """Return a timestep loader that reads a file and attaches the derived array."""
+
+    def _load(path: str):
+        data = read_polydata(path)
+        attach_derived(data, field, path, store)
+        return data
+
+    return _load
@@ -11,6 +11,13 @@ from .utils import basename_list
 
 _TIME_DIR_RE = re.compile(r"^[0-9]+(\.[0-9]+)?$")
 
+VTKHDF_EXTENSIONS = (".vtkhdf", ".hdf")
+
+
+def is_vtkhdf_file(path: str) -> bool:
+    """Return True if *path* is a consolidated VTKHDF time-series file."""
+    return os.path.isfile(path) and path.lower().endswith(VTKHDF_EXTENSIONS)
+
 
 def find_vtp_files(time_dirs_path: str) -> Tuple[List[str], List[str]]:
     """Return sorted (time_dirs, vtp_files) within *time_dirs_path*.
@@ -0,0 +1,431 @@
+"""ffmpeg output formats: per-format codec settings and multi-output encodes."""
+from __future__ import annotations
+
+import math
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Codec and quality defaults per container; any key can be overridden per format.
+FORMAT_DEFAULTS: Dict[str, Dict[str, str]] = {
+    "mp4": {"codec": "libx264", "crf": "20", "preset": "medium"},
+    "mkv": {"codec": "libx264", "crf": "20", "preset": "medium"},
+    "mov": {"codec": "libx264", "crf": "20", "preset": "medium"},
+    "webm": {"codec": "libvpx-vp9", "crf": "32"},
+    "avi": {"codec": "mpeg4", "quality": "3"},
+    "ogv": {"codec": "libtheora", "quality": "7"},
+    "gif": {},
+}
+
+# Keys accepted in ``--format mp4:crf=18:preset=slow``.
+FORMAT_OPTION_KEYS = ("codec", "crf", "preset", "bitrate", "quality", "width", "fps", "threads")
+
+# Keyframe interval of segmented encodes; segments hold whole GOPs.
+SEGMENT_GOP_SECONDS = 2.0
+DEFAULT_SEGMENT_SECONDS = 10.0
+
+# Formats whose segments cannot be joined by stream copy (GIF palettes differ).
+UNSEGMENTED_FORMATS = frozenset({"gif"})
+
+
+class OutputFormat:
+    """One requested movie format and its codec settings.
+
+    ``options`` holds only the keys given on the command line; ``settings``
+    merges them over ``FORMAT_DEFAULTS``.
+    """
+
+    def __init__(self, extension: str, options: Optional[Dict[str, Optional[str]]] = None) -> None:
+        self.extension = extension
+        self.options = dict(options or {})
+
+    @property
+    def settings(self) -> Dict[str, str]:
+        merged = dict(FORMAT_DEFAULTS.get(self.extension, {}))
+        merged.update(self.options)
+        return {key: value for key, value in merged.items() if value is not None}
+
+    def with_options(self, **options: Optional[str]) -> "OutputFormat":
+        """Return a copy with *options* added; ``None`` values remove a setting."""
+        return OutputFormat(self.extension, {**self.options, **options})
+
+    def path(self, out_base: str) -> str:
+        return f"{out_base}.{self.extension}"
+
+    def ffmpeg_args(self) -> List[str]:
+        """Return the ffmpeg output options for this format."""
+        settings = self.settings
+        filters = []
+        if settings.get("fps"):
+            filters.append(f"fps={settings['fps']}")
+        if settings.get("width"):
+            filters.append(f"scale={settings['width']}:-2:flags=lanczos")
+        if self.extension == "gif":
+            # A per-movie palette gives far better GIF colors than the default one.
+            filters.append("split[a][b];[a]palettegen[p];[b][p]paletteuse")
+            return ["-vf", ",".join(filters), "-loop", "0"]
+
+        args: List[str] = []
+        codec = settings.get("codec")
+        if codec:
+            args += ["-c:v", codec]
+        if settings.get("crf"):
+            args += ["-crf", settings["crf"]]
+            if codec and codec.startswith("libvpx") and not settings.get("bitrate"):
+                # Constant-quality mode for VP8/VP9.
+                args += ["-b:v", "0"]
+        if settings.get("preset") and codec and codec.startswith(("libx264", "libx265")):
+            args += ["-preset", settings["preset"]]
+        if settings.get("bitrate"):
+            args += ["-b:v", settings["bitrate"]]
+        if settings.get("quality"):
+            args += ["-q:v", settings["quality"]]
+        if settings.get("threads"):
+            args += ["-threads", settings["threads"]]
+        if filters:
+            args += ["-vf", ",".join(filters)]
+        return args + ["-pix_fmt", "yuv420p"]
+
+
+def parse_formats(spec: str) -> List[OutputFormat]:
+    """Parse ``--format``: comma-separated extensions with optional ``:key=value`` settings.
+
+    ``mp4,webm:crf=28,gif:width=480:fps=12`` requests three movies.
+    """
+    formats: List[OutputFormat] = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        extension, *pairs = item.split(":")
+        extension = extension.strip().lower().lstrip(".")
+        options: Dict[str, str] = {}
+        for pair in pairs:
+            key, sep, value = pair.partition("=")
+            key = key.strip().lower()
+            if not sep or key not in FORMAT_OPTION_KEYS or not value.strip():
+                raise ValueError(
+                    f"Invalid setting '{pair}' in --format '{item}'. "
+                    f"Use key=value with keys: {', '.join(FORMAT_OPTION_KEYS)}."
+                )
+            options[key] = value.strip()
+        if any(f.extension == extension for f in formats):
+            raise ValueError(f"--format lists '{extension}' more than once.")
+        formats.append(OutputFormat(extension, options))
+    if not formats:
+        raise ValueError("--format needs at least one movie format.")
+    return formats
+
+
+def apply_encoder_settings(
+    formats: Sequence[OutputFormat],
+    codec: Optional[str] = None,
+    preset: Optional[str] = None,
+    crf: Optional[int] = None,
+    threads: Optional[int] = None,
+) -> List[OutputFormat]:
+    """Apply the global ``--codec``/``--preset``/``--crf``/``--encoder-threads`` to *formats*.
+
+    Settings given per format in ``--format`` take precedence.
+    """
+    defaults = {
+        key: str(value)
+        for key, value in (("codec", codec), ("preset", preset), ("crf", crf))
+        if value is not None and value != ""
+    }
+    # 0 threads means "let ffmpeg decide", i.e. no setting.
+    if threads:
+        defaults["threads"] = str(threads)
+    return [OutputFormat(f.extension, {**defaults, **f.options}) for f in formats]
+
+
+def needs_ffmpeg(formats: Sequence[OutputFormat]) -> bool:
+    """Return True when *formats* cannot be written by a single SaveAnimation call."""
+    return len(formats) > 1 or bool(formats[0].options)
+
+
+def png_input_args(frame_dir: str, fps: int) -> List[str]:
+    """Return ffmpeg input options for ``frame_%06d.png`` files in *frame_dir*."""
+    return ["-framerate", str(fps), "-i", os.path.join(frame_dir, "frame_%06d.png")]
+
+
+def _quote(path: str) -> str:
+    return "'" + os.path.abspath(path).replace("'", "'\\''") + "'"
+
+
+def write_ffconcat(list_path: str, frame_paths: Sequence[str], durations: Sequence[float]) -> None:
+    """Write an ffconcat list that shows each of *frame_paths* for its duration in seconds.
+
+    Each frame file is referenced once, so holds and slow motion need no
+    duplicated frames on disk.
+    """
+    lines = ["ffconcat version 1.0"]
+    for path, duration in zip(frame_paths, durations):
+        lines += [f"file {_quote(path)}", f"duration {duration:.6f}"]
+    # The demuxer only honours the last duration when the file is listed once more.
+    lines.append(f"file {_quote(frame_paths[-1])}")
+    with open(list_path, "w", encoding="utf-8") as handle:
+        handle.write("\n".join(lines) + "\n")
+
+
+def frame_clock(durations: Sequence[float], fps: int) -> List[int]:
+    """Return the output frame at which each of *durations* starts, plus the total.
+
+    Frames are placed on a constant *fps* grid with the rounding carried
+    over, so the movie length matches the sum of *durations*.
+    """
+    bounds = [0]
+    clock = 0.0
+    for duration in durations:
+        clock += max(0.0, float(duration))
+        bounds.append(int(round(clock * fps)))
+    return bounds
+
+
+def concat_input_args(list_path: str) -> List[str]:
+    """Return ffmpeg input options for a concat demuxer list."""
+    return ["-f", "concat", "-safe", "0", "-i", list_path]
+
+
+def raw_input_args(width: int, height: int, fps: int) -> List[str]:
+    """Return ffmpeg input options for raw RGB frames on stdin."""
+    return [
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgb24",
+        "-s",
+        f"{width}x{height}",
+        "-framerate",
+        str(fps),
+        "-i",
+        "-",
+    ]
+
+
+def ffmpeg_command(
+    ffmpeg_path: str,
+    input_args: Sequence[str],
+    outputs: Sequence[Tuple[OutputFormat, str]],
+    output_args: Sequence[str] = (),
+) -> List[str]:
+    """Build one ffmpeg command that encodes its input into every (format, path) in *outputs*.
+
+    ffmpeg decodes the input once and runs the output encoders side by
+    side, so extra formats add encoding work but no extra rendering.
+    *output_args* are repeated for each output.
+    """
+    cmd = [ffmpeg_path, "-y", "-loglevel", "error", *input_args]
+    for output_format, path in outputs:
+        cmd += [*output_args, *output_format.ffmpeg_args(), path]
+    return cmd
+
+
+def encode(
+    ffmpeg_path: str,
+    input_args: Sequence[str],
+    outputs: Sequence[Tuple[OutputFormat, str]],
+) -> None:
+    """Run ffmpeg on *input_args* and write all *outputs*."""
+    subprocess.run(ffmpeg_command(ffmpeg_path, input_args, outputs), check=True)
+
+
+def segment_ranges(frame_count: int, fps: int, segment_seconds: float) -> List[Tuple[int, int]]:
+    """Split *frame_count* frames into (start, count) segments of whole GOPs."""
+    gop = max(1, int(round(SEGMENT_GOP_SECONDS * fps)))
+    segment_frames = max(gop, int(round(segment_seconds * fps / gop)) * gop)
+    return [
+        (start, min(segment_frames, frame_count - start))
+        for start in range(0, frame_count, segment_frames)
+    ]
+
+
+def _concat(ffmpeg_path: str, segment_paths: Sequence[str], movie_path: str) -> None:
+    list_path = f"{segment_paths[0]}.txt"
+    with open(list_path, "w", encoding="utf-8") as handle:
+        for path in segment_paths:
+            handle.write(f"file {_quote(path)}\n")
+    subprocess.run(
+        [
+            ffmpeg_path, "-y", "-loglevel", "error",
+            *concat_input_args(list_path),
+            "-c", "copy", movie_path,
+        ],
+        check=True,
+    )
+
+
+def _at_rate(output_format: OutputFormat, fps: int) -> OutputFormat:
+    """Return *output_format* resampled to a constant rate (its own ``fps`` setting wins)."""
+    if output_format.settings.get("fps"):
+        return output_format
+    return output_format.with_options(fps=str(fps))
+
+
+def encode_png_frames(
+    ffmpeg_path: str,
+    frame_dir: str,
+    frame_count: int,
+    fps: int,
+    outputs: Sequence[Tuple[OutputFormat, str]],
+    jobs: int = 1,
+    segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+    durations: Optional[Sequence[float]] = None,
+) -> None:
+    """Encode ``frame_%06d.png`` files, optionally as GOP-aligned segments on *jobs* ffmpeg processes.
+
+    With *durations* (seconds per frame, see ``timeline``) the frames are
+    fed through an ffconcat list instead of at a fixed frame rate; an fps
+    filter resamples them to a constant *fps* (repeating held frames) and
+    each output is cut to the length of its frames on that grid. With
+    *jobs* > 1 every segment starts on a keyframe and is encoded
+    independently, then the segments of each movie are joined with the
+    concat demuxer without re-encoding. GIF movies are encoded whole
+    alongside the segments.
+    """
+    pattern = os.path.join(frame_dir, "frame_%06d.png")
+    frame_paths = [pattern % index for index in range(frame_count)]
+    segments = segment_ranges(frame_count, fps, segment_seconds)
+    segmented = [(f, p) for f, p in outputs if f.extension not in UNSEGMENTED_FORMATS]
+    whole = [(f, p) for f, p in outputs if f.extension in UNSEGMENTED_FORMATS]
+    if jobs <= 1 or len(segments) < 2 or not segmented:
+        segments, segmented, whole = [], [], list(outputs)
+
+    gop = str(max(1, int(round(SEGMENT_GOP_SECONDS * fps))))
+    threads = str(max(1, (os.cpu_count() or 1) // jobs))
+    bounds = frame_clock(durations[:frame_count], fps) if durations is not None else None
+    if bounds is not None:
+        # The concat demuxer keeps each frame's timestamps; muxers would otherwise
+        # pick their own constant rate and drop short frames.
+        segmented = [(_at_rate(f, fps), p) for f, p in segmented]
+        whole = [(_at_rate(f, fps), p) for f, p in whole]
+
+    def _length_args(start: int, count: int) -> List[str]:
+        if bounds is None:
+            return ["-frames:v", str(count)]
+        # Half a frame short of the end, so the repeated last ffconcat entry is dropped.
+        frames = max(1, bounds[start + count] - bounds[start])
+        return ["-t", f"{(frames - 0.5) / fps:.6f}"]
+
+    with tempfile.TemporaryDirectory(prefix=".encode_", dir=frame_dir) as segment_dir:
+
+        def _input_args(name: str, start: int, count: int) -> List[str]:
+            if durations is None:
+                return ["-framerate", str(fps), "-start_number", str(start), "-i", pattern]
+            list_path = os.path.join(segment_dir, f"{name}.ffconcat")
+            write_ffconcat(
+                list_path, frame_paths[start:start + count], durations[start:start + count]
+            )
+            return concat_input_args(list_path)
+
+        commands: List[List[str]] = []
+        segment_paths: Dict[str, List[str]] = {path: [] for _f, path in segmented}
+        for number, (start, count) in enumerate(segments):
+            segment_outputs = []
+            for output_format, path in segmented:
+                if "threads" not in output_format.settings:
+                    output_format = output_format.with_options(threads=threads)
+                segment_path = os.path.join(
+                    segment_dir, f"{number:05d}_{os.path.basename(path)}"
+                )
+                segment_paths[path].append(segment_path)
+                segment_outputs.append((output_format, segment_path))
+            commands.append(ffmpeg_command(
+                ffmpeg_path,
+                _input_args(f"{number:05d}", start, count),
+                segment_outputs,
+                # Also drops the repeated last ffconcat entry, so segments do not overlap.
+                output_args=[*_length_args(start, count), "-g", gop],
+            ))
+        if whole:
+            commands.append(ffmpeg_command(
+                ffmpeg_path,
+                _input_args("whole", 0, frame_count),
+                whole,
+                output_args=_length_args(0, frame_count) if bounds is not None else (),
+            ))
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            # Each job is its own ffmpeg process; the threads only wait on them.
+            for _result in pool.map(lambda cmd: subprocess.run(cmd, check=True), commands):
+                pass
+        for path, paths in segment_paths.items():
+            _concat(ffmpeg_path, paths, path)
+    if segments:
+        print(
+            f"[ENCODE] Encoded {frame_count} frames as {len(segments)} segments "
+            f"on {jobs} parallel ffmpeg jobs."
+        )
+
+
+def encode_raw_frames(
+    ffmpeg_path: str,
+    write_frames: Callable[[IO[bytes], int, int], None],
+    frame_count: int,
+    width: int,
+    height: int,
+    fps: int,
+    outputs: Sequence[Tuple[OutputFormat, str]],
+    jobs: int = 1,
+    segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+    work_dir: Optional[str] = None,
+) -> None:
+    """Pipe raw RGB frames into ffmpeg, optionally as GOP-aligned segments on *jobs* processes.
+
+    ``write_frames(stream, start, count)`` writes frames ``start`` to
+    ``start + count`` to *stream*; it is called from one thread per
+    running ffmpeg process. Segments are joined as in ``encode_png_frames``.
+    """
+    segments = segment_ranges(frame_count, fps, segment_seconds)
+    segmented = [(f, p) for f, p in outputs if f.extension not in UNSEGMENTED_FORMATS]
+    whole = [(f, p) for f, p in outputs if f.extension in UNSEGMENTED_FORMATS]
+    if jobs <= 1 or len(segments) < 2 or not segmented:
+        segments, segmented, whole = [], [], list(outputs)
+
+    gop = str(max(1, int(round(SEGMENT_GOP_SECONDS * fps))))
+    threads = str(max(1, (os.cpu_count() or 1) // jobs))
+    input_args = raw_input_args(width, height, fps)
+    with tempfile.TemporaryDirectory(prefix=".encode_", dir=work_dir) as segment_dir:
+        commands: List[Tuple[List[str], int, int]] = []
+        segment_paths: Dict[str, List[str]] = {path: [] for _f, path in segmented}
+        for number, (start, count) in enumerate(segments):
+            segment_outputs = []
+            for output_format, path in segmented:
+                if "threads" not in output_format.settings:
+                    output_format = output_format.with_options(threads=threads)
+                segment_path = os.path.join(
+                    segment_dir, f"{number:05d}_{os.path.basename(path)}"
+                )
+                segment_paths[path].append(segment_path)
+                segment_outputs.append((output_format, segment_path))
+            commands.append((
+                ffmpeg_command(ffmpeg_path, input_args, segment_outputs, output_args=["-g", gop]),
+                start,
+                count,
+            ))
+        if whole:
+            commands.append((ffmpeg_command(ffmpeg_path, input_args, whole), 0, frame_count))
+
+        def _run(command: Tuple[List[str], int, int]) -> None:
+            cmd, start, count = command
+            process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+            try:
+                write_frames(process.stdin, start, count)
+            finally:
+                process.stdin.close()
+                returncode = process.wait()
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, cmd)
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            for _result in pool.map(_run, commands):
+                pass
+        for path, paths in segment_paths.items():
+            _concat(ffmpeg_path, paths, path)
+    if segments:
+        print(
+            f"[ENCODE] Encoded {frame_count} frames as {len(segments)} segments "
+            f"on {jobs} parallel ffmpeg jobs."
+        )
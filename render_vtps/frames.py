@@ -0,0 +1,314 @@
+"""Explicit frame loop used by the frame-sequence export paths."""
+from __future__ import annotations
+
+import math
+import os
+import subprocess
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import paraview.simple as pv
+
+from .encoder import (
+    DEFAULT_SEGMENT_SECONDS,
+    OutputFormat,
+    encode,
+    encode_png_frames,
+    ffmpeg_command,
+    png_input_args,
+    raw_input_args,
+)
+from .framestore import FrameStore
+from .surface_collections import link_or_copy
+from .tiles import TiledCapture, write_frame, write_png
+
+
+def frame_name(index: int) -> str:
+    """Return the PNG filename used for frame *index* (``frame_%06d.png``)."""
+    return f"frame_{index:06d}.png"
+
+
+def scene_frame_times(frame_count: int) -> List[float]:
+    """Return the data times SaveAnimation visits for *frame_count* frames."""
+    scene = pv.GetAnimationScene()
+    values = scene.TimeKeeper.TimestepValues
+    if isinstance(values, (int, float)):
+        values = [values]
+    steps = [float(t) for t in (values or [])]
+    if not steps:
+        steps = [float(scene.AnimationTime)]
+    return steps[:max(1, frame_count)]
+
+
+def subsample_indices(count: int, target: int | None) -> List[int]:
+    """Return about *target* evenly spaced indices in ``range(count)``.
+
+    The first and last index are always kept. A falsy *target* or one at
+    least as large as *count* keeps every index.
+    """
+    if count <= 0:
+        return []
+    if not target or target >= count:
+        return list(range(count))
+    if target == 1:
+        return [0]
+    step = (count - 1) / (target - 1)
+    return sorted({int(round(i * step)) for i in range(target)})
+
+
+def render_frames(
+    export_view: object,
+    image_size: List[int],
+    data_times: Sequence[float],
+    frame_dir: str,
+    prepare_frame: Optional[Callable[[int, float], None]] = None,
+    resume: bool = False,
+    repeats: Optional[Dict[int, bool]] = None,
+    relabel: Optional[Callable[[int], None]] = None,
+    tiles: Optional[TiledCapture] = None,
+) -> List[str]:
+    """Render one PNG per entry of *data_times* into *frame_dir*.
+
+    Setting the scene time also ticks the animation cues, so the time label
+    matches what SaveAnimation would have drawn. *prepare_frame* is called
+    with (index, data_time) after the time is set and before the capture.
+    Each PNG is moved into place only once fully written, so with *resume*
+    the frames already present are complete and are not rendered again.
+
+    *repeats* maps frames whose data matches the previous frame to whether
+    their time label matches too (see ``dedup.repeated_frames``). Those
+    frames link the previous image, or keep the loaded data and only call
+    *relabel* (index) before the capture.
+
+    With *tiles*, each frame is rendered tile by tile and the PNG is
+    written from the memory-mapped buffer (see ``tiles.TiledCapture``).
+    """
+    os.makedirs(frame_dir, exist_ok=True)
+    scene = pv.GetAnimationScene()
+    repeats = repeats or {}
+    frame_paths: List[str] = []
+    # Whether the pipeline currently holds the data of the previous frame.
+    pipeline_current = False
+    for index, data_time in enumerate(data_times):
+        frame_path = os.path.join(frame_dir, frame_name(index))
+        frame_paths.append(frame_path)
+        if resume and os.path.exists(frame_path):
+            pipeline_current = False
+            continue
+        same_label = repeats.get(index)
+        if same_label:
+            link_or_copy(frame_paths[index - 1], frame_path)
+            continue
+        if same_label is not None and relabel is not None and pipeline_current:
+            relabel(index)
+        else:
+            scene.AnimationTime = float(data_time)
+            if prepare_frame is not None:
+                prepare_frame(index, float(data_time))
+            pipeline_current = True
+        partial_path = f"{frame_path[:-4]}.partial.png"
+        if tiles is not None:
+            write_png(partial_path, tiles.capture())
+        else:
+            pv.SaveScreenshot(partial_path, export_view, ImageResolution=image_size)
+        os.replace(partial_path, frame_path)
+    if not frame_paths:
+        raise RuntimeError("ParaView did not write any PNG frames.")
+    return frame_paths
+
+
+def store_frames(
+    export_view: object,
+    image_size: List[int],
+    data_times: Sequence[float],
+    store: FrameStore,
+    prepare_frame: Optional[Callable[[int, float], None]] = None,
+    repeats: Optional[Dict[int, bool]] = None,
+    relabel: Optional[Callable[[int], None]] = None,
+    tiles: Optional[TiledCapture] = None,
+) -> int:
+    """Render one frame per entry of *data_times* into the raw frame *store*.
+
+    Follows ``render_frames``: repeated frames copy the previous frame or
+    only *relabel* it, and *tiles* renders frames tile by tile. Returns the
+    number of frames stored.
+    """
+    if tiles is None:
+        export_view.ViewSize = [int(image_size[0]), int(image_size[1])]
+    scene = pv.GetAnimationScene()
+    repeats = repeats or {}
+    pipeline_current = False
+    for index, data_time in enumerate(data_times):
+        same_label = repeats.get(index)
+        if same_label:
+            store.repeat(index)
+            continue
+        if same_label is not None and relabel is not None and pipeline_current:
+            relabel(index)
+        else:
+            scene.AnimationTime = float(data_time)
+            if prepare_frame is not None:
+                prepare_frame(index, float(data_time))
+            pipeline_current = True
+        store.write(index, tiles.capture() if tiles is not None else capture_rgb(export_view))
+    if not len(data_times):
+        raise RuntimeError("ParaView did not render any frames.")
+    return len(data_times)
+
+
+def write_contact_sheet(
+    frame_paths: Sequence[str],
+    output_path: str,
+    thumb_width: int = 320,
+    columns: int | None = None,
+) -> str:
+    """Tile *frame_paths* into a single PNG grid at *output_path*."""
+    from vtkmodules.vtkFiltersCore import vtkImageAppend
+    from vtkmodules.vtkImagingCore import vtkImageConstantPad, vtkImageResize
+    from vtkmodules.vtkIOImage import vtkPNGReader, vtkPNGWriter
+
+    if not frame_paths:
+        raise ValueError("A contact sheet needs at least one frame.")
+    columns = columns or int(math.ceil(math.sqrt(len(frame_paths))))
+
+    thumbs = []
+    for path in frame_paths:
+        reader = vtkPNGReader()
+        reader.SetFileName(path)
+        reader.Update()
+        width, height, _depth = reader.GetOutput().GetDimensions()
+        resize = vtkImageResize()
+        resize.SetInputConnection(reader.GetOutputPort())
+        resize.SetOutputDimensions(
+            thumb_width,
+            max(1, int(round(height * thumb_width / float(width)))),
+            1,
+        )
+        resize.Update()
+        thumbs.append(resize.GetOutput())
+
+    thumb_height = thumbs[0].GetDimensions()[1]
+    rows = []
+    for start in range(0, len(thumbs), columns):
+        row = vtkImageAppend()
+        row.SetAppendAxis(0)
+        for thumb in thumbs[start:start + columns]:
+            row.AddInputData(thumb)
+        pad = vtkImageConstantPad()
+        pad.SetInputConnection(row.GetOutputPort())
+        pad.SetOutputWholeExtent(0, columns * thumb_width - 1, 0, thumb_height - 1, 0, 0)
+        pad.SetConstant(255)
+        pad.Update()
+        rows.append(pad.GetOutput())
+
+    sheet = vtkImageAppend()
+    sheet.SetAppendAxis(1)
+    # Image rows grow upwards, so append the last row first.
+    for row in reversed(rows):
+        sheet.AddInputData(row)
+
+    writer = vtkPNGWriter()
+    writer.SetInputConnection(sheet.GetOutputPort())
+    writer.SetFileName(output_path)
+    writer.Write()
+    return output_path
+
+
+def encode_png_sequence(
+    ffmpeg_path: str,
+    frame_dir: str,
+    fps: int,
+    outputs: Sequence[Tuple[OutputFormat, str]],
+    frame_count: int = 0,
+    jobs: int = 1,
+    segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+    durations: Optional[Sequence[float]] = None,
+) -> None:
+    """Encode ``frame_%06d.png`` files in *frame_dir* into every movie of *outputs*.
+
+    With a known *frame_count*, the frames can be encoded as parallel
+    segments (*jobs* > 1) and shown for per-frame *durations* (see
+    ``encoder.encode_png_frames``).
+    """
+    if frame_count > 0 and (jobs > 1 or durations is not None):
+        encode_png_frames(
+            ffmpeg_path, frame_dir, frame_count, fps, outputs,
+            jobs=jobs, segment_seconds=segment_seconds, durations=durations,
+        )
+        return
+    encode(ffmpeg_path, png_input_args(frame_dir, fps), outputs)
+
+
+def capture_rgb(export_view: object) -> np.ndarray:
+    """Render *export_view* and return its pixels as a top-down (H, W, 3) uint8 array."""
+    from vtkmodules.util.numpy_support import vtk_to_numpy
+    from vtkmodules.vtkRenderingCore import vtkWindowToImageFilter
+
+    pv.Render(export_view)
+    try:
+        # The view proxy returns the image composited over all MPI ranks.
+        image = export_view.SMProxy.CaptureImage(1)
+    except AttributeError:
+        image = None
+    if image is None:
+        grab = vtkWindowToImageFilter()
+        grab.SetInput(export_view.GetRenderWindow())
+        grab.SetInputBufferTypeToRGB()
+        grab.ReadFrontBufferOff()
+        grab.Update()
+        image = grab.GetOutput()
+    width, height, _depth = image.GetDimensions()
+    pixels = vtk_to_numpy(image.GetPointData().GetScalars()).reshape(height, width, -1)
+    # VTK images start at the bottom row.
+    return np.ascontiguousarray(pixels[::-1, :, :3])
+
+
+def stream_frames(
+    ffmpeg_path: str,
+    export_view: object,
+    image_size: List[int],
+    data_times: Sequence[float],
+    fps: int,
+    outputs: Sequence[Tuple[OutputFormat, str]],
+    prepare_frame: Optional[Callable[[int, float], None]] = None,
+    tiles: Optional[TiledCapture] = None,
+) -> int:
+    """Render *data_times* and pipe raw RGB frames straight into ffmpeg.
+
+    No intermediate PNGs are written. A single ffmpeg process encodes the
+    stream into every movie of *outputs*. With *tiles*, frames are
+    rendered tile by tile and piped from the memory-mapped buffer.
+    Returns the number of frames encoded.
+    """
+    width, height = int(image_size[0]), int(image_size[1])
+    if tiles is None:
+        export_view.ViewSize = [width, height]
+    cmd = ffmpeg_command(ffmpeg_path, raw_input_args(width, height, fps), outputs)
+    scene = pv.GetAnimationScene()
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    count = 0
+    try:
+        for index, data_time in enumerate(data_times):
+            if scene.AnimationTime != float(data_time):
+                scene.AnimationTime = float(data_time)
+            if prepare_frame is not None:
+                prepare_frame(index, float(data_time))
+            pixels = tiles.capture() if tiles is not None else capture_rgb(export_view)
+            if pixels.shape[:2] != (height, width):
+                raise RuntimeError(
+                    f"Captured frame is {pixels.shape[1]}x{pixels.shape[0]}, "
+                    f"expected {width}x{height}."
+                )
+            write_frame(process.stdin, pixels)
+            count += 1
+    finally:
+        process.stdin.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg exited with status {returncode} while encoding "
+            f"{', '.join(path for _format, path in outputs)}"
+        )
+    if count == 0:
+        raise RuntimeError("ParaView did not render any frames.")
+    return count
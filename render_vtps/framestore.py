@@ -0,0 +1,373 @@
+"""Raw RGB frame store: rendered frames kept for re-encoding without decoding."""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+from typing import IO, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .encoder import (
+    DEFAULT_SEGMENT_SECONDS,
+    OutputFormat,
+    apply_encoder_settings,
+    encode_raw_frames,
+    parse_formats,
+)
+from .timeline import Timeline, parse_timeline
+
+FRAME_STORE_VERSION = 1
+FRAME_STORE_SUFFIX = ".frames.rgb"
+FRAME_INDEX_SUFFIX = ".frames.json"
+
+
+def frame_store_paths(out_base: str) -> Tuple[str, str]:
+    """Return the (data, index) paths of the frame store of movie *out_base*."""
+    return f"{out_base}{FRAME_STORE_SUFFIX}", f"{out_base}{FRAME_INDEX_SUFFIX}"
+
+
+class FrameStore:
+    """Fixed-size top-down RGB frames in one memory-mapped file plus a JSON index.
+
+    The index holds the frame size and count, the frame rate and data time
+    of every frame, and the per-frame display durations (seconds, or None
+    for uniform playback). It is written last, by ``finish``, so a store
+    without an index is incomplete.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        index_path: str,
+        width: int,
+        height: int,
+        count: int,
+        fps: int,
+        frame_times: Sequence[float],
+        durations: Optional[Sequence[float]] = None,
+        mode: str = "r",
+    ) -> None:
+        self.path = path
+        self.index_path = index_path
+        self.width, self.height, self.count = int(width), int(height), int(count)
+        self.fps = int(fps)
+        self.frame_times = [float(t) for t in frame_times]
+        self.durations = [float(d) for d in durations] if durations is not None else None
+        self.frames = np.memmap(
+            path, dtype=np.uint8, mode=mode, shape=(self.count, self.height, self.width, 3)
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def write(self, index: int, pixels: np.ndarray) -> None:
+        """Store top-down (H, W, 3) *pixels* as frame *index*."""
+        if pixels.shape[:2] != (self.height, self.width):
+            raise RuntimeError(
+                f"Captured frame is {pixels.shape[1]}x{pixels.shape[0]}, "
+                f"expected {self.width}x{self.height}."
+            )
+        self.frames[index] = pixels[:, :, :3]
+
+    def repeat(self, index: int) -> None:
+        """Store a copy of the previous frame as frame *index*."""
+        self.frames[index] = self.frames[index - 1]
+
+    def finish(self) -> None:
+        """Flush the frames and write the index."""
+        self.frames.flush()
+        index = {
+            "version": FRAME_STORE_VERSION,
+            "data": os.path.basename(self.path),
+            "width": self.width,
+            "height": self.height,
+            "count": self.count,
+            "fps": self.fps,
+            "frame_times": self.frame_times,
+            "durations": self.durations,
+        }
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(index, handle)
+        os.replace(tmp_path, self.index_path)
+
+    def close(self) -> None:
+        self.frames = None
+
+
+def create_frame_store(
+    out_base: str,
+    width: int,
+    height: int,
+    count: int,
+    fps: int,
+    frame_times: Sequence[float],
+    durations: Optional[Sequence[float]] = None,
+) -> FrameStore:
+    """Create an empty store for *count* frames next to movie *out_base*.
+
+    A previous store is replaced; its index is removed first so it is never
+    paired with partly written frames.
+    """
+    path, index_path = frame_store_paths(out_base)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    return FrameStore(
+        path, index_path, width, height, count, fps, frame_times, durations, mode="w+"
+    )
+
+
+def open_frame_store(index_path: str) -> FrameStore:
+    """Open the store described by *index_path* read-only.
+
+    A movie base path (without the ``.frames.json`` suffix) is accepted too.
+    """
+    if not index_path.endswith(FRAME_INDEX_SUFFIX) and not os.path.exists(index_path):
+        index_path = frame_store_paths(index_path)[1]
+    if not os.path.exists(index_path):
+        raise FileNotFoundError(
+            f"Frame store index {index_path} not found; render with --frame-store first."
+        )
+    with open(index_path, "r", encoding="utf-8") as handle:
+        index = json.load(handle)
+    if index.get("version") != FRAME_STORE_VERSION:
+        raise ValueError(f"Unsupported frame store version {index.get('version')} in {index_path}.")
+    path = os.path.join(os.path.dirname(os.path.abspath(index_path)), index["data"])
+    expected = int(index["count"]) * int(index["width"]) * int(index["height"]) * 3
+    if not os.path.exists(path) or os.path.getsize(path) != expected:
+        raise ValueError(f"Frame store data {path} is missing or does not match {index_path}.")
+    return FrameStore(
+        path,
+        index_path,
+        index["width"],
+        index["height"],
+        index["count"],
+        index["fps"],
+        index["frame_times"],
+        index.get("durations"),
+    )
+
+
+def playback_order(count: int, fps: int, durations: Optional[Sequence[float]] = None) -> List[int]:
+    """Return the store frame shown at each output frame of a *fps* movie.
+
+    Without *durations* every frame is shown once. Otherwise frame ``i`` is
+    repeated until the movie clock passes the end of its duration; the
+    rounding carries over, so the movie length matches the durations.
+    """
+    if durations is None:
+        return list(range(count))
+    order: List[int] = []
+    clock = 0.0
+    shown = 0
+    for index, duration in enumerate(durations[:count]):
+        clock += max(0.0, float(duration))
+        until = int(round(clock * fps))
+        order.extend([index] * (until - shown))
+        shown = max(shown, until)
+    return order or [0]
+
+
+def write_frames(stream: IO[bytes], store: FrameStore, order: Sequence[int]) -> None:
+    """Write the frames *order* of *store* to *stream* straight from the mapping.
+
+    Runs of consecutive frames go out in one write of a view of the
+    memory map, so no frame is copied or decoded in Python.
+    """
+    start = 0
+    while start < len(order):
+        end = start + 1
+        while end < len(order) and order[end] == order[end - 1] + 1:
+            end += 1
+        first = order[start]
+        stream.write(memoryview(store.frames[first:first + end - start]).cast("B"))
+        start = end
+
+
+def encode_frame_store(
+    ffmpeg_path: str,
+    store: FrameStore,
+    fps: int,
+    outputs: Sequence[Tuple[OutputFormat, str]],
+    durations: Optional[Sequence[float]] = None,
+    jobs: int = 1,
+    segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+) -> int:
+    """Encode *store* into every movie of *outputs* at *fps*; return the frames encoded.
+
+    Holds and speed changes (*durations*) repeat frames in the raw stream,
+    which costs the encoder little and needs no PNG or ffconcat list.
+    """
+    order = playback_order(store.count, fps, durations)
+    encode_raw_frames(
+        ffmpeg_path,
+        lambda stream, start, count: write_frames(stream, store, order[start:start + count]),
+        len(order),
+        store.width,
+        store.height,
+        fps,
+        outputs,
+        jobs=jobs,
+        segment_seconds=segment_seconds,
+        work_dir=os.path.dirname(os.path.abspath(store.path)),
+    )
+    return len(order)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="render_vtps encode",
+        description="Re-encode the raw frames kept by --frame-store, without rendering again.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        required=True,
+        help="Frame store index (<output>/<name>.frames.json) or the movie base path.",
+    )
+    parser.add_argument(
+        "--output",
+        "--output-folder",
+        "--output_folder",
+        dest="output_folder",
+        type=str,
+        default=None,
+        help="Output folder for the movies. Defaults to the folder of the store.",
+    )
+    parser.add_argument(
+        "--name",
+        "--animation-filename",
+        "--animation_filename",
+        dest="animation_filename",
+        type=str,
+        default=None,
+        help="Movie basename, without extension. Defaults to the name of the rendered movie.",
+    )
+    parser.add_argument(
+        "--format",
+        "--output-format",
+        "--output_format",
+        dest="output_format",
+        type=str,
+        default="mp4",
+        help="Movie formats, with optional ':key=value' settings as for rendering.",
+    )
+    parser.add_argument(
+        "--fps",
+        type=int,
+        default=None,
+        help="Frames per second of the movie. Defaults to the frame rate of the render.",
+    )
+    parser.add_argument(
+        "--hold-first-frame",
+        "--hold_first_frame",
+        dest="hold_first_frame",
+        type=float,
+        default=0.0,
+        help="Hold the first frame for at least this many seconds (on top of the stored timing).",
+    )
+    parser.add_argument(
+        "--timeline",
+        type=str,
+        default=None,
+        help="Frame timing as for rendering, applied on top of the stored timing.",
+    )
+    parser.add_argument(
+        "--codec",
+        type=str,
+        default=None,
+        help="ffmpeg video codec for every --format (e.g. libx264, libx265, libvpx-vp9).",
+    )
+    parser.add_argument(
+        "--preset",
+        type=str,
+        default=None,
+        help="Encoder speed preset for x264/x265 (e.g. veryfast, medium, slow).",
+    )
+    parser.add_argument(
+        "--crf",
+        type=int,
+        default=None,
+        help="Constant-rate-factor quality for the encoder (lower is better quality).",
+    )
+    parser.add_argument(
+        "--encoder-threads",
+        "--encoder_threads",
+        dest="encoder_threads",
+        type=int,
+        default=0,
+        help="Threads per ffmpeg encoder (0 lets ffmpeg decide).",
+    )
+    parser.add_argument(
+        "--encode-jobs",
+        "--encode_jobs",
+        dest="encode_jobs",
+        type=int,
+        default=1,
+        help="Encode GOP-aligned segments on this many parallel ffmpeg processes.",
+    )
+    parser.add_argument(
+        "--segment-seconds",
+        "--segment_seconds",
+        dest="segment_seconds",
+        type=float,
+        default=DEFAULT_SEGMENT_SECONDS,
+        help="Movie length of each segment encoded by --encode-jobs.",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    if args.fps is not None and args.fps <= 0:
+        raise ValueError("--fps must be greater than 0")
+    if args.hold_first_frame < 0:
+        raise ValueError("--hold-first-frame must be greater than or equal to 0")
+    if args.encode_jobs < 1:
+        raise ValueError("--encode-jobs must be at least 1")
+    ffmpeg_path = shutil.which("ffmpeg")
+    if ffmpeg_path is None:
+        raise RuntimeError("ffmpeg not found in PATH; it is required to encode the stored frames.")
+
+    store = open_frame_store(args.store)
+    fps = args.fps or store.fps
+    formats = apply_encoder_settings(
+        parse_formats(args.output_format),
+        codec=args.codec,
+        preset=args.preset,
+        crf=args.crf,
+        threads=args.encoder_threads,
+    )
+    # A new timeline is applied on top of the stored timing, which keeps --adaptive frame spans.
+    timeline = parse_timeline(args.timeline)
+    if args.hold_first_frame > 0.0:
+        timeline = timeline or Timeline()
+        timeline.add_hold(0, args.hold_first_frame)
+    durations = store.durations
+    if timeline is not None:
+        durations = timeline.durations(store.frame_times, fps, base=store.durations)
+
+    name = args.animation_filename or os.path.basename(store.index_path)[:-len(FRAME_INDEX_SUFFIX)]
+    output_folder = args.output_folder or os.path.dirname(os.path.abspath(store.index_path))
+    os.makedirs(output_folder, exist_ok=True)
+    out_base = os.path.join(output_folder, name)
+    outputs = [(f, f.path(out_base)) for f in formats]
+    try:
+        count = encode_frame_store(
+            ffmpeg_path,
+            store,
+            fps,
+            outputs,
+            durations=durations,
+            jobs=args.encode_jobs,
+            segment_seconds=args.segment_seconds,
+        )
+    finally:
+        store.close()
+    print(
+        f"[STORE] Encoded {count} frames from {store.path} to "
+        f"{', '.join(path for _format, path in outputs)}"
+    )
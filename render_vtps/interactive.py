@@ -1,20 +1,341 @@
-
 """Interactive camera setup and key bindings."""
 from __future__ import annotations
 
-from typing import Tuple
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 
 import paraview.simple as pv  # type: ignore[import-untyped]
 
-from .pv_helpers import apply_coloring, discover_arrays
+from .discovery import is_vtkhdf_file
+from .frames import scene_frame_times
+from .prefetch import (
+    LRUTimestepCache,
+    create_producers,
+    reader_timestep_values,
+    series_file_index,
+    set_producer_data,
+)
+from .pv_helpers import (
+    apply_coloring,
+    apply_colormap_preset,
+    discover_arrays,
+    reader_file_names,
+)
+from .stats import RANGE_MODES, STATS_CACHE_NAME, StatsCache, stats_range
+from .visualize import display_sources
+
+# Timesteps on each side of the current one loaded ahead while scrubbing.
+SCRUB_NEIGHBOURS = 2
+# Fraction of the series skipped by the jump keys (PageUp/PageDown).
+SCRUB_JUMP_FRACTION = 0.1
+# Interval at which provisional field ranges check for the finished stats pass.
+SWITCHER_POLL_MS = 250
+
+
+class _TimestepScrubber:
+    """Show cached timesteps in the interactive view on key presses.
+
+    File series are displayed through TrivialProducers fed from an LRU cache
+    while the window is open; the original reader displays are restored on
+    ``close``.
+    """
+
+    def __init__(self, args, readers, render_view, displays, cache_bytes: int) -> None:
+        surface_count = len(getattr(args, "source_representations", None) or [])
+        self._series: List[Tuple[int, List[str], List[float]]] = []
+        for index, reader in enumerate(readers[:surface_count]):
+            files = reader_file_names(reader)
+            if len(files) > 1:
+                self._series.append((index, files, reader_timestep_values(reader)))
+        self._times = scene_frame_times(max((len(f) for _i, f, _t in self._series), default=0))
+        self.enabled = bool(self._series) and len(self._times) > 1
+        if not self.enabled:
+            return
+
+        self._view = render_view
+        self._step = 0
+        self.on_step = None
+        self._cache = LRUTimestepCache(cache_bytes)
+        self._producers: Dict[int, object] = create_producers(
+            [(index, files) for index, files, _times in self._series]
+        )
+        self._current: Dict[int, str] = {index: files[0] for index, files, _times in self._series}
+
+        self._original = list(displays)
+        self._shown: List[Tuple[object, object]] = []
+        for original, (source, rep) in zip(
+            self._original,
+            display_sources(args, readers, self._producers),
+        ):
+            display = pv.Show(source, render_view)
+            display.Representation = rep
+            color_array = list(getattr(original, "ColorArrayName", None) or [])
+            if len(color_array) == 2 and color_array[1]:
+                pv.ColorBy(display, (color_array[0], color_array[1]))
+            else:
+                pv.ColorBy(display, None)
+                display.DiffuseColor = list(original.DiffuseColor)
+            original.Visibility = 0
+            self._shown.append((source, display))
+        self._cache.prefetch(self._paths_near(0))
+
+    def _paths_at(self, step: int) -> List[Tuple[int, str]]:
+        data_time = self._times[step]
+        return [
+            (index, files[series_file_index(times, len(files), data_time)])
+            for index, files, times in self._series
+        ]
+
+    def _paths_near(self, step: int) -> List[str]:
+        paths: List[str] = []
+        for offset in range(1, SCRUB_NEIGHBOURS + 1):
+            for neighbour in (step + offset, step - offset):
+                if 0 <= neighbour < len(self._times):
+                    paths.extend(path for _index, path in self._paths_at(neighbour))
+        return paths
+
+    def show(self, step: int) -> None:
+        step = min(max(step, 0), len(self._times) - 1)
+        self._step = step
+        paths = self._paths_at(step)
+        for index, path in paths:
+            if self._current.get(index) != path:
+                set_producer_data(self._producers[index], self._cache.get(path))
+                self._current[index] = path
+        self._cache.prefetch(self._paths_near(step))
+        if self.on_step is not None:
+            self.on_step()
+
+        label = self._times[step]
+        try:
+            label = float(os.path.basename(os.path.dirname(paths[0][1])))
+        except ValueError:
+            pass
+        print(
+            f"[SCRUB] step {step + 1}/{len(self._times)}, time = {label:g} "
+            f"(cache {self._cache.nbytes / 2**20:.0f} MiB)"
+        )
+        self._view.StillRender()
+
+    @property
+    def displays(self) -> List[object]:
+        return [display for _source, display in self._shown]
+
+    def current_paths(self) -> List[str]:
+        return [path for _index, path in self._paths_at(self._step)]
+
+    @property
+    def step_count(self) -> int:
+        return len(self._times)
+
+    def step_by(self, delta: int) -> None:
+        self.show(self._step + delta)
+
+    def jump(self, direction: int) -> None:
+        self.step_by(direction * max(1, int(len(self._times) * SCRUB_JUMP_FRACTION)))
+
+    def close(self) -> None:
+        if not self.enabled:
+            return
+        for source, _display in self._shown:
+            pv.Hide(source, self._view)
+        for original in self._original:
+            original.Visibility = 1
+        self._cache.close()
+
+
+class _FieldSwitcher:
+    """Cycle the color field and range mode in the window from cached stats.
+
+    Per-file statistics are loaded (or computed once and cached on disk) on a
+    background thread as soon as the window opens, so switching only
+    rescales lookup tables and never re-executes the pipeline. Until that
+    pass finishes, ranges come from the entries already cached plus the
+    shown timestep and are refined by ``poll`` once the pass completes.
+    """
+
+    def __init__(self, args, reader, readers, displays, scrubber: _TimestepScrubber | None) -> None:
+        point_arrays, cell_arrays = discover_arrays(reader)
+        self.choices = [("POINTS", n) for n in point_arrays] + [("CELLS", n) for n in cell_arrays]
+        names = [name for _assoc, name in self.choices]
+        self._index = names.index(args.field) if args.field in names else 0
+        self._mode = 0
+        self._args = args
+        self._displays = list(displays)
+        self._scrubber = scrubber
+        self.selected: Tuple[str, str] | None = None
+        self.range: Tuple[float, float] | None = None
+        # True while the shown range was built without the background stats.
+        self._provisional = False
+
+        surface_count = len(getattr(args, "source_representations", None) or [])
+        self._series_files = [
+            [path for path in reader_file_names(r) if not is_vtkhdf_file(path)]
+            for r in readers[:surface_count]
+        ]
+        self._files = [path for files in self._series_files for path in files]
+        self._cache = StatsCache(os.path.join(args.output_folder, STATS_CACHE_NAME))
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._stats = self._pool.submit(self._load_stats)
+        if scrubber is not None and scrubber.enabled:
+            scrubber.on_step = self._on_step
+
+    def _load_stats(self) -> Dict[str, Dict]:
+        os.makedirs(self._args.output_folder, exist_ok=True)
+        file_stats = self._cache.file_stats(self._files)
+        self._cache.save()
+        return dict(zip(self._files, file_stats))
+
+    def _colored_displays(self) -> List[object]:
+        if self._scrubber is not None and self._scrubber.enabled:
+            displays = self._scrubber.displays
+        else:
+            displays = self._displays
+        colored = []
+        for display in displays:
+            color_array = list(getattr(display, "ColorArrayName", None) or [])
+            if len(color_array) == 2 and color_array[1]:
+                colored.append(display)
+        return colored
+
+    def _current_files(self) -> List[str]:
+        if self._scrubber is not None and self._scrubber.enabled:
+            return self._scrubber.current_paths()
+        return [files[0] for files in self._series_files if files]
 
+    def cycle_field(self, delta: int) -> None:
+        if self.choices:
+            self._index = (self._index + delta) % len(self.choices)
+            self.apply()
 
-def _install_interactive_shortcuts(render_view) -> None:
-    """Bind basic shortcuts on the interactor (e.g., 'r' => ResetCamera)."""
+    def cycle_mode(self) -> None:
+        self._mode = (self._mode + 1) % len(RANGE_MODES)
+        self.apply()
+
+    def _on_step(self) -> None:
+        if self.selected is not None and (RANGE_MODES[self._mode] == "current" or self._provisional):
+            self.apply()
+
+    def _file_stats(self) -> Tuple[Dict[str, Dict], bool]:
+        """Return the stats known now and whether the background pass is done."""
+        if self._stats.done() and self._stats.exception() is None:
+            return self._stats.result(), True
+        known = {}
+        for path in self._files:
+            stats = self._cache.get(path)
+            if stats is not None:
+                known[path] = stats
+        return known, self._stats.done()
+
+    def _range(self, stats: Dict[str, Dict], assoc: str, name: str, mode: str):
+        files = self._current_files() if mode == "current" else self._files
+        return stats_range([stats.get(path, {}) for path in files], assoc, name, mode)
+
+    def poll(self) -> None:
+        """Re-apply a provisional range once the background stats are in."""
+        if self._provisional and self._stats.done():
+            self.apply()
+
+    def final_range(self) -> Tuple[float, float] | None:
+        """Return the selected range, waiting for the background stats if it was provisional."""
+        if self._provisional and self.selected is not None:
+            print("[FIELD] Waiting for the statistics pass to finish the range...")
+            assoc, name = self.selected
+            try:
+                self.range = self._range(self._stats.result(), assoc, name, RANGE_MODES[self._mode])
+            except Exception as exc:  # noqa: BLE001
+                print(f"[FIELD] Statistics pass failed; keeping the provisional range: {exc}")
+            self._provisional = False
+        return self.range
+
+    def apply(self) -> None:
+        if not self.choices:
+            return
+        assoc, name = self.choices[self._index]
+        mode = RANGE_MODES[self._mode]
+        displays = self._colored_displays()
+        for display in displays:
+            pv.ColorBy(display, (assoc, name))
+        lut = pv.GetColorTransferFunction(name)
+        pwf = pv.GetOpacityTransferFunction(name)
+        apply_colormap_preset(lut, getattr(self._args, "colormap", None))
+
+        stats, complete = self._file_stats()
+        rng = self._range(stats, assoc, name, mode)
+        self._provisional = not complete and mode != "current"
+        if self._provisional:
+            # Widen what is cached so far with the shown timestep, as "current" would.
+            shown = self._range(stats, assoc, name, "current")
+            if shown is not None:
+                rng = shown if rng is None else (min(rng[0], shown[0]), max(rng[1], shown[1]))
+        if rng is not None:
+            try:
+                lut.AutomaticRescaleRangeMode = "Never"
+            except Exception:
+                pass
+            lut.RescaleTransferFunction(*rng)
+            pwf.RescaleTransferFunction(*rng)
+            rng_text = f"{rng[0]:.6g} .. {rng[1]:.6g}"
+        else:
+            for display in displays:
+                display.RescaleTransferFunctionToDataRange(True, False)
+            rng_text = "data range of the shown step (no cached stats for this array)"
+        if self._provisional:
+            rng_text += " (provisional, statistics still loading)"
+        self.selected = (assoc, name)
+        self.range = rng
+        print(f"[FIELD] {name} [{assoc}], range {mode}: {rng_text}")
+        pv.Render()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _install_interactive_shortcuts(
+    render_view,
+    scrubber: _TimestepScrubber | None = None,
+    switcher: _FieldSwitcher | None = None,
+) -> None:
+    """Bind shortcuts on the interactor ('r' => ResetCamera, time, field and range keys)."""
     iren = getattr(render_view, "GetInteractor", lambda: None)()
     if iren is None:
         return
 
+    scrub_keys = {}
+    if scrubber is not None and scrubber.enabled:
+        scrub_keys = {
+            "n": lambda: scrubber.step_by(1),
+            "Right": lambda: scrubber.step_by(1),
+            "b": lambda: scrubber.step_by(-1),
+            "Left": lambda: scrubber.step_by(-1),
+            "Next": lambda: scrubber.jump(1),
+            "Prior": lambda: scrubber.jump(-1),
+            "Home": lambda: scrubber.show(0),
+            "End": lambda: scrubber.show(scrubber.step_count - 1),
+        }
+
+    field_keys = {}
+    if switcher is not None and switcher.choices:
+        field_keys = {
+            "v": lambda: switcher.cycle_field(1),
+            "V": lambda: switcher.cycle_field(-1),
+            "g": switcher.cycle_mode,
+        }
+
+        def _on_timer(_obj, _evt):
+            try:
+                switcher.poll()
+            except Exception as exc:  # noqa: BLE001
+                print(f"[FIELD] Could not update the range: {exc}")
+
+        # Provisional ranges are refined on the UI thread once the stats pass ends.
+        try:
+            iren.AddObserver("TimerEvent", _on_timer)
+            iren.CreateRepeatingTimer(SWITCHER_POLL_MS)
+        except Exception:
+            pass
+
     def _on_keypress(obj, _evt):
         try:
             key = obj.GetKeySym()
@@ -26,6 +347,16 @@ def _install_interactive_shortcuts(render_view) -> None:
                 render_view.StillRender()
             except Exception:
                 pass
+        elif key in scrub_keys:
+            try:
+                scrub_keys[key]()
+            except Exception as exc:  # noqa: BLE001
+                print(f"[SCRUB] Could not change timestep: {exc}")
+        elif key in field_keys:
+            try:
+                field_keys[key]()
+            except Exception as exc:  # noqa: BLE001
+                print(f"[FIELD] Could not switch field or range: {exc}")
 
     try:
         iren.AddObserver("KeyPressEvent", _on_keypress)
@@ -38,20 +369,44 @@ def interactive_camera_setup(
     render_view,
     display,
     colormap: str | None = None,
+    args=None,
+    readers=None,
+    displays=None,
 ) -> Tuple[tuple, tuple, tuple, str | None]:
-    """Enter interactive mode; allow field selection and return final camera."""
+    """Enter interactive mode; allow field selection and return final camera.
+
+    When *args*, *readers* and *displays* are given, file series can be
+    scrubbed through time with cached timesteps while the window is open.
+    """
     print("Entering interactive mode. Adjust camera, then close the window to continue.")
     print(
         "\n"
         "Interactive tips:\n"
         "  • Drag to orbit/pan; scroll to zoom.\n"
         "  • Press 'r' to reset the camera to fit all visible data.\n"
+        "  • Press 'n'/'b' (or Right/Left) for the next/previous timestep,\n"
+        "    PageDown/PageUp to jump, Home/End for the first/last timestep.\n"
+        "  • Press 'v'/'V' to cycle the color field and 'g' to cycle the\n"
+        "    range mode (global, current step, percentile).\n"
         "  • Close the window to continue.\n"
     )
 
-    _install_interactive_shortcuts(render_view)
+    scrubber = None
+    switcher = None
+    if args is not None and readers and displays:
+        cache_mb = int(getattr(args, "scrub_cache_mb", 0) or 0)
+        scrubber = _TimestepScrubber(args, readers, render_view, displays, cache_mb * 2**20)
+        switcher = _FieldSwitcher(args, reader, readers, displays, scrubber)
+
+    _install_interactive_shortcuts(render_view, scrubber, switcher)
     pv.Render()
-    pv.Interact()
+    try:
+        pv.Interact()
+    finally:
+        if scrubber is not None:
+            scrubber.close()
+        if switcher is not None:
+            switcher.close()
 
     camera_position = render_view.CameraPosition
     camera_focal_point = render_view.CameraFocalPoint
@@ -61,7 +416,16 @@ def interactive_camera_setup(
     choices = [("POINTS", n) for n in point_arrays] + [("CELLS", n)
                                                        for n in cell_arrays]
 
-    if choices:
+    selected: str | None = None
+    if switcher is not None and switcher.selected is not None:
+        a, n = switcher.selected
+        apply_coloring(display, a, n, colormap)
+        selected = n
+        print(f"Selected field: {n} [{a}]")
+        final_range = switcher.final_range()
+        if final_range is not None:
+            args.range = "%.9g,%.9g" % final_range
+    elif choices:
         print("Available fields:")
         for i, (a, n) in enumerate(choices):
             print(f"  {i}: {n} [{a}]")
@@ -70,7 +434,6 @@ def interactive_camera_setup(
                 "Enter the number of the field to visualize (or press Enter to "
                 "keep current): "
             ).strip()
-            selected: str | None = None
             if field_choice.isdigit():
                 idx = int(field_choice)
                 if 0 <= idx < len(choices):
@@ -91,8 +454,14 @@ def interactive_camera_setup(
         cam_vals = list(camera_position) + \
             list(camera_focal_point) + list(camera_view_up)
         cam_str = "[" + ",".join(f"{float(v):.9g}" for v in cam_vals) + "]"
-        print("Reusable camera for future runs:")
-        print(f"--camera '{cam_str}'")
+        options = []
+        if selected:
+            options.append(f"--field '{selected}'")
+        if args is not None and getattr(args, "range", None):
+            options.append(f"--range='{args.range}'")
+        options.append(f"--camera '{cam_str}'")
+        print("Reusable options for future runs:")
+        print(" ".join(options))
     except Exception as exc:  # noqa: BLE001
         print(f"Warning: could not format camera for reuse: {exc}")
 
@@ -7,6 +7,33 @@ import sys
 from pathlib import Path
 
 
+def _pop_mpi_ranks(argv):
+    """Remove ``--mpi N`` / ``--mpi=N`` from *argv* and return (ranks, argv)."""
+    ranks = int(os.environ.get("RENDER_VTPS_MPI", "0") or 0)
+    rest = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--mpi":
+            value = next(args, None)
+            if value is None:
+                raise ValueError("--mpi needs the number of MPI ranks")
+            ranks = int(value)
+        elif arg.startswith("--mpi="):
+            ranks = int(arg.split("=", 1)[1])
+        else:
+            rest.append(arg)
+    return ranks, rest
+
+
+def _find_executable(env_var, names):
+    candidates = [os.environ[env_var]] if os.environ.get(env_var) else list(names)
+    for name in candidates:
+        path = shutil.which(name)
+        if path is not None:
+            return path
+    return None
+
+
 def main() -> int:
     """CLI entry point that invokes ParaView's pvpython.
 
@@ -15,16 +42,41 @@ def main() -> int:
       2) 'pvpython' found on PATH
 
     Then runs: pvpython _pv_entry.py <args...>
-    """
-    pvpython = os.environ.get("PVPYTHON") or "pvpython"
-    if shutil.which(pvpython) is None:
-        sys.stderr.write(
-            "Error: pvpython not found. Set the PVPYTHON env var or ensure 'pvpython' is on PATH.\n"
-        )
-        return 127
 
+    With ``--mpi N`` (or $RENDER_VTPS_MPI=N) it instead runs
+    ``mpirun -np N pvbatch _pv_entry.py <args...>`` using $MPIEXEC (or
+    mpiexec/mpirun on PATH) and $PVBATCH (or pvbatch on PATH).
+    """
     entry = Path(__file__).resolve().parent / "_pv_entry.py"
-    cmd = [pvpython, str(entry), *sys.argv[1:]]
+    try:
+        ranks, argv = _pop_mpi_ranks(sys.argv[1:])
+    except ValueError as exc:
+        sys.stderr.write(f"Error: {exc}\n")
+        return 2
+
+    if ranks > 1:
+        mpiexec = _find_executable("MPIEXEC", ("mpiexec", "mpirun"))
+        if mpiexec is None:
+            sys.stderr.write(
+                "Error: mpiexec/mpirun not found. Set the MPIEXEC env var or install an MPI runtime.\n"
+            )
+            return 127
+        pvbatch = _find_executable("PVBATCH", ("pvbatch",))
+        if pvbatch is None:
+            sys.stderr.write(
+                "Error: pvbatch not found. Set the PVBATCH env var or ensure 'pvbatch' is on PATH.\n"
+            )
+            return 127
+        cmd = [mpiexec, "-np", str(ranks), pvbatch, str(entry), *argv]
+    else:
+        pvpython = os.environ.get("PVPYTHON") or "pvpython"
+        if shutil.which(pvpython) is None:
+            sys.stderr.write(
+                "Error: pvpython not found. Set the PVPYTHON env var or ensure 'pvpython' is on PATH.\n"
+            )
+            return 127
+        cmd = [pvpython, str(entry), *argv]
+
     try:
         return subprocess.call(cmd)
     except KeyboardInterrupt:
@@ -0,0 +1,223 @@
+"""Background prefetch of upcoming timesteps for the frame loop.
+
+VTK's XML readers release the GIL while reading and decompressing, so a few
+threads can load the next timesteps while the current frame renders. Loaded
+datasets are handed to ParaView through TrivialProducer proxies that replace
+the file-series readers in the export view.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import paraview.simple as pv
+
+from .repack import read_polydata
+
+
+class TimestepPrefetcher:
+    """Load the datasets of upcoming frames into a bounded look-ahead window.
+
+    *frames* lists, for every frame, the file each series shows at that
+    frame. At most ``depth`` frames ahead of the one requested are kept in
+    memory; files shared by several frames are loaded once. *loader* reads
+    one file (``read_polydata`` unless derived arrays are attached).
+    """
+
+    def __init__(
+        self,
+        frames: Sequence[Sequence[str]],
+        depth: int,
+        workers: Optional[int] = None,
+        loader: Callable[[str], object] = read_polydata,
+    ) -> None:
+        if depth < 1:
+            raise ValueError("Prefetch depth must be at least 1")
+        self._loader = loader
+        self._frames = [tuple(paths) for paths in frames]
+        self._depth = depth
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers or min(depth, 8),
+            thread_name_prefix="render_vtps_prefetch",
+        )
+        self._loads: Dict[str, Future] = {}
+
+    def __enter__(self) -> "TimestepPrefetcher":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def get(self, index: int) -> List[object]:
+        """Return the datasets of frame *index*, scheduling the frames after it."""
+        wanted: Dict[str, None] = {}
+        for frame in self._frames[index:index + self._depth + 1]:
+            for path in frame:
+                wanted.setdefault(path)
+        for path in list(self._loads):
+            if path not in wanted:
+                self._loads.pop(path).cancel()
+        for path in wanted:
+            if path not in self._loads:
+                self._loads[path] = self._pool.submit(self._loader, path)
+        return [self._loads[path].result() for path in self._frames[index]]
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._loads.clear()
+
+
+class LRUTimestepCache:
+    """Thread-safe LRU cache of loaded timesteps bounded by memory.
+
+    ``prefetch`` schedules background loads whose results land in the cache;
+    ``get`` returns a cached dataset or waits for (or performs) the load.
+    """
+
+    def __init__(self, max_bytes: int, workers: int = 2) -> None:
+        self._max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[str, Tuple[object, int]]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="render_vtps_cache",
+        )
+
+    def __enter__(self) -> "LRUTimestepCache":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    @property
+    def nbytes(self) -> int:
+        return self._total
+
+    def get(self, path: str) -> object:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+                return entry[0]
+            pending = self._pending.get(path)
+        if pending is not None:
+            return pending.result()
+        return self._load(path)
+
+    def prefetch(self, paths: Sequence[str]) -> None:
+        with self._lock:
+            for path in paths:
+                if path not in self._entries and path not in self._pending:
+                    self._pending[path] = self._pool.submit(self._load, path)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._total = 0
+
+    def _load(self, path: str) -> object:
+        try:
+            data = read_polydata(path)
+        except Exception:
+            with self._lock:
+                self._pending.pop(path, None)
+            raise
+        nbytes = int(data.GetActualMemorySize()) * 1024
+        with self._lock:
+            self._pending.pop(path, None)
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._total -= previous[1]
+            self._entries[path] = (data, nbytes)
+            self._total += nbytes
+            # Always keep the newest entry, even if it alone exceeds the cap.
+            while self._total > self._max_bytes and len(self._entries) > 1:
+                _old_path, (_old_data, old_bytes) = self._entries.popitem(last=False)
+                self._total -= old_bytes
+        return data
+
+
+def series_file_index(reader_times: Sequence[float], file_count: int, data_time: float) -> int:
+    """Return the file a file-series reader shows at *data_time*."""
+    if file_count <= 1:
+        return 0
+    if len(reader_times) != file_count:
+        return min(max(int(round(data_time)), 0), file_count - 1)
+    index = bisect.bisect_right(list(reader_times), float(data_time) + 1e-12) - 1
+    return min(max(index, 0), file_count - 1)
+
+
+def reader_timestep_values(reader: object) -> List[float]:
+    """Return the time values a reader proxy reports, as a list of floats."""
+    values = getattr(reader, "TimestepValues", None)
+    if values is None:
+        return []
+    if isinstance(values, (int, float)):
+        return [float(values)]
+    return [float(v) for v in values]
+
+
+def create_producers(
+    series: Sequence[Tuple[int, List[str]]],
+    loader: Callable[[str], object] = read_polydata,
+) -> Dict[int, object]:
+    """Create one TrivialProducer per (reader index, file list), loaded with step 0."""
+    producers: Dict[int, object] = {}
+    for index, file_list in series:
+        producer = pv.TrivialProducer(registrationName=f"Prefetched_{index + 1:02d}")
+        set_producer_data(producer, loader(file_list[0]))
+        producers[index] = producer
+    return producers
+
+
+def set_producer_data(producer: object, data: object) -> None:
+    """Swap the dataset shown by *producer* and mark its displays dirty."""
+    producer.GetClientSideObject().SetOutput(data)
+    producer.SMProxy.MarkModified(producer.SMProxy)
+    producer.UpdatePipeline()
+
+
+class PrefetchFeeder:
+    """Frame-loop hook that feeds prefetched datasets into the producers."""
+
+    def __init__(
+        self,
+        producers: Dict[int, object],
+        series: Sequence[Tuple[int, List[str], List[float]]],
+        data_times: Sequence[float],
+        depth: int,
+        loader: Callable[[str], object] = read_polydata,
+    ) -> None:
+        self._producers = [producers[index] for index, _files, _times in series]
+        frames = [
+            tuple(
+                files[series_file_index(times, len(files), t)]
+                for _index, files, times in series
+            )
+            for t in data_times
+        ]
+        self._current: List[Optional[str]] = [None] * len(self._producers)
+        self._frames = frames
+        self._prefetcher = TimestepPrefetcher(frames, depth, loader=loader)
+
+    def __enter__(self) -> "PrefetchFeeder":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self._prefetcher.close()
+
+    def __call__(self, index: int, _data_time: float) -> None:
+        datasets = self._prefetcher.get(index)
+        for slot, (producer, path, data) in enumerate(
+            zip(self._producers, self._frames[index], datasets)
+        ):
+            if self._current[slot] != path:
+                set_producer_data(producer, data)
+                self._current[slot] = path
@@ -0,0 +1,93 @@
+"""Fast low-resolution preview renders built on generate_animation."""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from typing import Callable, List, Optional, Sequence
+
+import paraview.simple as pv
+
+from .encoder import OutputFormat
+from .frames import encode_png_sequence, render_frames, write_contact_sheet
+from .utils import parse_render_size
+
+PREVIEW_WIDTH = 480
+PREVIEW_BITRATE = "400k"
+PREVIEW_LODS = ("none", "outline", "decimate")
+
+
+def preview_render_size(render_size: str, width: int = PREVIEW_WIDTH) -> str:
+    """Scale *render_size* down to *width* pixels, keeping the aspect ratio.
+
+    Both dimensions are rounded to even numbers so yuv420p encoders accept them.
+    """
+    full_w, full_h = parse_render_size(render_size)
+    if full_w <= width:
+        return f"{full_w}x{full_h}"
+    height = max(2, int(round(full_h * width / float(full_w))))
+    return f"{width - width % 2}x{height - height % 2}"
+
+
+def apply_preview_settings(args) -> None:
+    """Rewrite *args* in place for a preview run of the same scene."""
+    args.render_size = preview_render_size(args.render_size)
+    args.animation_filename = f"{args.animation_filename}_preview"
+    if getattr(args, "preview_lod", "none") == "outline":
+        args.source_representations = ["Outline"] * len(args.source_representations)
+    print(
+        f"[PREVIEW] {args.render_size}, up to {args.preview_frames} frames, "
+        f"level of detail: {getattr(args, 'preview_lod', 'none')}."
+    )
+
+
+def decimate_source(source: object) -> object:
+    """Return a reduced-triangle version of *source* for preview rendering."""
+    return pv.Decimate(
+        Input=pv.Triangulate(Input=source),
+        TargetReduction=0.9,
+        PreserveTopology=0,
+    )
+
+
+def write_preview(
+    export_view: object,
+    image_size: List[int],
+    data_times: Sequence[float],
+    fps: int,
+    out_base: str,
+    formats: Sequence[OutputFormat],
+    prepare_frame: Optional[Callable[[int, float], None]] = None,
+) -> None:
+    """Render *data_times* once and write a contact sheet plus low-bitrate movies."""
+    output_folder = os.path.dirname(out_base) or "."
+    with tempfile.TemporaryDirectory(
+        prefix=f".{os.path.basename(out_base)}_frames_",
+        dir=output_folder,
+    ) as frame_dir:
+        frame_paths = render_frames(
+            export_view,
+            image_size,
+            data_times,
+            frame_dir,
+            prepare_frame=prepare_frame,
+        )
+
+        sheet_path = write_contact_sheet(
+            frame_paths,
+            f"{out_base}_contact.png",
+            thumb_width=min(image_size[0], 240),
+        )
+        print(f"[PREVIEW] Wrote contact sheet: {sheet_path}")
+
+        ffmpeg_path = shutil.which("ffmpeg")
+        if ffmpeg_path is None:
+            print("[PREVIEW] ffmpeg not found; skipping the preview movie.")
+            return
+        outputs = [
+            (f.with_options(bitrate=PREVIEW_BITRATE, crf=None, quality=None), f.path(out_base))
+            for f in formats
+        ]
+        encode_png_sequence(ffmpeg_path, frame_dir, fps, outputs)
+        for _format, movie_path in outputs:
+            print(f"[PREVIEW] Wrote preview movie: {movie_path}")
@@ -0,0 +1,199 @@
+"""Machine-readable progress reports (NDJSON) for batch schedulers."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, IO, Optional, Sequence
+
+PROGRESS_FORMATS = ("json",)
+
+# Minimum seconds between two reports of the same phase (first and last are always written).
+REPORT_INTERVAL = 1.0
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Return the peak resident set size of this process in MiB, if known."""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+class ProgressReporter:
+    """Write one JSON object per line describing the current phase.
+
+    Each record holds the phase, items done/total (frames while rendering,
+    files while scanning), items per second, input MB/s, the ETA in
+    seconds and the peak RSS. Safe to call from worker threads.
+    """
+
+    def __init__(self, stream: IO[str], name: str = "", interval: float = REPORT_INTERVAL) -> None:
+        self._stream = stream
+        self._name = name
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._phase = ""
+        self._unit = ""
+        self._total: Optional[int] = None
+        self._done = 0
+        self._bytes = 0
+        self._started = 0.0
+        self._last_report = 0.0
+
+    def _emit(self, event: str) -> None:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        rate = self._done / elapsed
+        remaining = (
+            (self._total - self._done) / rate
+            if self._total is not None and rate > 0.0 else None
+        )
+        rss = peak_rss_mb()
+        record: Dict[str, object] = {
+            "event": event,
+            "name": self._name,
+            "phase": self._phase,
+            "unit": self._unit,
+            "done": self._done,
+            "total": self._total,
+            "per_second": round(rate, 3),
+            "input_mb_per_second": round(self._bytes / elapsed / 1e6, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "eta_seconds": round(remaining, 1) if remaining is not None else None,
+            "peak_rss_mb": round(rss, 1) if rss is not None else None,
+            "time": round(time.time(), 3),
+        }
+        self._stream.write(json.dumps(record) + "\n")
+        self._stream.flush()
+        self._last_report = time.monotonic()
+
+    def start(self, phase: str, total: Optional[int] = None, unit: str = "frames") -> None:
+        """Begin *phase* with *total* items of *unit*."""
+        with self._lock:
+            self._phase = phase
+            self._unit = unit
+            self._total = total
+            self._done = 0
+            self._bytes = 0
+            self._started = time.monotonic()
+            self._emit("start")
+
+    def advance(self, count: int = 1, nbytes: int = 0) -> None:
+        """Record *count* more items done and *nbytes* of input read."""
+        self.update(None, nbytes, count)
+
+    def update(self, done: Optional[int], nbytes: int = 0, count: int = 0) -> None:
+        """Set the items done (or add *count*) and add *nbytes* of input read."""
+        with self._lock:
+            self._done = done if done is not None else self._done + count
+            self._bytes += nbytes
+            if time.monotonic() - self._last_report >= self._interval:
+                self._emit("progress")
+
+    def finish(self) -> None:
+        """End the current phase, counting every item as done."""
+        with self._lock:
+            if self._total is not None:
+                self._done = self._total
+            self._emit("end")
+
+
+def open_progress(
+    progress: Optional[str],
+    progress_file: Optional[str] = None,
+    name: str = "",
+) -> Optional[ProgressReporter]:
+    """Return the reporter for ``--progress`` (stderr or *progress_file*), or None.
+
+    The file is opened for appending, so several runs can share it; the
+    ``name`` field tells their records apart.
+    """
+    if not progress:
+        return None
+    if progress not in PROGRESS_FORMATS:
+        raise ValueError(f"--progress must be one of: {', '.join(PROGRESS_FORMATS)}.")
+    if progress_file:
+        directory = os.path.dirname(os.path.abspath(progress_file))
+        os.makedirs(directory, exist_ok=True)
+        stream = open(progress_file, "a", encoding="utf-8", buffering=1)
+    else:
+        stream = sys.stderr
+    return ProgressReporter(stream, name=name)
+
+
+class ProgressHook:
+    """Frame-loop hook that reports rendered frames and the input they load.
+
+    *frame_files* lists the files shown at each frame; a file counts
+    towards the input rate the first time a frame shows it. Chains to an
+    optional *inner* hook like the other frame hooks.
+    """
+
+    def __init__(
+        self,
+        reporter: ProgressReporter,
+        frame_files: Sequence[Sequence[str]],
+        inner: Optional[Callable[[int, float], None]] = None,
+    ) -> None:
+        self._reporter = reporter
+        self._frame_files = [tuple(paths) for paths in frame_files]
+        self._inner = inner
+        self._seen: set = set()
+        self._ticks = 0
+
+    def _new_bytes(self, index: int) -> int:
+        if index >= len(self._frame_files):
+            return 0
+        nbytes = 0
+        for path in self._frame_files[index]:
+            if path not in self._seen:
+                self._seen.add(path)
+                try:
+                    nbytes += os.path.getsize(path)
+                except OSError:
+                    pass
+        return nbytes
+
+    def __call__(self, index: int, data_time: float) -> None:
+        # Frames before *index* are done once the loop reaches it.
+        self._reporter.update(index, self._new_bytes(index))
+        if self._inner is not None:
+            self._inner(index, data_time)
+
+    def tick(self) -> None:
+        """Count one frame for loops without a frame hook (SaveAnimation cues)."""
+        self(self._ticks, 0.0)
+        self._ticks += 1
+
+
+_ACTIVE_HOOK: Optional[ProgressHook] = None
+
+
+def set_active_hook(hook: Optional[ProgressHook]) -> None:
+    """Register the hook ticked by ``tick_active`` from a ParaView animation cue."""
+    global _ACTIVE_HOOK
+    _ACTIVE_HOOK = hook
+
+
+def tick_active() -> None:
+    if _ACTIVE_HOOK is not None:
+        _ACTIVE_HOOK.tick()
+
+
+# Python animation cue script that reports each frame SaveAnimation writes.
+PROGRESS_CUE_SCRIPT = """
+def start_cue(cue):
+    pass
+
+def tick(cue):
+    from render_vtps.progress import tick_active
+    tick_active()
+
+def end_cue(cue):
+    pass
+"""
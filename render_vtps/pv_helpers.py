@@ -3,7 +3,7 @@
 from __future__ import annotations
 # from contextlib import contextmanager
 
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 try:
     import paraview.simple as pv
@@ -17,10 +17,157 @@ except Exception as exc:
     raise RuntimeError("This module must be run under pvpython with ParaView available.") from exc
 
 
-def initialize_session() -> None:
-    """Start a fresh pv session to avoid stale state across runs."""
+def mpi_process_count() -> int:
+    """Return the number of MPI ranks running the pipeline (1 outside pvbatch/MPI)."""
+    try:
+        pm = pv.servermanager.vtkProcessModule.GetProcessModule()
+        return max(1, int(pm.GetNumberOfLocalPartitions()))
+    except Exception:
+        return 1
+
+
+DEFAULT_SERVER_PORT = 11111
+
+
+def parse_server(spec: str | None) -> Optional[Tuple[str, int]]:
+    """Parse ``--server host[:port]``; return None when *spec* is empty."""
+    if not spec or not spec.strip():
+        return None
+    host, sep, port = spec.strip().rpartition(":")
+    if not sep:
+        host, port = port, str(DEFAULT_SERVER_PORT)
+    try:
+        number = int(port)
+    except ValueError:
+        number = 0
+    if not host or not 0 < number < 65536:
+        raise ValueError(f"Invalid --server '{spec}'; use HOST:PORT, e.g. localhost:11111.")
+    return host, number
+
+
+def remote_session() -> bool:
+    """Return True when the pipeline runs on a separate pvserver."""
+    try:
+        connection = pv.servermanager.ActiveConnection
+        return bool(connection is not None and connection.IsRemote())
+    except Exception:
+        return False
+
+
+def data_on_client() -> bool:
+    """Return True when this process holds the datasets (serial, builtin session).
+
+    Under MPI or with ``--server`` the data stays with the server ranks and
+    only data information and rendered images reach this process.
+    """
+    return mpi_process_count() <= 1 and not remote_session()
+
+
+def initialize_session(server: Tuple[str, int] | None = None) -> None:
+    """Start a fresh pv session to avoid stale state across runs.
+
+    Under MPI the satellite ranks are bound to the existing session, so it
+    is kept as is. With *server* (host, port) the session attaches to a
+    running pvserver instead of the builtin one.
+    """
+    if mpi_process_count() > 1:
+        return
     pv.Disconnect()
-    pv.Connect()
+    if server is None:
+        pv.Connect()
+        return
+    host, port = server
+    if pv.Connect(host, port) is None or not remote_session():
+        raise RuntimeError(f"Could not connect to pvserver at {host}:{port}.")
+    try:
+        ranks = int(pv.servermanager.ActiveConnection.GetNumberOfDataPartitions())
+    except Exception:
+        ranks = 1
+    print(f"[SERVER] Connected to {host}:{port} ({ranks} rank(s)).")
+
+
+def redistribute_source(source, name: str | None = None):
+    """Return *source* load-balanced across MPI ranks (unchanged when serial).
+
+    Cells are assigned to exactly one rank, which is all surface rendering
+    needs; image compositing across ranks is done by ParaView at render time.
+    """
+    if mpi_process_count() <= 1:
+        return source
+    try:
+        distributed = pv.RedistributeDataSet(registrationName=name, Input=source)
+    except AttributeError:
+        # ParaView < 5.10 has no RedistributeDataSet; render the reader's pieces.
+        return source
+    distributed.BoundaryMode = "Assign cells uniquely"
+    return distributed
+
+
+def scalar_arrays(source) -> Tuple[List[str], List[str]]:
+    """Return (point, cell) names of single-component arrays from data information."""
+    source.UpdatePipeline()
+    info = source.GetDataInformation()
+
+    def _names(attr_info) -> List[str]:
+        names: List[str] = []
+        for i in range(attr_info.GetNumberOfArrays()):
+            ai = attr_info.GetArrayInformation(i)
+            if ai is not None and ai.GetNumberOfComponents() == 1:
+                names.append(ai.GetName())
+        return names
+
+    return _names(info.GetPointDataInformation()), _names(info.GetCellDataInformation())
+
+
+def data_range(source, assoc: str, name: str, time: float | None = None) -> Tuple[float, float] | None:
+    """Return the range of (assoc, name) on *source*, reduced over all MPI ranks.
+
+    Data information is gathered by ParaView from every rank, so this never
+    moves the dataset itself to the client.
+    """
+    if time is not None:
+        pv.UpdatePipeline(time=float(time), proxy=source)
+    info = source.GetDataInformation()
+    attr_info = info.GetPointDataInformation() if assoc == "POINTS" else info.GetCellDataInformation()
+    array_info = attr_info.GetArrayInformation(name)
+    if array_info is None:
+        return None
+    low, high = array_info.GetComponentRange(0)
+    if not low <= high:
+        return None
+    return float(low), float(high)
+
+
+def field_stats(source, assoc: str, name: str, time: float | None = None) -> Dict[str, float] | None:
+    """Return min/max/integral/area of (assoc, name) computed where the data lives.
+
+    The range comes from data information and the area integral from an
+    ``IntegrateVariables`` filter, so only these scalars reach the client.
+    """
+    rng = data_range(source, assoc, name, time=time)
+    if rng is None:
+        return None
+    integrate = pv.IntegrateVariables(Input=source)
+    try:
+        integrate.DivideCellDataByVolume = 0
+        if time is not None:
+            pv.UpdatePipeline(time=float(time), proxy=integrate)
+        else:
+            integrate.UpdatePipeline()
+        info = integrate.GetDataInformation()
+        attr_info = info.GetPointDataInformation() if assoc == "POINTS" else info.GetCellDataInformation()
+        integral_info = attr_info.GetArrayInformation(name)
+        area_info = info.GetCellDataInformation().GetArrayInformation("Area")
+        integral = integral_info.GetComponentRange(0)[0] if integral_info is not None else float("nan")
+        area = area_info.GetComponentRange(0)[0] if area_info is not None else float("nan")
+    finally:
+        pv.Delete(integrate)
+    return {
+        "min": rng[0],
+        "max": rng[1],
+        "integral": float(integral),
+        "area": float(area),
+    }
 
 
 def discover_arrays(reader) -> Tuple[List[str], List[str]]:
@@ -58,6 +205,16 @@ def discover_arrays(reader) -> Tuple[List[str], List[str]]:
     return _names(pdi), _names(cdi)
 
 
+def reader_file_names(reader) -> List[str]:
+    """Return the files behind a reader proxy as a list (empty if none)."""
+    file_names = getattr(reader, "FileNames", None)
+    if not file_names:
+        return []
+    if isinstance(file_names, str):
+        return [file_names]
+    return list(file_names)
+
+
 def apply_colormap_preset(lut, preset: str | None) -> None:
     """Apply a ParaView color transfer function preset, if requested."""
     if not preset:
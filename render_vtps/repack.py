@@ -0,0 +1,375 @@
+"""Rewrite VTP time series as compressed appended-binary files."""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from vtkmodules.vtkIOLegacy import vtkPolyDataReader
+    from vtkmodules.vtkIOXML import vtkXMLPolyDataReader, vtkXMLPolyDataWriter
+except Exception as exc:
+    raise RuntimeError("This module must be run under pvpython with ParaView available.") from exc
+
+from .discovery import find_vtp_files
+
+COMPRESSORS: Dict[str, Optional[str]] = {
+    "zlib": "vtkZLibDataCompressor",
+    "lz4": "vtkLZ4DataCompressor",
+    "lzma": "vtkLZMADataCompressor",
+    "none": None,
+}
+
+# Compression levels accepted by the VTK compressors.
+COMPRESSION_LEVELS = range(1, 10)
+
+# Largest XML header we scan when checking whether a file is already repacked.
+_HEADER_SCAN_BYTES = 1 << 20
+
+_COMPRESSOR_RE = re.compile(r'compressor="([^"]*)"')
+
+# Per output root: the settings each file was repacked with, and its size and mtime.
+REPACK_MANIFEST = ".render_vtps_repack.json"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="render_vtps repack",
+        description="Rewrite VTP time series as appended raw-binary VTP files.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--path",
+        "--time-dirs-path",
+        "--time_dirs_path",
+        dest="time_dirs_path",
+        type=str,
+        action="append",
+        help="Directory containing time-step folders. Repeat to repack several sources.",
+    )
+    parser.add_argument(
+        "--vtp",
+        "--vtp-filename",
+        "--vtp_filename",
+        dest="vtp_filename",
+        type=str,
+        action="append",
+        help="Only repack files with this basename. Repeat to select several. Defaults to all.",
+    )
+    parser.add_argument(
+        "--output",
+        "--output-folder",
+        "--output_folder",
+        dest="output_folder",
+        type=str,
+        default=None,
+        help="Folder receiving the repacked series, mirroring the input layout.",
+    )
+    parser.add_argument(
+        "--in-place",
+        "--in_place",
+        dest="in_place",
+        action="store_true",
+        default=False,
+        help="Replace the input files instead of writing to --output.",
+    )
+    parser.add_argument(
+        "--compressor",
+        type=str.lower,
+        choices=sorted(COMPRESSORS),
+        default="zlib",
+        help="Compressor used for the appended data blocks.",
+    )
+    parser.add_argument(
+        "--block-size",
+        "--block_size",
+        dest="block_size",
+        type=int,
+        default=32768,
+        help="Uncompressed block size in bytes.",
+    )
+    parser.add_argument(
+        "--level",
+        type=int,
+        choices=COMPRESSION_LEVELS,
+        metavar="{1-9}",
+        default=None,
+        help="Compression level (1-9). Defaults to the compressor default.",
+    )
+    parser.add_argument(
+        "--arrays",
+        type=str,
+        default=None,
+        help="Comma-separated POINTS/CELLS arrays to keep. Defaults to all arrays.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes. Defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        default=False,
+        help="Repack files even if they are already up to date.",
+    )
+    return parser
+
+
+def _is_repacked(path: str, compressor: str) -> bool:
+    """Return True if *path* is an appended raw-binary VTP using *compressor*."""
+    try:
+        with open(path, "rb") as handle:
+            head = handle.read(_HEADER_SCAN_BYTES)
+    except OSError:
+        return False
+    end = head.find(b"<AppendedData")
+    if end < 0:
+        return False
+    header = head[:end].decode("utf-8", errors="replace")
+    if 'format="ascii"' in header or 'format="binary"' in header:
+        return False
+    if 'encoding="raw"' not in head[end:end + 256].decode("utf-8", errors="replace"):
+        return False
+    match = _COMPRESSOR_RE.search(header)
+    current = match.group(1) if match else None
+    return current == COMPRESSORS[compressor]
+
+
+def _settings(options: Dict) -> Dict:
+    return {
+        "compressor": options["compressor"],
+        "block_size": options["block_size"],
+        "level": options["level"],
+        "arrays": sorted(options["arrays"]),
+    }
+
+
+def _file_entry(path: str, options: Dict) -> Dict:
+    st = os.stat(path)
+    return {"settings": _settings(options), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _load_manifest(root: str) -> Dict[str, Dict]:
+    path = os.path.join(root, REPACK_MANIFEST)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(root: str, manifest: Dict[str, Dict]) -> None:
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, REPACK_MANIFEST)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _up_to_date(src: str, dst: str, options: Dict, recorded: Optional[Dict]) -> bool:
+    """Return True if *dst* was repacked from *src* with the current settings.
+
+    The manifest entry must name the same compressor, block size, level
+    and array selection, and *dst* must not have changed since.
+    """
+    if recorded is None or recorded.get("settings") != _settings(options):
+        return False
+    try:
+        st = os.stat(dst)
+    except OSError:
+        return False
+    if (st.st_size, st.st_mtime_ns) != (recorded.get("size"), recorded.get("mtime_ns")):
+        return False
+    if not _is_repacked(dst, options["compressor"]):
+        return False
+    return dst == src or st.st_mtime >= os.path.getmtime(src)
+
+
+def read_polydata(path: str):
+    """Read a .vtp or legacy .vtk file into a vtkPolyData."""
+    if path.lower().endswith(".vtk"):
+        reader = vtkPolyDataReader()
+        reader.ReadAllScalarsOn()
+        reader.ReadAllVectorsOn()
+        reader.ReadAllNormalsOn()
+        reader.ReadAllTensorsOn()
+        reader.ReadAllFieldsOn()
+    else:
+        reader = vtkXMLPolyDataReader()
+    reader.SetFileName(path)
+    reader.Update()
+    data = reader.GetOutput()
+    if data is None:
+        raise ValueError(f"Could not read polygonal data from '{path}'.")
+    return data
+
+
+def _keep_arrays(data, keep: Sequence[str]) -> None:
+    for attributes in (data.GetPointData(), data.GetCellData()):
+        names = [
+            attributes.GetArrayName(i)
+            for i in range(attributes.GetNumberOfArrays())
+        ]
+        for name in names:
+            if name not in keep:
+                attributes.RemoveArray(name)
+
+
+def _repack_file(job: Tuple[str, str, Dict, Optional[Dict]]) -> Tuple[str, str, Dict]:
+    src, dst, options, recorded = job
+    compressor = options["compressor"]
+    if not options["force"] and _up_to_date(src, dst, options, recorded):
+        return dst, "skipped", recorded
+
+    data = read_polydata(src)
+    if options["arrays"]:
+        _keep_arrays(data, options["arrays"])
+
+    writer = vtkXMLPolyDataWriter()
+    writer.SetInputData(data)
+    writer.SetDataModeToAppended()
+    writer.EncodeAppendedDataOff()
+    writer.SetBlockSize(options["block_size"])
+    if compressor == "zlib":
+        writer.SetCompressorTypeToZLib()
+    elif compressor == "lz4":
+        writer.SetCompressorTypeToLZ4()
+    elif compressor == "lzma":
+        writer.SetCompressorTypeToLZMA()
+    else:
+        writer.SetCompressorTypeToNone()
+    if options["level"] is not None:
+        writer.SetCompressionLevel(options["level"])
+
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp_path = f"{dst}.tmp"
+    writer.SetFileName(tmp_path)
+    if writer.Write() != 1:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise RuntimeError(f"Failed to write repacked file for '{src}'.")
+    os.replace(tmp_path, dst)
+    if options["in_place"] and dst != src:
+        # Legacy .vtk inputs are replaced by a .vtp next to them.
+        os.remove(src)
+    return dst, "repacked", _file_entry(dst, options)
+
+
+def _repack_jobs(
+    time_paths: Sequence[str],
+    vtp_names: Sequence[str],
+    output_folder: Optional[str],
+) -> List[Tuple[str, str, str]]:
+    """Return (source, destination, output root) for every file to repack."""
+    jobs: List[Tuple[str, str, str]] = []
+    for index, path in enumerate(time_paths):
+        _time_dirs, vtp_files = find_vtp_files(path)
+        if vtp_names:
+            vtp_files = [f for f in vtp_files if os.path.basename(f) in vtp_names]
+        if not vtp_files:
+            print(f"[REPACK] No matching VTP files under '{path}'. Skipping.")
+            continue
+        if output_folder is None:
+            root = path
+        elif len(time_paths) > 1:
+            root = os.path.join(output_folder, f"source_{index + 1:02d}")
+        else:
+            root = output_folder
+        for src in vtp_files:
+            rel = os.path.relpath(src, path)
+            dst = os.path.join(root, os.path.splitext(rel)[0] + ".vtp")
+            jobs.append((src, dst, root))
+    return jobs
+
+
+def repack_series(
+    time_paths: Sequence[str],
+    vtp_names: Sequence[str] = (),
+    output_folder: Optional[str] = None,
+    compressor: str = "zlib",
+    block_size: int = 32768,
+    level: Optional[int] = None,
+    arrays: Sequence[str] = (),
+    jobs: Optional[int] = None,
+    force: bool = False,
+) -> List[str]:
+    """Repack every discovered VTP under *time_paths* and return the output paths.
+
+    Files are written to *output_folder* with the same time-directory layout,
+    or replaced in place when *output_folder* is None.
+    """
+    if compressor not in COMPRESSORS:
+        raise ValueError(f"Unknown compressor '{compressor}'. Choose from {sorted(COMPRESSORS)}.")
+    if block_size <= 0:
+        raise ValueError("--block-size must be greater than 0")
+    if level is not None and level not in COMPRESSION_LEVELS:
+        raise ValueError("--level must be between 1 and 9")
+
+    options = {
+        "compressor": compressor,
+        "block_size": block_size,
+        "level": level,
+        "arrays": list(arrays),
+        "force": force,
+        "in_place": output_folder is None,
+    }
+    targets = _repack_jobs(time_paths, vtp_names, output_folder)
+    manifests = {root: _load_manifest(root) for root in dict.fromkeys(r for _s, _d, r in targets)}
+    work = [
+        (src, dst, options, manifests[root].get(os.path.relpath(dst, root)))
+        for src, dst, root in targets
+    ]
+
+    outputs: List[str] = []
+    counts = {"repacked": 0, "skipped": 0}
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_repack_file, job) for job in work]
+            # Every finished file is recorded, even when another one fails.
+            for (_src, _dst, root), future in zip(targets, futures):
+                if future.exception() is not None:
+                    continue
+                dst, status, entry = future.result()
+                outputs.append(dst)
+                counts[status] += 1
+                manifests[root][os.path.relpath(dst, root)] = entry
+            for future in futures:
+                future.result()
+    finally:
+        # Files finished before a failure are not repacked again on the next run.
+        for root, manifest in manifests.items():
+            _save_manifest(root, manifest)
+
+    print(
+        f"[REPACK] {counts['repacked']} repacked, {counts['skipped']} already up to date "
+        f"({compressor}, block size {block_size})."
+    )
+    return outputs
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.in_place == (args.output_folder is not None):
+        raise ValueError("repack requires exactly one of --output or --in-place")
+    if args.jobs is not None and args.jobs <= 0:
+        raise ValueError("--jobs must be greater than 0")
+
+    arrays = [a.strip() for a in (args.arrays or "").split(",") if a.strip()]
+    repack_series(
+        args.time_dirs_path or ["."],
+        vtp_names=args.vtp_filename or [],
+        output_folder=args.output_folder,
+        compressor=args.compressor,
+        block_size=args.block_size,
+        level=args.level,
+        arrays=arrays,
+        jobs=args.jobs,
+        force=args.force,
+    )
@@ -0,0 +1,244 @@
+"""Region of interest: keep only the cells inside a box or the camera view."""
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from vtkmodules.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray, vtk_to_numpy
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData
+
+from .repack import read_polydata
+from .stats import STATS_CACHE_NAME
+
+ROI_CACHE_DIR = ".render_vtps_roi"
+
+# Planes of --roi-from-camera are pushed out by this fraction of the dataset
+# diagonal, so cells straddling the edge of the view are kept.
+CAMERA_PADDING = 0.02
+
+Plane = Tuple[float, float, float, float]
+
+
+class RegionOfInterest:
+    """Cells with at least one point on the inner side of every plane.
+
+    A plane (a, b, c, d) keeps the points where ``a*x + b*y + c*z + d >= 0``.
+    ``bounds`` is set for boxes, ``padding`` widens the region by a fraction
+    of the dataset diagonal.
+    """
+
+    def __init__(
+        self,
+        planes: Sequence[Plane],
+        label: str,
+        bounds: Optional[Tuple[float, ...]] = None,
+        padding: float = 0.0,
+    ) -> None:
+        self.planes = [tuple(float(v) for v in plane) for plane in planes]
+        self.label = label
+        self.bounds = bounds
+        self.padding = padding
+
+    @property
+    def key(self) -> str:
+        """Short digest identifying the region in cache names."""
+        text = repr((self.planes, self.padding))
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+    def point_mask(self, points: np.ndarray, diagonal: float = 0.0) -> np.ndarray:
+        """Return which of the (N, 3) *points* lie inside the region."""
+        inside = np.ones(len(points), dtype=bool)
+        margin = self.padding * diagonal
+        for a, b, c, d in self.planes:
+            inside &= points @ np.array([a, b, c]) + (d + margin) >= 0.0
+        return inside
+
+    def cell_ids(self, data) -> np.ndarray:
+        """Return the ids of the cells of *data* (vtkPolyData) touching the region."""
+        if data.GetNumberOfPoints() == 0:
+            return np.zeros(0, dtype=np.int64)
+        points = vtk_to_numpy(data.GetPoints().GetData()).astype(np.float64, copy=False)
+        x0, x1, y0, y1, z0, z1 = data.GetBounds()
+        diagonal = float(np.sqrt((x1 - x0) ** 2 + (y1 - y0) ** 2 + (z1 - z0) ** 2))
+        inside = self.point_mask(points, diagonal)
+        keep: List[np.ndarray] = []
+        # vtkPolyData numbers verts, then lines, polys and strips.
+        for cells in (data.GetVerts(), data.GetLines(), data.GetPolys(), data.GetStrips()):
+            if cells is None or cells.GetNumberOfCells() == 0:
+                continue
+            offsets = vtk_to_numpy(cells.GetOffsetsArray()).astype(np.int64, copy=False)
+            connectivity = vtk_to_numpy(cells.GetConnectivityArray())
+            hits = np.concatenate(([0], np.cumsum(inside[connectivity], dtype=np.int64)))
+            keep.append(hits[offsets[1:]] > hits[offsets[:-1]])
+        if not keep:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(np.concatenate(keep)).astype(np.int64)
+
+
+def parse_roi(spec: Optional[str]) -> Optional[RegionOfInterest]:
+    """Parse ``--roi box:x0,x1,y0,y1,z0,z1``; return None when *spec* is empty."""
+    if not spec or not spec.strip():
+        return None
+    kind, _, rest = spec.strip().partition(":")
+    if kind.strip().lower() != "box":
+        raise ValueError(f"Unknown --roi '{spec}'; use box:x0,x1,y0,y1,z0,z1.")
+    try:
+        bounds = tuple(float(v) for v in rest.split(","))
+    except ValueError:
+        bounds = ()
+    if len(bounds) != 6:
+        raise ValueError(f"Invalid --roi '{spec}'; use box:x0,x1,y0,y1,z0,z1 (6 numbers).")
+    x0, x1, y0, y1, z0, z1 = bounds
+    if x1 < x0 or y1 < y0 or z1 < z0:
+        raise ValueError(f"Invalid --roi '{spec}'; each maximum must be at least its minimum.")
+    planes = [
+        (1.0, 0.0, 0.0, -x0), (-1.0, 0.0, 0.0, x1),
+        (0.0, 1.0, 0.0, -y0), (0.0, -1.0, 0.0, y1),
+        (0.0, 0.0, 1.0, -z0), (0.0, 0.0, -1.0, z1),
+    ]
+    return RegionOfInterest(planes, f"box {','.join(f'{v:g}' for v in bounds)}", bounds=bounds)
+
+
+def camera_roi(camera, aspect: float) -> RegionOfInterest:
+    """Return the region seen by the vtkCamera *camera* at image *aspect* (width / height).
+
+    Only the four side planes of the view frustum are used, so nothing is
+    lost to the near and far clipping planes.
+    """
+    coefficients = [0.0] * 24
+    camera.GetFrustumPlanes(float(aspect), coefficients)
+    # Left, right, bottom, top; far and near follow.
+    planes = [tuple(coefficients[4 * i:4 * i + 4]) for i in range(4)]
+    return RegionOfInterest(planes, "the camera view", padding=CAMERA_PADDING)
+
+
+def stats_cache_name(roi: Optional[RegionOfInterest]) -> str:
+    """Return the stats cache file name; regions keep their own cache."""
+    if roi is None:
+        return STATS_CACHE_NAME
+    root, ext = os.path.splitext(STATS_CACHE_NAME)
+    return f"{root}_roi_{roi.key}{ext}"
+
+
+class RoiCellStore:
+    """On-disk ``.npy`` cache of the cell ids kept per file, keyed by file signature and region."""
+
+    def __init__(self, directory: str, roi: RegionOfInterest) -> None:
+        self._directory = directory
+        self._roi = roi
+
+    def _path(self, source_path: str) -> str:
+        st = os.stat(source_path)
+        key = "|".join((
+            os.path.abspath(source_path),
+            str(st.st_size),
+            str(st.st_mtime_ns),
+            self._roi.key,
+        ))
+        return os.path.join(self._directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".npy")
+
+    def load(self, source_path: str) -> Optional[np.ndarray]:
+        path = self._path(source_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, source_path: str, ids: np.ndarray) -> None:
+        os.makedirs(self._directory, exist_ok=True)
+        path = self._path(source_path)
+        tmp_path = f"{path[:-4]}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, ids)
+        os.replace(tmp_path, path)
+
+
+def _subset_attributes(source, target, rows: np.ndarray) -> None:
+    """Copy the numeric arrays of *source* restricted to the *rows* mask into *target*."""
+    for i in range(source.GetNumberOfArrays()):
+        array = source.GetArray(i)
+        if array is None:
+            continue
+        copied = numpy_to_vtk(np.ascontiguousarray(vtk_to_numpy(array)[rows]), deep=1)
+        copied.SetName(array.GetName())
+        target.AddArray(copied)
+    scalars, normals = source.GetScalars(), source.GetNormals()
+    if scalars is not None and scalars.GetName():
+        target.SetActiveScalars(scalars.GetName())
+    if normals is not None and normals.GetName():
+        target.SetActiveNormals(normals.GetName())
+
+
+def extract_cells(data, ids: np.ndarray):
+    """Return a vtkPolyData with the cells *ids* of *data* and the points they use."""
+    if len(ids) == data.GetNumberOfCells():
+        return data
+    keep = np.zeros(data.GetNumberOfCells(), dtype=bool)
+    keep[ids] = True
+    used = np.zeros(data.GetNumberOfPoints(), dtype=bool)
+    pieces = []
+    start = 0
+    for cells in (data.GetVerts(), data.GetLines(), data.GetPolys(), data.GetStrips()):
+        count = cells.GetNumberOfCells() if cells is not None else 0
+        mask = keep[start:start + count]
+        start += count
+        if not mask.any():
+            pieces.append(None)
+            continue
+        lengths = np.diff(vtk_to_numpy(cells.GetOffsetsArray()).astype(np.int64, copy=False))
+        connectivity = vtk_to_numpy(cells.GetConnectivityArray())[np.repeat(mask, lengths)]
+        used[connectivity] = True
+        pieces.append((lengths[mask], connectivity))
+
+    point_ids = np.cumsum(used, dtype=np.int64) - 1
+    subset = vtkPolyData()
+    points = vtkPoints()
+    points.SetData(numpy_to_vtk(
+        np.ascontiguousarray(vtk_to_numpy(data.GetPoints().GetData())[used]), deep=1
+    ))
+    subset.SetPoints(points)
+    setters = (subset.SetVerts, subset.SetLines, subset.SetPolys, subset.SetStrips)
+    for setter, piece in zip(setters, pieces):
+        if piece is None:
+            continue
+        lengths, connectivity = piece
+        offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+        cells = vtkCellArray()
+        cells.SetData(
+            numpy_to_vtkIdTypeArray(offsets, deep=1),
+            numpy_to_vtkIdTypeArray(np.ascontiguousarray(point_ids[connectivity]), deep=1),
+        )
+        setter(cells)
+    _subset_attributes(data.GetPointData(), subset.GetPointData(), used)
+    _subset_attributes(data.GetCellData(), subset.GetCellData(), keep)
+    subset.GetFieldData().ShallowCopy(data.GetFieldData())
+    return subset
+
+
+def roi_loader(
+    roi: RegionOfInterest,
+    store: Optional[RoiCellStore] = None,
+    inner: Callable[[str], object] = read_polydata,
+) -> Callable[[str], object]:
+    """Return a timestep loader that keeps only the cells of *roi*.
+
+    The kept cell ids are computed once per file and saved in *store*;
+    arrays attached by *inner* (e.g. derived fields) are carried over.
+    """
+
+    def _load(path: str):
+        data = inner(path)
+        ids = store.load(path) if store is not None else None
+        if ids is not None and len(ids) and ids[-1] >= data.GetNumberOfCells():
+            ids = None
+        if ids is None:
+            ids = roi.cell_ids(data)
+            if store is not None:
+                store.save(path, ids)
+        return extract_cells(data, ids)
+
+    return _load
@@ -0,0 +1,346 @@
+"""Per-file field statistics with an on-disk cache."""
+from __future__ import annotations
+
+import csv
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.vtkFiltersCore import vtkPointDataToCellData
+from vtkmodules.vtkFiltersVerdict import vtkCellSizeFilter
+
+from .repack import read_polydata
+
+STATS_CACHE_NAME = ".render_vtps_stats.json"
+STATS_CACHE_VERSION = 2
+RANGE_MODES = ("global", "current", "percentile")
+PERCENTILES = (1.0, 99.0)
+
+FileStats = Dict[str, Dict[str, float]]
+
+
+def stats_key(assoc: str, name: str) -> str:
+    """Return the key used for an (association, array) pair in a stats entry."""
+    return f"{assoc}:{name}"
+
+
+def _cell_areas(data) -> np.ndarray:
+    sizes = vtkCellSizeFilter()
+    sizes.SetInputData(data)
+    sizes.ComputeVertexCountOff()
+    sizes.ComputeLengthOff()
+    sizes.ComputeVolumeOff()
+    sizes.ComputeAreaOn()
+    sizes.Update()
+    return vtk_to_numpy(sizes.GetOutput().GetCellData().GetArray("Area"))
+
+
+def _point_to_cell(data):
+    averaged = vtkPointDataToCellData()
+    averaged.SetInputData(data)
+    averaged.PassPointDataOff()
+    averaged.Update()
+    return averaged.GetOutput().GetCellData()
+
+
+def compute_dataset_stats(data) -> FileStats:
+    """Return min/max/mean/percentiles and area integrals of every scalar array.
+
+    ``integral`` is the area-weighted integral over the surface (point
+    arrays are averaged onto cells first) and ``area`` the area it covers.
+    """
+    stats: FileStats = {}
+    areas = None
+    cell_averages = None
+    for assoc, attributes in (("POINTS", data.GetPointData()), ("CELLS", data.GetCellData())):
+        for i in range(attributes.GetNumberOfArrays()):
+            array = attributes.GetArray(i)
+            if array is None or array.GetNumberOfComponents() != 1:
+                continue
+            values = vtk_to_numpy(array)
+            values = values[np.isfinite(values)]
+            if values.size == 0:
+                continue
+            if areas is None:
+                areas = _cell_areas(data)
+            if assoc == "POINTS":
+                if cell_averages is None:
+                    cell_averages = _point_to_cell(data)
+                per_cell = vtk_to_numpy(cell_averages.GetArray(array.GetName()))
+            else:
+                per_cell = vtk_to_numpy(array)
+            finite = np.isfinite(per_cell)
+            low, high = np.percentile(values, PERCENTILES)
+            stats[stats_key(assoc, array.GetName())] = {
+                "min": float(values.min()),
+                "max": float(values.max()),
+                "mean": float(values.mean()),
+                "p_low": float(low),
+                "p_high": float(high),
+                "count": int(values.size),
+                "integral": float(np.dot(per_cell[finite], areas[finite])),
+                "area": float(areas[finite].sum()),
+            }
+    return stats
+
+
+def compute_file_stats(path: str, loader: Optional[Callable[[str], object]] = None) -> FileStats:
+    """Return the statistics of every scalar array in *path*.
+
+    *loader* replaces ``read_polydata``, e.g. to attach derived arrays.
+    """
+    return compute_dataset_stats((loader or read_polydata)(path))
+
+
+class StatsCache:
+    """Per-file statistics keyed by path, size and mtime, persisted as JSON.
+
+    Stale or missing entries are computed on a thread pool the first time
+    they are requested; ``save`` merges them into the file when they changed.
+    Entries lacking the *required* array (e.g. a derived field added since)
+    are recomputed through *loader*.
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[str],
+        workers: Optional[int] = None,
+        loader: Optional[Callable[[str], object]] = None,
+        required: Optional[str] = None,
+    ) -> None:
+        self._path = cache_path
+        self._workers = workers
+        self._loader = loader
+        # Array that must be present in an entry (e.g. a derived field) for it to count.
+        self._required = required
+        self._entries: Dict[str, Dict] = self._read() if cache_path else {}
+        # Paths computed by this process, written over the entries on disk by save.
+        self._changed: set = set()
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Dict]:
+        if not os.path.exists(self._path):
+            return {}
+        try:
+            with open(self._path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+            if data.get("version") == STATS_CACHE_VERSION:
+                return dict(data.get("files", {}))
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def _cached(self, path: str) -> Optional[FileStats]:
+        entry = self._entries.get(os.path.abspath(path))
+        if entry is None:
+            return None
+        if (entry.get("size"), entry.get("mtime_ns")) != self._signature(path):
+            return None
+        arrays = entry["arrays"]
+        if self._required and not any(key.endswith(f":{self._required}") for key in arrays):
+            return None
+        return arrays
+
+    def _compute(self, path: str, data=None) -> FileStats:
+        size, mtime_ns = self._signature(path)
+        if data is None:
+            arrays = compute_file_stats(path, self._loader)
+        else:
+            arrays = compute_dataset_stats(data)
+        with self._lock:
+            self._entries[os.path.abspath(path)] = {
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "arrays": arrays,
+            }
+            self._changed.add(os.path.abspath(path))
+        return arrays
+
+    def has(self, path: str) -> bool:
+        return self._cached(path) is not None
+
+    def get(self, path: str) -> Optional[FileStats]:
+        """Return the cached stats of *path*, or None without computing them."""
+        return self._cached(path)
+
+    def add(self, path: str, data) -> FileStats:
+        """Record the stats of *path* from its already-loaded dataset *data*."""
+        return self._compute(path, data)
+
+    def file_stats(
+        self,
+        paths: Sequence[str],
+        on_file: Optional[Callable[[str, bool], None]] = None,
+    ) -> List[FileStats]:
+        """Return the stats of every file in *paths*, computing missing ones.
+
+        *on_file* is called with (path, computed) as each file is done.
+        """
+        results: List[Optional[FileStats]] = [self._cached(path) for path in paths]
+        missing = [i for i, stats in enumerate(results) if stats is None]
+        if on_file is not None:
+            for path, stats in zip(paths, results):
+                if stats is not None:
+                    on_file(path, False)
+        if missing:
+            with ThreadPoolExecutor(max_workers=self._workers) as pool:
+                for i, stats in zip(missing, pool.map(self._compute, [paths[i] for i in missing])):
+                    results[i] = stats
+                    if on_file is not None:
+                        on_file(paths[i], True)
+        return [stats or {} for stats in results]
+
+    def save(self) -> None:
+        if not self._path or not self._changed:
+            return
+        # Several processes (e.g. --all-surfaces runs) share the cache file, so
+        # entries written by the others since it was read are kept.
+        with self._lock:
+            entries = self._read()
+            entries.update((path, self._entries[path]) for path in self._changed)
+            payload = {"version": STATS_CACHE_VERSION, "files": entries}
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=os.path.dirname(os.path.abspath(self._path)),
+                prefix=os.path.basename(self._path),
+                suffix=".tmp",
+                delete=False,
+            ) as handle:
+                json.dump(payload, handle)
+            os.replace(handle.name, self._path)
+            self._entries = entries
+            self._changed.clear()
+
+
+class RenderPassStats:
+    """Frame-loop hook that records stats of the datasets loaded for rendering.
+
+    *sources* are the proxies showing each series and *frames* the files
+    they show at every frame; a file is summarised the first time a frame
+    loads it, so no second read is needed.
+    """
+
+    def __init__(
+        self,
+        cache: StatsCache,
+        sources: Sequence[object],
+        frames: Sequence[Sequence[str]],
+        inner: Optional[Callable[[int, float], None]] = None,
+    ) -> None:
+        self._cache = cache
+        self._sources = list(sources)
+        self._frames = [tuple(paths) for paths in frames]
+        self._inner = inner
+        self._seen: set = set()
+
+    def __call__(self, index: int, data_time: float) -> None:
+        if self._inner is not None:
+            self._inner(index, data_time)
+        for source, path in zip(self._sources, self._frames[index]):
+            if path in self._seen:
+                continue
+            self._seen.add(path)
+            if self._cache.has(path):
+                continue
+            source.UpdatePipeline(data_time)
+            data = source.GetClientSideObject().GetOutputDataObject(0)
+            if data is not None and data.IsA("vtkPolyData"):
+                self._cache.add(path, data)
+
+
+def stats_range(
+    file_stats: Sequence[FileStats],
+    assoc: str,
+    name: str,
+    mode: str = "global",
+) -> Optional[Tuple[float, float]]:
+    """Combine per-file stats of (assoc, name) into a color range.
+
+    ``global`` and ``current`` use the min/max of the given files, while
+    ``percentile`` spans the lowest and highest per-file percentile bounds.
+    Returns None when no file has the array or the range is degenerate.
+    """
+    key = stats_key(assoc, name)
+    entries = [stats[key] for stats in file_stats if key in stats]
+    if not entries:
+        return None
+    if mode == "percentile":
+        low = min(entry["p_low"] for entry in entries)
+        high = max(entry["p_high"] for entry in entries)
+    else:
+        low = min(entry["min"] for entry in entries)
+        high = max(entry["max"] for entry in entries)
+    if not low < high:
+        return None
+    return low, high
+
+
+STATS_CSV_COLUMNS = (
+    "time",
+    "source",
+    "file",
+    "field",
+    "association",
+    "min",
+    "max",
+    "mean",
+    "sample_mean",
+    "integral",
+    "area",
+)
+
+
+def write_stats_csv(
+    csv_path: str,
+    rows: Sequence[Tuple[float, str, str]],
+    file_stats: Sequence[FileStats],
+    assoc: str,
+    name: str,
+) -> int:
+    """Write one CSV row per (time, source, file) entry with the stats of (assoc, name).
+
+    ``mean`` is the area-weighted mean (``integral / area``) in every
+    session; ``sample_mean``, the plain mean of the point or cell values,
+    is ``nan`` for entries without one (stats computed on a server).
+    Files without the array are skipped. Returns the number of rows written.
+    """
+    key = stats_key(assoc, name)
+    written = 0
+    tmp_path = f"{csv_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(STATS_CSV_COLUMNS)
+        for (time, source, path), stats in zip(rows, file_stats):
+            entry = stats.get(key)
+            if entry is None:
+                continue
+            integral = entry.get("integral", float("nan"))
+            area = entry.get("area", float("nan"))
+            area_mean = integral / area if area > 0.0 else float("nan")
+            writer.writerow([
+                f"{time:.9g}",
+                source,
+                path,
+                name,
+                assoc,
+                f"{entry['min']:.9g}",
+                f"{entry['max']:.9g}",
+                f"{area_mean:.9g}",
+                f"{entry.get('mean', float('nan')):.9g}",
+                f"{integral:.9g}",
+                f"{area:.9g}",
+            ])
+            written += 1
+    os.replace(tmp_path, csv_path)
+    return written
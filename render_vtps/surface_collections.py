@@ -0,0 +1,269 @@
+"""Incremental export of per-surface ParaView collection folders."""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Linux ioctl request number for FICLONE (copy-on-write clone of a whole file).
+_FICLONE = 0x40049409
+
+
+def _surface_file_lists(readers: List[object], count: int) -> List[List[str]]:
+    file_lists: List[List[str]] = []
+    for reader in readers[:count]:
+        file_names = getattr(reader, "FileNames", None)
+        if not file_names:
+            file_lists.append([])
+        elif isinstance(file_names, str):
+            file_lists.append([file_names])
+        else:
+            file_lists.append(list(file_names))
+    return file_lists
+
+
+def _safe_surface_name(file_list: List[str], index: int) -> str:
+    stem = f"surface_{index + 1:02d}"
+    if file_list:
+        stem = os.path.splitext(os.path.basename(file_list[0]))[0]
+    safe = "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in stem)
+    return safe
+
+
+def _unique_surface_name(base_name: str, used_names: set[str]) -> str:
+    name = base_name
+    suffix = 2
+    while name in used_names:
+        name = f"{base_name}_{suffix:02d}"
+        suffix += 1
+    used_names.add(name)
+    return name
+
+
+def _symlink(src: str, dst: str) -> None:
+    target = os.path.relpath(os.path.abspath(src), start=os.path.dirname(dst))
+    os.symlink(target, dst)
+
+
+def _reflink(src: str, dst: str) -> None:
+    try:
+        import fcntl
+    except ImportError as exc:  # pragma: no cover - non-POSIX platforms
+        raise OSError("reflinks are not supported on this platform") from exc
+
+    try:
+        with open(src, "rb") as src_handle, open(dst, "wb") as dst_handle:
+            fcntl.ioctl(dst_handle.fileno(), _FICLONE, src_handle.fileno())
+    except OSError:
+        if os.path.lexists(dst):
+            os.remove(dst)
+        raise
+    shutil.copystat(src, dst)
+
+
+_LINK_METHODS = (
+    ("symlink", _symlink),
+    ("hardlink", os.link),
+    ("reflink", _reflink),
+)
+
+
+def link_or_copy(src: str, dst: str) -> str:
+    """Expose *src* at *dst* as cheaply as the filesystem allows.
+
+    Tries a relative symlink, a hardlink and a copy-on-write reflink before
+    falling back to a full copy. Returns the method that succeeded.
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    for method, link in _LINK_METHODS:
+        try:
+            link(src, dst)
+            return method
+        except OSError:
+            continue
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def _source_signature(src: str) -> Dict[str, object]:
+    st = os.stat(src)
+    return {
+        "source": os.path.abspath(src),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+def _entry_is_current(local_path: str, entry: Optional[Dict], signature: Dict) -> bool:
+    if entry is None:
+        return False
+    if any(entry.get(key) != value for key, value in signature.items()):
+        return False
+    # os.path.exists follows symlinks, so a dangling link counts as missing.
+    return os.path.exists(local_path)
+
+
+def _sync_entry(
+    src: str,
+    local_path: str,
+    entry: Optional[Dict],
+) -> Tuple[Dict[str, object], bool]:
+    signature = _source_signature(src)
+    if _entry_is_current(local_path, entry, signature):
+        return dict(entry), False  # type: ignore[arg-type]
+    signature["method"] = link_or_copy(src, local_path)
+    return signature, True
+
+
+def _load_manifest(surface_dir: str) -> Dict[str, Dict]:
+    path = os.path.join(surface_dir, MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def _write_if_changed(path: str, content: str) -> bool:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            if handle.read() == content:
+                return False
+    except OSError:
+        pass
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        handle.write(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+def _pvd_content(datasets: List[Tuple[float, str]]) -> str:
+    lines = [
+        "<?xml version=\"1.0\"?>\n",
+        "<VTKFile type=\"Collection\" version=\"0.1\" byte_order=\"LittleEndian\">\n",
+        "  <Collection>\n",
+    ]
+    for timestep, src in datasets:
+        lines.append(
+            f"    <DataSet timestep=\"{timestep:.16g}\" group=\"\" part=\"0\" file=\"{escape(src)}\"/>\n"
+        )
+    lines.append("  </Collection>\n")
+    lines.append("</VTKFile>\n")
+    return "".join(lines)
+
+
+def _series_content(datasets: List[Tuple[float, str]]) -> str:
+    payload = {
+        "file-series-version": "1.0",
+        "files": [{"name": name, "time": timestep} for timestep, name in datasets],
+    }
+    return json.dumps(payload, indent=2) + "\n"
+
+
+def _sync_surface(
+    pool: ThreadPoolExecutor,
+    surface_dir: str,
+    surface_name: str,
+    file_list: List[str],
+    write_series: bool,
+) -> None:
+    os.makedirs(surface_dir, exist_ok=True)
+    manifest = _load_manifest(surface_dir)
+
+    datasets: List[Tuple[float, str]] = []
+    jobs = []
+    for step, src in enumerate(file_list):
+        try:
+            timestep = float(os.path.basename(os.path.dirname(src)))
+        except ValueError:
+            timestep = float(step)
+        ext = os.path.splitext(src)[1]
+        local_name = f"{surface_name}_{step:06d}{ext}"
+        datasets.append((timestep, local_name))
+        jobs.append((
+            local_name,
+            pool.submit(
+                _sync_entry,
+                src,
+                os.path.join(surface_dir, local_name),
+                manifest.get(local_name),
+            ),
+        ))
+
+    entries: Dict[str, Dict] = {}
+    changed = 0
+    for local_name, job in jobs:
+        entries[local_name], updated = job.result()
+        changed += int(updated)
+
+    stale = [name for name in manifest if name not in entries]
+    for name in stale:
+        stale_path = os.path.join(surface_dir, name)
+        if os.path.lexists(stale_path):
+            os.remove(stale_path)
+
+    pvd_path = os.path.join(surface_dir, "collection.pvd")
+    pvd_written = _write_if_changed(pvd_path, _pvd_content(datasets))
+
+    if write_series and datasets:
+        ext = os.path.splitext(datasets[0][1])[1]
+        series_path = os.path.join(surface_dir, f"{surface_name}{ext}.series")
+        _write_if_changed(series_path, _series_content(datasets))
+
+    if changed or stale or entries != manifest:
+        _write_if_changed(
+            os.path.join(surface_dir, MANIFEST_NAME),
+            json.dumps({"version": MANIFEST_VERSION, "entries": entries}, indent=1) + "\n",
+        )
+
+    status = "Wrote" if pvd_written else "Up to date"
+    print(
+        f"[EXPORT] {status} surface collection: {pvd_path} "
+        f"({changed} updated, {len(stale)} removed, {len(entries) - changed} unchanged)"
+    )
+
+
+def write_surface_collections(
+    output_folder: str,
+    readers: List[object],
+    surface_count: int,
+    write_series: bool = False,
+) -> None:
+    """Write one flattened time-series folder per surface under *output_folder*.
+
+    Each folder holds links to the source files, a ``collection.pvd`` and a
+    manifest used to only touch entries whose source changed since the last
+    export. A ``.vtp.series`` file is written as well when *write_series* is set.
+    """
+    collections_root = os.path.join(output_folder, "surface_collections")
+    os.makedirs(collections_root, exist_ok=True)
+    used_names: set[str] = set()
+
+    with ThreadPoolExecutor() as pool:
+        for index, file_list in enumerate(_surface_file_lists(readers, surface_count)):
+            if not file_list:
+                continue
+
+            surface_name = _unique_surface_name(
+                _safe_surface_name(file_list, index),
+                used_names,
+            )
+            _sync_surface(
+                pool,
+                os.path.join(collections_root, surface_name),
+                surface_name,
+                file_list,
+                write_series,
+            )
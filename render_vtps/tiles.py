@@ -0,0 +1,186 @@
+"""Tiled rendering of large frames into a memory-mapped image buffer."""
+from __future__ import annotations
+
+import math
+import os
+import struct
+import tempfile
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+# Frames written as PNG are intermediate, so favour speed over size.
+PNG_COMPRESSION = 1
+
+# Rows handed to zlib or to a pipe at a time.
+_ROW_BLOCK = 256
+
+
+def tile_grid(size: Tuple[int, int], max_tile: Tuple[int, int]) -> Tuple[int, int]:
+    """Return (columns, rows) of equal tiles no larger than *max_tile* covering *size*.
+
+    Tiles must divide the image exactly so 2D annotations land where they
+    would in an untiled render; the smallest such count is used per axis.
+    Sizes whose tiles would come out under half of *max_tile* (a prime
+    width, say) are rejected rather than rendered as thousands of slivers.
+    """
+
+    def _count(length: int, limit: int, axis: str) -> int:
+        needed = max(1, int(math.ceil(length / float(max(1, limit)))))
+        count = needed
+        while length % count and count < 2 * needed:
+            count += 1
+        if length % count:
+            raise ValueError(
+                f"--size {axis} {length} does not split into equal tiles of at most {limit} "
+                f"pixels; use a {axis} with small factors (e.g. {length // needed * needed}) "
+                f"or another --tile-size."
+            )
+        return count
+
+    return (
+        _count(int(size[0]), int(max_tile[0]), "width"),
+        _count(int(size[1]), int(max_tile[1]), "height"),
+    )
+
+
+class TiledCapture:
+    """Render *export_view* at *image_size* as a grid of tiles of at most *max_tile*.
+
+    Each tile is rendered at tile size with the camera narrowed to that
+    part of the image (view angle or parallel scale, plus window center),
+    while the render window's tile viewport places 2D annotations such as
+    the time label and scalar bar as in one large render. Tiles are copied
+    into a memory-mapped (H, W, 3) buffer, so peak memory follows the tile
+    size rather than the frame size. Works with offscreen (OSMesa/EGL)
+    builds: no window larger than a tile is ever created.
+    """
+
+    def __init__(
+        self,
+        export_view: object,
+        image_size: List[int],
+        max_tile: Tuple[int, int],
+        buffer_dir: Optional[str] = None,
+        render: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._view = export_view
+        self.width, self.height = int(image_size[0]), int(image_size[1])
+        self.columns, self.rows = tile_grid((self.width, self.height), max_tile)
+        self.tile_width = self.width // self.columns
+        self.tile_height = self.height // self.rows
+        if render is None:
+            import paraview.simple as pv
+
+            def render() -> None:
+                pv.Render(export_view)
+        self._render = render
+        handle, self._path = tempfile.mkstemp(
+            prefix=".render_vtps_tiles_", suffix=".rgb", dir=buffer_dir
+        )
+        os.close(handle)
+        self.buffer = np.memmap(
+            self._path, dtype=np.uint8, mode="w+", shape=(self.height, self.width, 3)
+        )
+
+    @property
+    def tile_count(self) -> int:
+        return self.columns * self.rows
+
+    def __enter__(self) -> "TiledCapture":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def _grab(self, window) -> np.ndarray:
+        from vtkmodules.util.numpy_support import vtk_to_numpy
+        from vtkmodules.vtkCommonCore import vtkUnsignedCharArray
+
+        width, height = window.GetActualSize()
+        pixels = vtkUnsignedCharArray()
+        window.GetPixelData(0, 0, width - 1, height - 1, 0, pixels, 0)
+        return vtk_to_numpy(pixels).reshape(height, width, 3)
+
+    def capture(self) -> np.memmap:
+        """Render every tile of the current frame and return the assembled top-down buffer."""
+        view = self._view
+        window = view.GetRenderWindow()
+        camera = view.GetActiveCamera()
+        view_size = list(view.ViewSize)
+        view_angle = camera.GetViewAngle()
+        parallel_scale = camera.GetParallelScale()
+        window_center = camera.GetWindowCenter()
+        fraction = 1.0 / self.rows
+        view.ViewSize = [self.tile_width, self.tile_height]
+        try:
+            camera.SetViewAngle(math.degrees(
+                2.0 * math.atan(math.tan(math.radians(view_angle) / 2.0) * fraction)
+            ))
+            camera.SetParallelScale(parallel_scale * fraction)
+            window.SetTileScale(self.columns, self.rows)
+            for row in range(self.rows):
+                for column in range(self.columns):
+                    window.SetTileViewport(
+                        column / float(self.columns),
+                        row / float(self.rows),
+                        (column + 1) / float(self.columns),
+                        (row + 1) / float(self.rows),
+                    )
+                    # Window center is in tile units: the tile's offset from the image center.
+                    camera.SetWindowCenter(2 * column + 1 - self.columns, 2 * row + 1 - self.rows)
+                    self._render()
+                    tile = self._grab(window)
+                    # Tile rows count from the bottom; the buffer is top-down.
+                    top = self.height - (row + 1) * self.tile_height
+                    left = column * self.tile_width
+                    self.buffer[top:top + self.tile_height, left:left + self.tile_width] = tile[::-1]
+        finally:
+            window.SetTileScale(1, 1)
+            window.SetTileViewport(0.0, 0.0, 1.0, 1.0)
+            camera.SetViewAngle(view_angle)
+            camera.SetParallelScale(parallel_scale)
+            camera.SetWindowCenter(*window_center)
+            view.ViewSize = view_size
+        return self.buffer
+
+    def close(self) -> None:
+        """Release the buffer and delete its file."""
+        self.buffer = None
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+
+def write_frame(stream, pixels: np.ndarray) -> None:
+    """Write *pixels* (H, W, 3) to *stream* in row blocks, without a full-frame copy."""
+    for start in range(0, pixels.shape[0], _ROW_BLOCK):
+        stream.write(np.ascontiguousarray(pixels[start:start + _ROW_BLOCK]).data)
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    checksum = zlib.crc32(kind + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", checksum)
+
+
+def write_png(path: str, pixels: np.ndarray) -> str:
+    """Write top-down (H, W, 3) uint8 *pixels* as an RGB PNG.
+
+    Row blocks are compressed as they are read, so a memory-mapped frame is
+    never loaded whole.
+    """
+    height, width = int(pixels.shape[0]), int(pixels.shape[1])
+    compressor = zlib.compressobj(PNG_COMPRESSION)
+    with open(path, "wb") as handle:
+        handle.write(b"\x89PNG\r\n\x1a\n")
+        handle.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        for start in range(0, height, _ROW_BLOCK):
+            block = np.asarray(pixels[start:start + _ROW_BLOCK]).reshape(-1, width * 3)
+            # Each scanline starts with filter type 0 (none).
+            rows = np.hstack((np.zeros((len(block), 1), dtype=np.uint8), block))
+            data = compressor.compress(rows.tobytes())
+            if data:
+                handle.write(_chunk(b"IDAT", data))
+        handle.write(_chunk(b"IDAT", compressor.flush()))
+        handle.write(_chunk(b"IEND", b""))
+    return path
@@ -0,0 +1,147 @@
+"""Movie timelines: holds, slow/fast segments and physical-time playback."""
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Sequence, Tuple
+
+_DURATION_RE = re.compile(r"^(?P<value>[0-9]*\.?[0-9]+)\s*(?P<unit>s|fps)?$")
+_RANGE_RE = re.compile(r"^(?P<start>-?[0-9]*\.?[0-9]+)-(?P<end>-?[0-9]*\.?[0-9]+)$")
+
+
+class Timeline:
+    """Per-frame display durations applied when the movie is encoded.
+
+    ``holds`` are (frame, seconds) pairs, where frame is an index (negative
+    counts from the end); ``segments`` are (start time, end time, kind,
+    value) with kind ``slow``, ``fast`` or ``fps``; ``physical`` spaces
+    frames by their data-time intervals.
+    """
+
+    def __init__(self) -> None:
+        self.holds: List[Tuple[int, float]] = []
+        self.segments: List[Tuple[float, float, str, float]] = []
+        self.physical = False
+
+    def add_hold(self, frame: int, seconds: float) -> None:
+        self.holds.append((frame, seconds))
+
+    def durations(
+        self,
+        data_times: Sequence[float],
+        fps: int,
+        base: Optional[Sequence[float]] = None,
+    ) -> List[float]:
+        """Return the display time in seconds of each frame at data time *data_times*.
+
+        Frames start from *base* durations (e.g. the timing of an earlier
+        render) instead of ``1 / fps`` when given.
+        """
+        count = len(data_times)
+        if base is not None:
+            durations = [float(d) for d in base[:count]]
+            durations += [1.0 / float(fps)] * (count - len(durations))
+        else:
+            durations = [1.0 / float(fps)] * count
+        if self.physical and count > 1:
+            intervals = [data_times[i + 1] - data_times[i] for i in range(count - 1)]
+            intervals.append(intervals[-1])
+            total = sum(intervals)
+            if total > 0.0:
+                # Same movie length as before, spread by simulated time.
+                length = sum(durations)
+                durations = [length * max(0.0, interval) / total for interval in intervals]
+
+        for start, end, kind, value in self.segments:
+            for index, t in enumerate(data_times):
+                if start <= t <= end:
+                    if kind == "slow":
+                        durations[index] *= value
+                    elif kind == "fast":
+                        durations[index] /= value
+                    else:
+                        durations[index] = 1.0 / value
+
+        for frame, seconds in self.holds:
+            index = frame if frame >= 0 else count + frame
+            if 0 <= index < count:
+                durations[index] = max(durations[index], seconds)
+        return durations
+
+
+def _frame_index(text: str, item: str) -> int:
+    text = text.strip().lower()
+    if text in ("start", "first"):
+        return 0
+    if text in ("end", "last"):
+        return -1
+    try:
+        return int(text)
+    except ValueError as exc:
+        raise ValueError(
+            f"Invalid frame '{text}' in --timeline '{item}'; use an index, 'start' or 'end'."
+        ) from exc
+
+
+def _time_range(text: str, item: str) -> Tuple[float, float]:
+    match = _RANGE_RE.match(text.strip())
+    if match is None:
+        raise ValueError(f"Invalid time range '{text}' in --timeline '{item}'; use START-END.")
+    start, end = float(match.group("start")), float(match.group("end"))
+    if end < start:
+        raise ValueError(f"Time range '{text}' in --timeline '{item}' ends before it starts.")
+    return start, end
+
+
+def parse_timeline(spec: Optional[str]) -> Optional[Timeline]:
+    """Parse ``--timeline``; return None when *spec* is empty.
+
+    Comma-separated entries:
+
+    - ``hold:FRAME@SECONDS`` shows a frame (index, ``start`` or ``end``) for
+      at least that long, e.g. ``hold:0@2s`` or ``hold:end@3s``;
+    - ``slow:T0-T1xF`` / ``fast:T0-T1xF`` play the frames with data times in
+      [T0, T1] F times slower or faster;
+    - ``fps:T0-T1@N`` plays those frames at N frames per second;
+    - ``physical`` spaces frames by their data-time intervals, so irregular
+      write intervals play back at a uniform simulated-time rate.
+    """
+    if not spec or not spec.strip():
+        return None
+    timeline = Timeline()
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kind, _, rest = item.partition(":")
+        kind = kind.strip().lower()
+        if kind == "physical" and not rest:
+            timeline.physical = True
+        elif kind == "hold":
+            frame, sep, seconds = rest.rpartition("@")
+            match = _DURATION_RE.match(seconds.strip())
+            if not sep or match is None or match.group("unit") not in (None, "s"):
+                raise ValueError(f"Invalid --timeline entry '{item}'; use hold:FRAME@SECONDS, e.g. hold:0@2s.")
+            timeline.add_hold(_frame_index(frame, item), float(match.group("value")))
+        elif kind in ("slow", "fast"):
+            span, sep, factor = rest.rpartition("x")
+            try:
+                value = float(factor)
+            except ValueError:
+                value = 0.0
+            if not sep or value <= 0.0:
+                raise ValueError(
+                    f"Invalid --timeline entry '{item}'; use {kind}:START-ENDxFACTOR "
+                    "with a positive factor."
+                )
+            timeline.segments.append((*_time_range(span, item), kind, value))
+        elif kind == "fps":
+            span, sep, rate = rest.rpartition("@")
+            match = _DURATION_RE.match(rate.strip())
+            if not sep or match is None or float(match.group("value")) <= 0.0:
+                raise ValueError(f"Invalid --timeline entry '{item}'; use fps:START-END@RATE.")
+            timeline.segments.append((*_time_range(span, item), "fps", float(match.group("value"))))
+        else:
+            raise ValueError(
+                f"Unknown --timeline entry '{item}'; use hold, slow, fast, fps or physical."
+            )
+    return timeline
@@ -2,11 +2,21 @@
 from __future__ import annotations
 
 import os
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import paraview.simple as pv
 
-from .pv_helpers import apply_coloring, discover_arrays, initialize_session
+from .derived import parse_field
+from .discovery import is_vtkhdf_file
+from .pv_helpers import (
+    apply_coloring,
+    discover_arrays,
+    initialize_session,
+    mpi_process_count,
+    parse_server,
+    redistribute_source,
+    remote_session,
+)
 from .utils import (
     apply_background_color,
     apply_foreground_color,
@@ -18,12 +28,126 @@ from .utils import (
 FOREGROUND_COLOR = (0.0, 0.0, 0.0)
 
 
+def _color_by_field(args, proxy, display) -> None:
+    point_arrays, cell_arrays = discover_arrays(proxy)
+
+    assoc = None
+    name = None
+    derived = parse_field(args.field)
+    if derived is not None:
+        # Derived fields only exist on the export pipeline; preview the first input.
+        field_name = derived.names[0] if derived.names else None
+    else:
+        field_name = args.field
+    if field_name:
+        if field_name in point_arrays:
+            assoc, name = "POINTS", field_name
+        elif field_name in cell_arrays:
+            assoc, name = "CELLS", field_name
+        else:
+            print(
+                "Warning: Field '%s' not found. Available: POINTS=%s, CELLS=%s. Falling back."
+                % (field_name, point_arrays, cell_arrays)
+            )
+    if name is None:
+        if point_arrays:
+            assoc, name = "POINTS", point_arrays[0]
+        elif cell_arrays:
+            assoc, name = "CELLS", cell_arrays[0]
+        else:
+            print("No fields available for visualization.")
+
+    if name is not None:
+        apply_coloring(
+            display,
+            assoc,
+            name,
+            getattr(args, "colormap", None),
+        )  # type: ignore[arg-type]
+    else:
+        try:
+            pv.ColorBy(display, None)
+        except Exception:
+            pass
+        try:
+            display.DiffuseColor = [0.8, 0.8, 0.8]
+        except Exception:
+            pass
+
+
+def _color_solid(display) -> None:
+    pv.ColorBy(display, None)
+    display.DiffuseColor = [0.8, 0.8, 0.8]
+
+
+def merge_sources(
+    readers: List[object],
+    representations: List[str],
+) -> List[Tuple[object, str, bool]]:
+    """Group readers sharing a representation into one multiblock source each.
+
+    *representations* lists one entry per time-series reader; readers past its
+    end are STL geometries and form their own solid group. Returns
+    (source, representation, solid) tuples in first-seen order.
+    """
+    groups: Dict[Tuple[str, bool], List[object]] = {}
+    for index, reader in enumerate(readers):
+        solid = index >= len(representations)
+        rep = "Surface" if solid else representations[index]
+        groups.setdefault((rep, solid), []).append(reader)
+
+    merged: List[Tuple[object, str, bool]] = []
+    for (rep, solid), members in groups.items():
+        if len(members) == 1:
+            merged.append((members[0], rep, solid))
+            continue
+        name = f"Merged{'STL' if solid else ''}_{rep.replace(' ', '')}"
+        merged.append((pv.GroupDatasets(registrationName=name, Input=members), rep, solid))
+    return merged
+
+
+def display_sources(
+    args,
+    readers: List[object],
+    producers: Optional[Dict[int, object]] = None,
+) -> List[Tuple[object, str]]:
+    """Return the (source, representation) pairs to show in a view.
+
+    *producers* maps reader indices to sources that replace them (for
+    example prefetched TrivialProducers); otherwise the MPI-redistributed
+    sources are used when present. Merging is applied on top.
+    """
+    source_representations = getattr(args, "source_representations", None) or []
+    if producers:
+        readers = [producers.get(index, reader) for index, reader in enumerate(readers)]
+    elif getattr(args, "merged_sources", None):
+        return list(args.merged_sources)
+    elif getattr(args, "distributed_sources", None):
+        readers = list(args.distributed_sources)
+    if getattr(args, "merge_sources", False):
+        return [
+            (source, rep)
+            for source, rep, _solid in merge_sources(readers, source_representations)
+        ]
+    return [
+        (reader, source_representations[index] if index < len(source_representations) else "Surface")
+        for index, reader in enumerate(readers)
+    ]
+
+
 def pv_visualize(
     args,
     sources: List[Tuple[List[str], str]],
 ) -> Tuple[List[object], object, List[object]]:
-    """Build the ParaView pipeline and return (readers, render_view, displays)."""
-    initialize_session()
+    """Build the ParaView pipeline and return (readers, render_view, displays).
+
+    With ``args.merge_sources`` the returned displays are one per merged group,
+    and the merged (source, representation) pairs are kept on
+    ``args.merged_sources`` for the export view.
+    """
+    initialize_session(parse_server(getattr(args, "server", None)))
+    # A pvserver resolves relative paths against its own working directory
+    remote = remote_session()
 
     render_view = pv.GetActiveViewOrCreate("RenderView")
     render_view.ViewSize = list(parse_render_size(args.render_size))
@@ -32,80 +156,72 @@ def pv_visualize(
     apply_foreground_color(render_view, FOREGROUND_COLOR)
 
     readers: List[object] = []
+    shown: List[object] = []
     displays: List[object] = []
 
     source_representations = getattr(args, "source_representations", None) or []
+    merge = getattr(args, "merge_sources", False)
 
     for index, (time_dirs, selected_vtp_filename) in enumerate(sources):
         file_list: List[str] = []
         for td in time_dirs:
             fp = os.path.join(td, selected_vtp_filename)
             if os.path.exists(fp):
-                file_list.append(fp)
+                file_list.append(os.path.abspath(fp) if remote else fp)
         if not file_list:
             raise FileNotFoundError(
                 "Selected VTP not found in any time directory after filtering."
             )
 
-        reader = pv.OpenDataFile(file_list)
-        display = pv.Show(reader, render_view)
-        display.Representation = source_representations[index]
-
-        point_arrays, cell_arrays = discover_arrays(reader)
-
-        assoc = None
-        name = None
-        if args.field:
-            if args.field in point_arrays:
-                assoc, name = "POINTS", args.field
-            elif args.field in cell_arrays:
-                assoc, name = "CELLS", args.field
-            else:
-                print(
-                    "Warning: Field '%s' not found. Available: POINTS=%s, CELLS=%s. Falling back."
-                    % (args.field, point_arrays, cell_arrays)
-                )
-        if name is None:
-            if point_arrays:
-                assoc, name = "POINTS", point_arrays[0]
-            elif cell_arrays:
-                assoc, name = "CELLS", cell_arrays[0]
-            else:
-                print("No fields available for visualization.")
-
-        if name is not None:
-            apply_coloring(
-                display,
-                assoc,
-                name,
-                getattr(args, "colormap", None),
-            )  # type: ignore[arg-type]
+        if len(file_list) == 1 and is_vtkhdf_file(file_list[0]):
+            # Consolidated VTKHDF series provide their own time steps.
+            reader = pv.OpenDataFile(file_list[0])
         else:
-            try:
-                pv.ColorBy(display, None)
-            except Exception:
-                pass
-            try:
-                display.DiffuseColor = [0.8, 0.8, 0.8]
-            except Exception:
-                pass
-
+            reader = pv.OpenDataFile(file_list)
         readers.append(reader)
+        shown.append(redistribute_source(reader, f"Distributed_{index + 1:02d}"))
+        if merge:
+            continue
+
+        display = pv.Show(shown[-1], render_view)
+        display.Representation = source_representations[index]
+        _color_by_field(args, reader, display)
         displays.append(display)
 
     stl_paths = getattr(args, "stl_file", None) or []
     for stl_path in stl_paths:
         if os.path.exists(stl_path):
-            stl_reader = pv.OpenDataFile(stl_path)
+            stl_reader = pv.OpenDataFile(os.path.abspath(stl_path) if remote else stl_path)
+            readers.append(stl_reader)
+            shown.append(stl_reader)
+            if merge:
+                continue
             stl_display = pv.Show(stl_reader, render_view)
-            pv.ColorBy(stl_display, None)
-            stl_display.DiffuseColor = [0.8, 0.8, 0.8]
+            _color_solid(stl_display)
             stl_display.Representation = "Surface"
-            readers.append(stl_reader)
             displays.append(stl_display)
         else:
             print(f"Warning: STL file '{stl_path}' not found. Skipping.")
 
+    if merge:
+        args.merged_sources = []
+        for proxy, rep, solid in merge_sources(shown, source_representations):
+            display = pv.Show(proxy, render_view)
+            display.Representation = rep
+            if solid:
+                _color_solid(display)
+            else:
+                _color_by_field(args, proxy, display)
+            displays.append(display)
+            args.merged_sources.append((proxy, rep))
+        print(
+            f"[MERGE] {len(readers)} sources merged into {len(displays)} display(s)."
+        )
+
+    if mpi_process_count() > 1:
+        args.distributed_sources = shown
+        print(f"[MPI] Surfaces redistributed across {mpi_process_count()} ranks.")
+
     pv.ResetCamera(render_view)
 
     cam = parse_camera_view_point(getattr(args, "camera_view_point", None))
@@ -0,0 +1,284 @@
+"""Consolidate a VTP time series into a single VTKHDF file."""
+from __future__ import annotations
+
+import argparse
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .discovery import VTKHDF_EXTENSIONS, find_vtp_files, validate_vtp_file
+from .repack import read_polydata
+
+VTKHDF_VERSION = (2, 0)
+
+# Target size of one HDF5 chunk; per-step arrays are chunked along time.
+_CHUNK_BYTES = 1 << 20
+
+_TOPOLOGIES = (
+    ("Vertices", "GetVerts"),
+    ("Lines", "GetLines"),
+    ("Polygons", "GetPolys"),
+    ("Strips", "GetStrips"),
+)
+
+
+def _import_h5py():
+    try:
+        import h5py
+    except ImportError as exc:
+        raise RuntimeError(
+            "Writing VTKHDF files requires h5py in the pvpython environment "
+            "(for example 'pvpython -m pip install h5py')."
+        ) from exc
+    return h5py
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="render_vtps consolidate",
+        description="Pack one VTP time series into a single VTKHDF file.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--path",
+        "--time-dirs-path",
+        "--time_dirs_path",
+        dest="time_dirs_path",
+        type=str,
+        default=".",
+        help="Directory containing time-step folders.",
+    )
+    parser.add_argument(
+        "--vtp",
+        "--vtp-filename",
+        "--vtp_filename",
+        dest="vtp_filename",
+        type=str,
+        default=None,
+        help="VTP filename to load from each time directory. Defaults to the first found.",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        required=True,
+        help="Destination VTKHDF file (.vtkhdf or .hdf).",
+    )
+    parser.add_argument(
+        "--arrays",
+        type=str,
+        default=None,
+        help="Comma-separated POINTS/CELLS arrays to keep. Defaults to all arrays.",
+    )
+    parser.add_argument(
+        "--compression",
+        type=str.lower,
+        choices=("none", "gzip", "lzf"),
+        default="none",
+        help="HDF5 filter applied to the chunked datasets.",
+    )
+    return parser
+
+
+def _chunk_rows(values) -> int:
+    row_bytes = max(1, values.itemsize * (values.size // max(1, len(values))))
+    return max(1, min(len(values) or 1, _CHUNK_BYTES // row_bytes))
+
+
+def _append(group, name: str, values, compression: Optional[str]) -> int:
+    """Append *values* along axis 0 of ``group[name]``; return the start row."""
+    if name not in group:
+        group.create_dataset(
+            name,
+            data=values,
+            maxshape=(None,) + values.shape[1:],
+            chunks=(_chunk_rows(values),) + values.shape[1:],
+            compression=compression,
+        )
+        return 0
+    dataset = group[name]
+    start = dataset.shape[0]
+    dataset.resize(start + len(values), axis=0)
+    dataset[start:] = values
+    return start
+
+
+def _geometry(data) -> Tuple[object, Dict[str, Tuple[object, object]]]:
+    import numpy as np
+    from vtkmodules.util.numpy_support import vtk_to_numpy
+
+    points = data.GetPoints()
+    if points is None:
+        coords = np.zeros((0, 3), dtype=np.float64)
+    else:
+        coords = vtk_to_numpy(points.GetData())
+
+    topology: Dict[str, Tuple[object, object]] = {}
+    for name, getter in _TOPOLOGIES:
+        cells = getattr(data, getter)()
+        topology[name] = (
+            vtk_to_numpy(cells.GetOffsetsArray()).astype(np.int64),
+            vtk_to_numpy(cells.GetConnectivityArray()).astype(np.int64),
+        )
+    return coords, topology
+
+
+def _same_geometry(a, b) -> bool:
+    import numpy as np
+
+    if b is None:
+        return False
+    coords_a, topo_a = a
+    coords_b, topo_b = b
+    if coords_a.shape != coords_b.shape or not np.array_equal(coords_a, coords_b):
+        return False
+    return all(
+        np.array_equal(topo_a[name][0], topo_b[name][0])
+        and np.array_equal(topo_a[name][1], topo_b[name][1])
+        for name, _getter in _TOPOLOGIES
+    )
+
+
+def _selected_arrays(attributes, keep: Sequence[str]) -> List[object]:
+    arrays = []
+    for i in range(attributes.GetNumberOfArrays()):
+        array = attributes.GetArray(i)
+        if array is None or (keep and array.GetName() not in keep):
+            continue
+        arrays.append(array)
+    return arrays
+
+
+def consolidate_series(
+    file_list: Sequence[str],
+    time_values: Sequence[float],
+    output_path: str,
+    arrays: Sequence[str] = (),
+    compression: Optional[str] = None,
+) -> str:
+    """Write *file_list* as one temporal VTKHDF PolyData file at *output_path*.
+
+    Points and connectivity are stored once and shared by every step until
+    they change; point and cell arrays are appended per step to chunked
+    datasets addressed through the ``Steps`` offsets.
+    """
+    import numpy as np
+    from vtkmodules.util.numpy_support import vtk_to_numpy
+
+    h5py = _import_h5py()
+    if len(file_list) != len(time_values):
+        raise ValueError("consolidate_series needs one time value per file")
+    if not file_list:
+        raise FileNotFoundError("No VTP files to consolidate.")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with h5py.File(tmp_path, "w") as h5:
+        root = h5.create_group("VTKHDF")
+        root.attrs["Version"] = VTKHDF_VERSION
+        type_name = b"PolyData"
+        root.attrs.create(
+            "Type",
+            type_name,
+            dtype=h5py.string_dtype("ascii", len(type_name)),
+        )
+        topology_groups = {name: root.create_group(name) for name, _getter in _TOPOLOGIES}
+        point_data = root.create_group("PointData")
+        cell_data = root.create_group("CellData")
+        steps = root.create_group("Steps")
+        steps.attrs["NSteps"] = len(file_list)
+        point_offsets = steps.create_group("PointDataOffsets")
+        cell_offsets = steps.create_group("CellDataOffsets")
+
+        stored = None
+        part = -1
+        geometry_offsets = (0, [0] * len(_TOPOLOGIES), [0] * len(_TOPOLOGIES))
+        cell_totals = [0] * len(_TOPOLOGIES)
+        conn_totals = [0] * len(_TOPOLOGIES)
+        n_points = n_cells = 0
+        for path, time_value in zip(file_list, time_values):
+            data = read_polydata(path)
+            current = _geometry(data)
+            if not _same_geometry(current, stored):
+                coords, topology = current
+                part += 1
+                _append(root, "NumberOfPoints", np.array([len(coords)], dtype=np.int64), None)
+                point_start = _append(root, "Points", coords, compression)
+                cell_starts = list(cell_totals)
+                conn_starts = list(conn_totals)
+                for index, (name, _getter) in enumerate(_TOPOLOGIES):
+                    offsets, connectivity = topology[name]
+                    group = topology_groups[name]
+                    n_topology_cells = len(offsets) - 1
+                    _append(group, "NumberOfCells", np.array([n_topology_cells], dtype=np.int64), None)
+                    _append(group, "NumberOfConnectivityIds", np.array([len(connectivity)], dtype=np.int64), None)
+                    _append(group, "Offsets", offsets, compression)
+                    _append(group, "Connectivity", connectivity, compression)
+                    cell_totals[index] += n_topology_cells
+                    conn_totals[index] += len(connectivity)
+                geometry_offsets = (point_start, cell_starts, conn_starts)
+                stored = current
+                n_points = len(coords)
+                n_cells = data.GetNumberOfCells()
+
+            point_start, cell_starts, conn_starts = geometry_offsets
+            _append(steps, "Values", np.array([time_value], dtype=np.float64), None)
+            _append(steps, "PartOffsets", np.array([part], dtype=np.int64), None)
+            _append(steps, "NumberOfParts", np.array([1], dtype=np.int64), None)
+            _append(steps, "PointOffsets", np.array([point_start], dtype=np.int64), None)
+            _append(steps, "CellOffsets", np.array([cell_starts], dtype=np.int64), None)
+            _append(steps, "ConnectivityIdOffsets", np.array([conn_starts], dtype=np.int64), None)
+
+            for attributes, group, offsets_group, expected in (
+                (data.GetPointData(), point_data, point_offsets, n_points),
+                (data.GetCellData(), cell_data, cell_offsets, n_cells),
+            ):
+                for array in _selected_arrays(attributes, arrays):
+                    values = vtk_to_numpy(array)
+                    if len(values) != expected:
+                        raise ValueError(
+                            f"Array '{array.GetName()}' in '{path}' has {len(values)} "
+                            f"tuples, expected {expected}."
+                        )
+                    start = _append(group, array.GetName(), values, compression)
+                    _append(offsets_group, array.GetName(), np.array([start], dtype=np.int64), None)
+
+        for offsets_group in (point_offsets, cell_offsets):
+            for name in offsets_group:
+                if offsets_group[name].shape[0] != len(file_list):
+                    raise ValueError(
+                        f"Array '{name}' is not present in every time step; "
+                        "use --arrays to select arrays common to the whole series."
+                    )
+
+    os.replace(tmp_path, output_path)
+    print(
+        f"[CONSOLIDATE] Wrote {output_path}: {len(file_list)} steps, "
+        f"{part + 1} geometry block(s)."
+    )
+    return output_path
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.output.lower().endswith(VTKHDF_EXTENSIONS):
+        raise ValueError(f"--output must end with one of {VTKHDF_EXTENSIONS}")
+
+    time_dirs, vtp_files = find_vtp_files(args.time_dirs_path)
+    selected = validate_vtp_file(args.vtp_filename, vtp_files)
+
+    file_list: List[str] = []
+    time_values: List[float] = []
+    for td in time_dirs:
+        fp = os.path.join(td, selected)
+        if os.path.exists(fp):
+            file_list.append(fp)
+            time_values.append(float(os.path.basename(td)))
+
+    arrays = [a.strip() for a in (args.arrays or "").split(",") if a.strip()]
+    consolidate_series(
+        file_list,
+        time_values,
+        args.output,
+        arrays=arrays,
+        compression=None if args.compression == "none" else args.compression,
+    )
@@ -0,0 +1,11 @@
+"""pytest options of the render regression tests."""
+from __future__ import annotations
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--update-goldens",
+        action="store_true",
+        default=False,
+        help="Record new golden frames and timings for the render regression tests.",
+    )
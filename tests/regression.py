@@ -0,0 +1,246 @@
+"""Helpers for the golden-image and timing regression tests."""
+from __future__ import annotations
+
+import json
+import math
+import os
+import shutil
+import subprocess
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+BASELINE_PATH = os.path.join(GOLDEN_DIR, "baseline.json")
+
+# Synthetic dataset and render settings the goldens are recorded with.
+STEPS = 12
+RESOLUTION = 64
+RENDER_SIZE = "640x360"
+PARAMS = {"steps": STEPS, "resolution": RESOLUTION, "size": RENDER_SIZE}
+
+# Largest accepted 1 - SSIM per frame, and the timing limit baseline * (1 + margin) + slack.
+IMAGE_TOLERANCE = float(os.environ.get("RENDER_VTPS_IMAGE_TOLERANCE", "0.01"))
+TIMING_MARGIN = float(os.environ.get("RENDER_VTPS_TIMING_MARGIN", "0.25"))
+TIMING_SLACK = float(os.environ.get("RENDER_VTPS_TIMING_SLACK", "0.5"))
+
+# Record new goldens and timings instead of comparing.
+UPDATE = os.environ.get("RENDER_VTPS_UPDATE_GOLDEN", "") not in ("", "0")
+
+# Window of the structural similarity (SSIM) comparison, in pixels.
+_SSIM_WINDOW = 7
+_SSIM_C1 = (0.01 * 255.0) ** 2
+_SSIM_C2 = (0.03 * 255.0) ** 2
+
+# Fixed camera so renders do not depend on ParaView's reset-camera heuristics.
+_CAMERA = "0,-1.6,2.8,0,0,0,0,1,0"
+
+# Extra arguments per case, on top of the common ones from case_argv.
+CASES: Dict[str, List[str]] = {
+    "stream": ["--field", "p", "--range=-1,1"],
+    "sequence": ["--field", "p", "--range=-1,1", "--checkpoint"],
+    "derived": ["--field", "U:magnitude", "--range=0,1.5"],
+    "tiles": ["--field", "p", "--range=-1,1", "--tile-size", "{tile}"],
+}
+
+
+def find_pvpython() -> Optional[str]:
+    """Return the pvpython to render with (``PVPYTHON`` or the one on PATH), or None."""
+    return os.environ.get("PVPYTHON") or shutil.which("pvpython")
+
+
+def write_dataset(root: str, steps: int = STEPS, resolution: int = RESOLUTION) -> str:
+    """Write a synthetic time-directory series under *root* and return *root*.
+
+    Every step holds the same sphere with a travelling wave ``p`` and a
+    swirling vector field ``U`` as point data, so each step differs.
+    """
+    from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+    from vtkmodules.vtkFiltersSources import vtkSphereSource
+    from vtkmodules.vtkIOXML import vtkXMLPolyDataWriter
+
+    sphere = vtkSphereSource()
+    sphere.SetThetaResolution(resolution)
+    sphere.SetPhiResolution(max(3, resolution // 2))
+    sphere.SetRadius(1.0)
+    sphere.Update()
+    surface = sphere.GetOutput()
+    points = vtk_to_numpy(surface.GetPoints().GetData()).astype(np.float64)
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    writer = vtkXMLPolyDataWriter()
+    writer.SetDataModeToAppended()
+    for step in range(steps):
+        t = step / float(max(1, steps - 1))
+        phase = 2.0 * math.pi * t
+        p = np.sin(3.0 * x + phase) * np.cos(2.0 * y)
+        u = np.column_stack((-y * np.cos(phase), x * np.cos(phase), 0.5 * z * np.sin(phase)))
+        data = surface.NewInstance()
+        data.ShallowCopy(surface)
+        data.GetPointData().Initialize()
+        for name, values in (("p", p), ("U", u)):
+            array = numpy_to_vtk(np.ascontiguousarray(values), deep=1)
+            array.SetName(name)
+            data.GetPointData().AddArray(array)
+        step_dir = os.path.join(root, f"{t:g}")
+        os.makedirs(step_dir, exist_ok=True)
+        writer.SetFileName(os.path.join(step_dir, "surface.vtp"))
+        writer.SetInputData(data)
+        writer.Write()
+    return root
+
+
+def case_argv(case: str, data_dir: str, out_dir: str, progress_file: str) -> List[str]:
+    """Return the render_vtps arguments of regression *case*."""
+    width, height = (int(v) for v in RENDER_SIZE.split("x"))
+    tile = f"{max(1, width // 2)}x{max(1, height // 2)}"
+    extra = [arg.replace("{tile}", tile) for arg in CASES[case]]
+    return [
+        "--path", data_dir,
+        "--output", out_dir,
+        "--name", case,
+        "--size", RENDER_SIZE,
+        "--camera", _CAMERA,
+        "--fps", "10",
+        # Lossless H.264, so golden frames compare rendering and not the encoder.
+        "--format", "mkv:crf=0:preset=ultrafast",
+        "--progress", "json",
+        "--progress-file", progress_file,
+        *extra,
+    ]
+
+
+def run_case(pvpython: str, case: str, data_dir: str, work_dir: str) -> Tuple[str, Dict[str, float]]:
+    """Render *case* in a pvpython process; return the movie and the phase timings.
+
+    The timings include the wall time of the whole run as ``total``.
+    """
+    out_dir = os.path.join(work_dir, case)
+    os.makedirs(out_dir, exist_ok=True)
+    progress_file = os.path.join(out_dir, "progress.ndjson")
+    entry = os.path.join(REPO_ROOT, "render_vtps", "_pv_entry.py")
+    started = time.monotonic()
+    subprocess.run(
+        [pvpython, entry, *case_argv(case, data_dir, out_dir, progress_file)],
+        check=True,
+    )
+    timings = phase_timings(progress_file)
+    timings["total"] = time.monotonic() - started
+    return os.path.join(out_dir, f"{case}.mkv"), timings
+
+
+def phase_timings(progress_file: str) -> Dict[str, float]:
+    """Sum the elapsed seconds of every phase ended in a ``--progress json`` file."""
+    timings: Dict[str, float] = {}
+    with open(progress_file, "r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("event") == "end":
+                phase = str(record.get("phase"))
+                timings[phase] = timings.get(phase, 0.0) + float(record.get("elapsed_seconds") or 0.0)
+    return timings
+
+
+def decode_frames(ffmpeg_path: str, movie_path: str) -> np.ndarray:
+    """Decode *movie_path* into an (N, H, W, 3) uint8 array of RENDER_SIZE frames."""
+    width, height = (int(v) for v in RENDER_SIZE.split("x"))
+    result = subprocess.run(
+        [ffmpeg_path, "-loglevel", "error", "-i", movie_path,
+         "-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+        check=True,
+        stdout=subprocess.PIPE,
+    )
+    frame_bytes = width * height * 3
+    count = len(result.stdout) // frame_bytes
+    return np.frombuffer(result.stdout[:count * frame_bytes], dtype=np.uint8).reshape(
+        count, height, width, 3
+    )
+
+
+def read_png(path: str) -> np.ndarray:
+    """Read an RGB(A) PNG into a top-down (H, W, 3) uint8 array."""
+    from vtkmodules.util.numpy_support import vtk_to_numpy
+    from vtkmodules.vtkIOImage import vtkPNGReader
+
+    reader = vtkPNGReader()
+    reader.SetFileName(path)
+    reader.Update()
+    image = reader.GetOutput()
+    width, height, _ = image.GetDimensions()
+    scalars = vtk_to_numpy(image.GetPointData().GetScalars())
+    return np.ascontiguousarray(scalars.reshape(height, width, -1)[::-1, :, :3])
+
+
+def _luma(pixels: np.ndarray) -> np.ndarray:
+    rgb = pixels.astype(np.float64)
+    return 0.299 * rgb[..., 0] + 0.587 * rgb[..., 1] + 0.114 * rgb[..., 2]
+
+
+def _box_mean(image: np.ndarray, size: int) -> np.ndarray:
+    """Mean over every full *size* x *size* window of *image*."""
+    table = np.pad(image, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    sums = table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]
+    return sums / float(size * size)
+
+
+def image_difference(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Return 1 - SSIM of the luma of two (H, W, 3) images; 1.0 when the sizes differ."""
+    if reference.shape != candidate.shape:
+        return 1.0
+    a, b = _luma(reference), _luma(candidate)
+    size = min(_SSIM_WINDOW, a.shape[0], a.shape[1])
+    mean_a, mean_b = _box_mean(a, size), _box_mean(b, size)
+    var_a = _box_mean(a * a, size) - mean_a * mean_a
+    var_b = _box_mean(b * b, size) - mean_b * mean_b
+    covariance = _box_mean(a * b, size) - mean_a * mean_b
+    ssim = ((2.0 * mean_a * mean_b + _SSIM_C1) * (2.0 * covariance + _SSIM_C2)) / (
+        (mean_a * mean_a + mean_b * mean_b + _SSIM_C1) * (var_a + var_b + _SSIM_C2)
+    )
+    return float(min(1.0, max(0.0, 1.0 - ssim.mean())))
+
+
+def checked_frames(count: int) -> List[int]:
+    """First, middle and last frame indices."""
+    return sorted({0, count // 2, count - 1})
+
+
+def compare_timings(
+    baseline: Dict[str, float],
+    timings: Dict[str, float],
+    margin: float = TIMING_MARGIN,
+    slack: float = TIMING_SLACK,
+) -> List[str]:
+    """Return a message for every phase slower than ``baseline * (1 + margin) + slack``."""
+    failures: List[str] = []
+    for phase, seconds in sorted(timings.items()):
+        reference = baseline.get(phase)
+        if reference is None:
+            continue
+        limit = float(reference) * (1.0 + margin) + slack
+        if seconds > limit:
+            failures.append(
+                f"phase '{phase}' took {seconds:.2f}s (baseline {float(reference):.2f}s, limit {limit:.2f}s)"
+            )
+    return failures
+
+
+def load_baseline() -> Dict[str, object]:
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def save_case_baseline(case: str, timings: Dict[str, float]) -> None:
+    """Record the timings of *case* in the baseline, resetting it when PARAMS changed."""
+    baseline = load_baseline()
+    if baseline.get("params") != PARAMS:
+        baseline = {"params": PARAMS, "timings": {}}
+    baseline["timings"][case] = {phase: round(s, 3) for phase, s in timings.items()}
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    with open(BASELINE_PATH, "w", encoding="utf-8") as handle:
+        json.dump(baseline, handle, indent=2, sort_keys=True)
@@ -0,0 +1,61 @@
+"""Unit tests for the image and timing comparisons of the regression tests."""
+from __future__ import annotations
+
+import json
+
+import numpy as np
+
+from regression import checked_frames, compare_timings, image_difference, phase_timings
+
+
+def _image(seed: int = 0) -> np.ndarray:
+    return (np.random.default_rng(seed).random((48, 64, 3)) * 255).astype(np.uint8)
+
+
+def test_identical_images_have_no_difference():
+    image = _image()
+    assert image_difference(image, image) == 0.0
+
+
+def test_small_brightness_change_is_within_tolerance():
+    image = _image()
+    brighter = np.clip(image.astype(np.int16) + 2, 0, 255).astype(np.uint8)
+    assert 0.0 < image_difference(image, brighter) < 0.01
+
+
+def test_different_images_fail():
+    assert image_difference(_image(0), _image(1)) > 0.5
+    assert image_difference(_image(), 255 - _image()) > 0.5
+
+
+def test_size_mismatch_is_full_difference():
+    assert image_difference(_image(), _image()[:-1]) == 1.0
+
+
+def test_compare_timings_applies_margin_and_slack():
+    baseline = {"render": 10.0, "encode": 1.0}
+    assert compare_timings(baseline, {"render": 12.9, "encode": 1.7}, margin=0.25, slack=0.5) == []
+    failures = compare_timings(baseline, {"render": 13.1, "encode": 1.0}, margin=0.25, slack=0.5)
+    assert len(failures) == 1 and "render" in failures[0]
+
+
+def test_compare_timings_ignores_phases_without_baseline():
+    assert compare_timings({}, {"adaptive_scan": 100.0}, margin=0.0, slack=0.0) == []
+
+
+def test_phase_timings_sums_ended_phases(tmp_path):
+    records = [
+        {"event": "start", "phase": "range_scan", "elapsed_seconds": 0.0},
+        {"event": "end", "phase": "range_scan", "elapsed_seconds": 0.5},
+        {"event": "progress", "phase": "render", "elapsed_seconds": 1.0},
+        {"event": "end", "phase": "render", "elapsed_seconds": 2.0},
+        {"event": "end", "phase": "range_scan", "elapsed_seconds": 0.25},
+    ]
+    path = tmp_path / "progress.ndjson"
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\nnot json\n", encoding="utf-8")
+    assert phase_timings(str(path)) == {"range_scan": 0.75, "render": 2.0}
+
+
+def test_checked_frames():
+    assert checked_frames(1) == [0]
+    assert checked_frames(12) == [0, 6, 11]
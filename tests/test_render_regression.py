@@ -0,0 +1,86 @@
+"""Render the synthetic dataset and compare frames and timings with the goldens.
+
+Needs pvpython (``PVPYTHON`` or on PATH) and ffmpeg; skipped otherwise.
+Cases without recorded goldens are skipped; record them with
+``pytest tests --update-goldens`` (or ``RENDER_VTPS_UPDATE_GOLDEN=1``).
+"""
+from __future__ import annotations
+
+import os
+import shutil
+
+import pytest
+
+from regression import (
+    BASELINE_PATH,
+    CASES,
+    GOLDEN_DIR,
+    IMAGE_TOLERANCE,
+    PARAMS,
+    UPDATE,
+    checked_frames,
+    compare_timings,
+    decode_frames,
+    find_pvpython,
+    image_difference,
+    load_baseline,
+    read_png,
+    run_case,
+    save_case_baseline,
+    write_dataset,
+)
+from render_vtps.tiles import write_png
+
+PVPYTHON = find_pvpython()
+FFMPEG = shutil.which("ffmpeg")
+
+pytestmark = pytest.mark.skipif(
+    PVPYTHON is None or FFMPEG is None,
+    reason="render regression tests need pvpython and ffmpeg",
+)
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    return write_dataset(str(tmp_path_factory.mktemp("data")))
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_render_matches_golden(case, tmp_path, request):
+    update = UPDATE or request.config.getoption("update_goldens")
+    case_dir = os.path.join(GOLDEN_DIR, case)
+    baseline = load_baseline()
+    if not update and (not os.path.isdir(case_dir) or case not in baseline.get("timings", {})):
+        pytest.skip(
+            f"no golden frames or baseline for '{case}' in {GOLDEN_DIR}; "
+            "run pytest tests --update-goldens to record them"
+        )
+
+    # Requested here so cases without goldens skip before the dataset is written.
+    dataset = request.getfixturevalue("dataset")
+    movie, timings = run_case(PVPYTHON, case, dataset, str(tmp_path))
+    frames = decode_frames(FFMPEG, movie)
+    assert len(frames) > 0, f"no frames decoded from {movie}"
+
+    if update:
+        shutil.rmtree(case_dir, ignore_errors=True)
+        os.makedirs(case_dir)
+        for index in checked_frames(len(frames)):
+            write_png(os.path.join(case_dir, f"frame_{index:04d}.png"), frames[index])
+        save_case_baseline(case, timings)
+        return
+
+    assert baseline.get("params") == PARAMS, (
+        f"{BASELINE_PATH} was recorded with {baseline.get('params')}, not {PARAMS}."
+    )
+    failures = []
+    for index in checked_frames(len(frames)):
+        golden_path = os.path.join(case_dir, f"frame_{index:04d}.png")
+        if not os.path.exists(golden_path):
+            failures.append(f"frame {index}: golden {golden_path} is missing")
+            continue
+        difference = image_difference(read_png(golden_path), frames[index])
+        if difference > IMAGE_TOLERANCE:
+            failures.append(f"frame {index} differs by {difference:.4f} (tolerance {IMAGE_TOLERANCE:g})")
+    failures += compare_timings(baseline["timings"][case], timings)
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,16 @@
+"""Unit tests for the tile grid of --tile-size renders."""
+from __future__ import annotations
+
+import pytest
+
+from render_vtps.tiles import tile_grid
+
+
+def test_tiles_divide_the_image_exactly():
+    assert tile_grid((15360, 8640), (2048, 2048)) == (8, 5)
+    assert tile_grid((1280, 720), (2048, 2048)) == (1, 1)
+
+
+def test_prime_size_is_rejected():
+    with pytest.raises(ValueError, match="width 7681.*7680"):
+        tile_grid((7681, 4320), (2048, 2048))